@@ -0,0 +1,183 @@
+# benchmarks/bench_backfill.py
+#
+# Market-data backfill for 500 tickers x 20 years through utils/backfill.py
+# against a mocked price source: each request costs a fixed latency plus a
+# per-row transfer cost. Requests hold utils/market_data.py's
+# _DOWNLOAD_LOCK, as live yf.download calls do, so extra workers only
+# overlap the Parquet writes with the next request. Reports throughput by
+# worker count next to the old single-window batches, then a run
+# interrupted partway and resumed, and a window extended five years back
+# (only the new shards are fetched).
+# Loads go into DuckDB through StagedCopyLoad with the PUT/COPY replaced by
+# read_parquet over the shard files, with the same simulated Snowflake
+# latencies as bench_market_merge (the PUT counts as one write).
+#
+#   PYTHONPATH=.:market-data python -m benchmarks.bench_backfill --tickers 500 --years 20
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stand_ins import DuckDBSession
+from utils.backfill import Backfill, StagedCopyLoad, plan_shards
+from utils.landing_format import get_schema
+
+TABLE = "RAW_SP500_MARKET_DATA_HIST"
+END = "2025-01-01"
+
+CREATE = f"""
+CREATE TABLE {TABLE} (
+    TICKER VARCHAR, DATE DATE, OPEN DOUBLE, HIGH DOUBLE, LOW DOUBLE, PRICE DOUBLE,
+    VOLUME BIGINT, SECTOR VARCHAR, INDUSTRY VARCHAR, LAST_UPDATED TIMESTAMP,
+    INSERTED_DATE TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+class Interrupted(Exception):
+    pass
+
+
+class MockSource:
+    # Deterministic OHLCV per (ticker, business day); sleeps to stand in
+    # for the request round trip and response size
+    def __init__(self, latency: float, row_cost: float, fail_after: int = None):
+        self.latency = latency
+        self.row_cost = row_cost
+        self.fail_after = fail_after
+        self.requests = 0
+        self.now = pd.Timestamp("2025-01-02 06:00:00", tz="UTC")
+
+    def history(self, tickers: list, start, end) -> pd.DataFrame:
+        self.requests += 1
+        if self.fail_after is not None and self.requests > self.fail_after:
+            raise Interrupted(f"interrupted at request {self.requests}")
+        # Imported here: the suite borrows DuckDBCopyLoad without market-data on the path
+        from utils.market_data import _DOWNLOAD_LOCK
+
+        days = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        with _DOWNLOAD_LOCK:
+            time.sleep(self.latency + self.row_cost * len(tickers) * len(days))
+
+        seed = int(pd.Timestamp(start).strftime('%Y%m%d')) + len(tickers)
+        rng = np.random.default_rng(seed)
+        size = len(tickers) * len(days)
+        price = rng.uniform(10, 500, size).round(2)
+        return pd.DataFrame({
+            'TICKER': np.repeat(tickers, len(days)), 'DATE': np.tile(days.values, len(tickers)),
+            'OPEN': price, 'HIGH': price * 1.01, 'LOW': price * 0.99, 'PRICE': price,
+            'VOLUME': rng.integers(100_000, 50_000_000, size),
+            'SECTOR': 'Information Technology', 'INDUSTRY': 'Software - Infrastructure',
+            'LAST_UPDATED': self.now,
+        })
+
+    def fetch_shard(self, shard) -> pd.DataFrame:
+        return self.history(shard.tickers, shard.start, shard.end)
+
+
+class DuckDBCopyLoad(StagedCopyLoad):
+    # DuckDB has no stages: the files are read in place
+    def _put(self, files: list):
+        self.session._round_trip("PUT", self.session.write_latency)
+
+    def _copy_sql(self, files: list, dataset: str) -> str:
+        columns = ", ".join(get_schema(dataset).schema.names)
+        paths = ", ".join(f"'{path}'" for path in files)
+        return f"INSERT INTO {self.staging} ({columns}) SELECT {columns} FROM read_parquet([{paths}])"
+
+
+def new_session(statement_latency: float, write_latency: float) -> DuckDBSession:
+    session = DuckDBSession(statement_latency, write_latency)
+    session.db.execute(CREATE)
+    return session
+
+
+def table_stats(session) -> tuple:
+    return session.db.execute(f"SELECT COUNT(*), COUNT(DISTINCT (TICKER, DATE)) FROM {TABLE}").fetchone()
+
+
+# -------------------
+# Runs
+# -------------------
+def single_window(tickers: list, start: str, source: MockSource, session, batch_size: int = 100) -> tuple:
+    # The old full load: one request per 100 tickers over the whole window,
+    # written straight to the table
+    started = time.perf_counter()
+    rows = 0
+    for i in range(0, len(tickers), batch_size):
+        df = source.history(tickers[i:i + batch_size], start, END)
+        session.write_pandas(df, TABLE)
+        rows += len(df)
+    return rows, time.perf_counter() - started
+
+
+def sharded(tickers: list, start: str, source: MockSource, root: str, workers: int, session,
+            group_size: int = 50, span_years: int = 1) -> tuple:
+    engine = Backfill(source.fetch_shard, root, "marketdata", workers=workers)
+    shards = plan_shards(tickers, start, END, group_size=group_size, span_years=span_years)
+    stats = engine.run(shards)
+    loaded = engine.load(DuckDBCopyLoad(session, TABLE, keys=['TICKER', 'DATE'], order_by='LAST_UPDATED'))
+    return stats, loaded, session
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--row-cost", type=float, default=2e-6, help="seconds per row returned")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--statement-latency", type=float, default=0.15)
+    parser.add_argument("--write-latency", type=float, default=1.2,
+                        help="seconds per write_pandas or PUT")
+    args = parser.parse_args()
+
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    start = f"{2025 - args.years}-01-01"
+    results = []
+    latencies = (args.statement_latency, args.write_latency)
+
+    rows, elapsed = single_window(tickers, start, MockSource(args.latency, args.row_cost), new_session(*latencies))
+    results.append(("single window", 1, rows, elapsed, 0.0))
+
+    for workers in [int(w) for w in args.workers.split(",")]:
+        with tempfile.TemporaryDirectory() as root:
+            started = time.perf_counter()
+            stats, loaded, _ = sharded(tickers, start, MockSource(args.latency, args.row_cost), root, workers,
+                                       new_session(*latencies))
+            total = time.perf_counter() - started
+            results.append(("sharded", workers, stats['rows'], total, loaded['elapsed']))
+
+    print()
+    print(f"{'mode':<14} {'workers':>7} {'rows':>11} {'elapsed':>9} {'load':>7} {'rows/s':>10}")
+    for mode, workers, rows, elapsed, load in results:
+        print(f"{mode:<14} {workers:>7} {rows:>11,} {elapsed:8.2f}s {load:6.2f}s {rows / elapsed:>10,.0f}")
+
+    # Interrupted after 60 shard requests, then resumed; then extended five years back
+    print()
+    workers = max(int(w) for w in args.workers.split(","))
+    with tempfile.TemporaryDirectory() as root:
+        source = MockSource(args.latency, args.row_cost, fail_after=60)
+        stats, loaded, session = sharded(tickers, start, source, root, workers, new_session(*latencies))
+        print(f"interrupted: {stats['shards'] - stats['failed']} shards fetched, {stats['failed']} failed, "
+              f"{loaded['files']} files loaded, table rows={table_stats(session)[0]:,}")
+
+        source = MockSource(args.latency, args.row_cost)
+        stats, loaded, session = sharded(tickers, start, source, root, workers, session=session)
+        count, distinct = table_stats(session)
+        print(f"resumed:     {source.requests} requests for {stats['skipped']} skipped shards, "
+              f"{loaded['merged']:,} merged, table rows={count:,} distinct keys={distinct:,}")
+
+        source = MockSource(args.latency, args.row_cost)
+        extended = f"{2025 - args.years - 5}-01-01"
+        stats, loaded, session = sharded(tickers, extended, source, root, workers, session=session)
+        count, distinct = table_stats(session)
+        print(f"extended:    {source.requests} requests ({stats['skipped']} shards skipped), "
+              f"{loaded['merged']:,} merged, table rows={count:,} distinct keys={distinct:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_bulk_insert.py
+#
+# Per-row INSERT vs utils.snowflake_bulk.bulk_insert against a counting
+# stand-in connection.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_bulk_insert --rows 20000 --latency 0.002
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stand_ins import CountingConnection
+from utils.snowflake_bulk import bulk_insert
+
+TABLE = "FINANCE_DB.DIVIDENDS_SCHEMA.DIVIDENDS"
+SQL = f"INSERT INTO {TABLE} (date, dividend, ticker) VALUES (%s, %s, %s)"
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'date': pd.date_range("2000-01-03", periods=rows, freq="D").date,
+        'dividend': rng.uniform(0.05, 2.0, rows).round(4),
+        'ticker': rng.choice(["AAPL", "MSFT", "KO", "PEP", "JNJ"], rows),
+    })
+
+
+def per_row(conn, df):
+    cursor = conn.cursor()
+    for _, row in df.iterrows():
+        cursor.execute(SQL, (row['date'], row['dividend'], row['ticker']))
+
+
+def bulk(conn, df):
+    bulk_insert(conn.cursor(), TABLE, df, columns=['date', 'dividend', 'ticker'])
+
+
+def run(name, fn, df, latency):
+    conn = CountingConnection(latency=latency)
+    start = time.perf_counter()
+    fn(conn, df)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} rows={conn.rows_written:>7} round_trips={conn.round_trips:>7} "
+          f"elapsed={elapsed:8.3f}s rows/sec={conn.rows_written / elapsed:12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.002,
+                        help="simulated seconds per round-trip")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    run("per-row", per_row, df, args.latency)
+    run("bulk", bulk, df, args.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_dbt_incremental.py
+#
+# Renders the incremental dbt history models and runs them on DuckDB to
+# compare the old `Src_Inserted_Date not in (select INSERTED_DATE from
+# this)` anti-join with the watermark filter as history grows. Each step
+# holds N days of history for 500 tickers in both the staging table and
+# the model, loads one new day, and runs the incremental select.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_dbt_incremental --days 250 1000 2500
+
+import argparse
+import time
+
+import duckdb
+
+from benchmarks.dbt_duckdb import merge, model_path, profiled, render
+
+MODEL = model_path("MarketData_Domain/SP500_MarketData_Hist.sql")
+UNIQUE_KEY = ['TICKER', 'MARKET_DATE']
+
+# The predicate the model used before the watermark
+ANTI_JOIN = """
+select TICKER, MARKET_DATE, OPEN, HIGH, LOW, CLOSE, VOLUME,
+       INSERTED_DATE as Src_Inserted_Date, current_date as INSERTED_DATE
+from staging_market_data
+where INSERTED_DATE is not null
+  and INSERTED_DATE not in (select INSERTED_DATE from SP500_MarketData_Hist)
+"""
+
+
+def build(days: int, tickers: int):
+    # One load per trading day; all of a day's rows share its load timestamp
+    db = duckdb.connect()
+    db.execute(f"""
+        create table staging_market_data as
+        select 'T' || lpad(t::varchar, 3, '0') as TICKER,
+               date '2015-01-02' + d::integer as MARKET_DATE,
+               100.0 + d as OPEN, 101.0 + d as HIGH, 99.0 + d as LOW, 100.5 + d as CLOSE,
+               1000000 + t as VOLUME,
+               timestamp '2015-01-02 22:00:00' + to_days(d::integer) as INSERTED_DATE
+        from range({days}) r1(d), range({tickers}) r2(t)
+        order by d, t
+    """)
+    db.execute("""
+        create table SP500_MarketData_Hist as
+        select TICKER, MARKET_DATE, OPEN, HIGH, LOW, CLOSE, VOLUME,
+               INSERTED_DATE as Src_Inserted_Date, current_date as INSERTED_DATE
+        from staging_market_data
+    """)
+    db.execute(f"""
+        insert into staging_market_data
+        select TICKER, MARKET_DATE + 1, OPEN, HIGH, LOW, CLOSE, VOLUME, INSERTED_DATE + interval 1 day
+        from staging_market_data where MARKET_DATE = date '2015-01-02' + {days - 1}
+    """)
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, nargs="+", default=[250, 1000, 2500])
+    parser.add_argument("--tickers", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'history rows':>12}  {'anti-join':>28}  {'watermark':>38}")
+    for days in args.days:
+        db = build(days, args.tickers)
+        anti_seconds, anti_scanned, anti_rows = profiled(db, ANTI_JOIN)
+
+        lookup_start = time.perf_counter()
+        sql = render(MODEL, db, "SP500_MarketData_Hist", incremental=True)
+        lookup = time.perf_counter() - lookup_start
+        seconds, scanned, rows = profiled(db, sql)
+        merged = merge(db, "SP500_MarketData_Hist", sql, UNIQUE_KEY)
+        total = db.execute("select count(*) from SP500_MarketData_Hist").fetchone()[0]
+        assert total == (days + 1) * args.tickers, total
+
+        print(f"{days * args.tickers:>12,}  {anti_seconds * 1000:7.1f}ms scanned={anti_scanned:>10,}  "
+              f"{seconds * 1000:7.1f}ms scanned={scanned:>8,} (+{lookup * 1000:.1f}ms watermark)  "
+              f"rows={rows} merged={merged}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_dividend_analytics.py
+#
+# utils/dividend_analytics.dividend_metrics() against the same metrics
+# computed one ticker at a time, on synthetic history: 500 tickers x 20
+# years of daily closes and monthly/quarterly/semiannual/annual dividends,
+# with growth, cuts and occasional specials. The per-ticker results are
+# checked against the batched ones before timing is reported.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_dividend_analytics --tickers 500 --years 20
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.dividend_analytics import CHANGE_TOLERANCE, SPECIAL_RATIO, dividend_metrics
+
+
+def make_history(tickers: int, years: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    names = np.array([f"T{i:03d}" for i in range(tickers)])
+    end = pd.Timestamp("2024-06-28")
+    days = pd.bdate_range(end - pd.DateOffset(years=years), end)
+
+    walk = np.exp(np.cumsum(rng.normal(0.0003, 0.015, (tickers, len(days))), axis=1))
+    prices = pd.DataFrame({
+        'ticker': np.repeat(names, len(days)),
+        'date': np.tile(days, tickers),
+        'price': (rng.uniform(10, 200, tickers)[:, None] * walk).ravel(),
+    })
+
+    rows = []
+    frequency = rng.choice([12, 4, 4, 4, 2, 1], tickers)
+    growth = rng.normal(0.05, 0.04, tickers)
+    for per_year in (1, 2, 4, 12):
+        chosen = np.flatnonzero(frequency == per_year)
+        payments = years * per_year
+        step = 365.25 / per_year
+        offsets = (np.arange(payments) * step + rng.integers(0, 5, (len(chosen), payments))).astype(int)
+        dates = days[0] + pd.to_timedelta(offsets.ravel(), unit='D')
+        base = rng.uniform(0.05, 1.0, len(chosen))[:, None] / per_year
+        amount = base * (1 + growth[chosen])[:, None] ** (np.arange(payments) / per_year)
+        special = rng.random(amount.shape) < 0.01
+        amount = np.where(special, amount * 4, amount)
+        rows.append(pd.DataFrame({'ticker': np.repeat(names[chosen], payments), 'date': dates,
+                                  'dividend': amount.ravel()}))
+    dividends = pd.concat(rows, ignore_index=True)
+    dividends = dividends[dividends['date'] <= end].sort_values(['date', 'ticker'], ignore_index=True)
+    return dividends, prices, end
+
+
+def per_ticker(dividends: pd.DataFrame, prices: pd.DataFrame, as_of: pd.Timestamp) -> pd.DataFrame:
+    # Baseline: the same metrics one ticker at a time
+    last_year = as_of.year - 1
+    out = {}
+    price_by_ticker = dict(tuple(prices[prices['date'] <= as_of].groupby('ticker')))
+    for ticker, group in dividends[dividends['date'] <= as_of].groupby('ticker'):
+        annual = group.groupby(group['date'].dt.year)['dividend'].sum()
+        annual = annual.reindex(range(annual.index.min(), last_year + 1), fill_value=0.0)
+        values = annual.to_numpy()
+
+        streak = 0
+        for i in range(len(values) - 1, 0, -1):
+            if values[i - 1] > 0 and values[i] > values[i - 1] * (1 + CHANGE_TOLERANCE):
+                streak += 1
+            else:
+                break
+        cagr = {}
+        for years in (1, 3, 5):
+            start, end = values[-1 - years], values[-1]
+            cagr[f'cagr_{years}y'] = (end / start) ** (1 / years) - 1 if start > 0 and end > 0 else np.nan
+
+        counts = group.groupby(group['date'].dt.year).size().reindex(range(last_year - 2, last_year + 1),
+                                                                      fill_value=0)
+        paying = counts[counts > 0]
+        typical = paying.median() if len(paying) else 0.0
+        recent = group[group['date'].dt.year > last_year - 3]['dividend']
+        specials = int((recent > SPECIAL_RATIO * recent.median()).sum()) if len(recent) else 0
+        uneven = bool(((paying - typical).abs() > np.ceil(0.25 * typical)).any())
+
+        ttm = group.loc[group['date'] > as_of - pd.Timedelta(days=365), 'dividend'].sum()
+        price = price_by_ticker[ticker]['price'].iloc[-1]
+        out[ticker] = {'ttm_dividend': ttm, 'yield_ttm': ttm / price, 'growth_streak': streak, **cagr,
+                       'payments_per_year': typical, 'special_dividends': specials,
+                       'irregular': (len(paying) > 0 and uneven) or specials > 0}
+    return pd.DataFrame.from_dict(out, orient='index')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    dividends, prices, as_of = make_history(args.tickers, args.years)
+    print(f"{len(dividends):,} dividends, {len(prices):,} closes")
+
+    runs = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        metrics = dividend_metrics(dividends, prices, as_of=as_of)
+        runs.append(time.perf_counter() - start)
+    batched = statistics.median(runs)
+
+    start = time.perf_counter()
+    expected = per_ticker(dividends, prices, as_of)
+    looped = time.perf_counter() - start
+
+    got = metrics.loc[expected.index, expected.columns]
+    for column in expected.columns:
+        a, b = got[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float)
+        assert np.allclose(a, b, equal_nan=True), column
+
+    print(f"batched    {batched * 1000:8.1f}ms")
+    print(f"per-ticker {looped * 1000:8.1f}ms  ({looped / batched:.0f}x)")
+    print(metrics['frequency'].value_counts().to_dict(), f"irregular={int(metrics['irregular'].sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_dividend_upload.py
+#
+# One CSV per ticker (HEAD + PUT each) vs one consolidated landing file
+# written by utils.s3_landing.write_partition, against moto S3. Also checks
+# that a second run for the same day is skipped by the manifest.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_dividend_upload --tickers 500
+
+import argparse
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from moto import mock_aws
+
+from benchmarks.stand_ins import S3CallCounter, moto_s3_client
+from utils.s3_landing import file_exists_in_s3, write_partition
+
+BUCKET = "bench-dividends"
+PREFIX = "dividends/"
+RUN_DATE = "2024-01-02"
+
+
+def make_frame(tickers: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'date': pd.Timestamp(RUN_DATE, tz="America/New_York"),
+        'dividend': rng.uniform(0.05, 2.0, tickers).round(4),
+        'ticker': [f"T{i:03d}" for i in range(tickers)],
+    })
+
+
+def per_ticker(s3, df):
+    for ticker, rows in df.groupby('ticker'):
+        key = f"{PREFIX}{ticker}_dividends_{RUN_DATE}.csv"
+        if file_exists_in_s3(s3, BUCKET, key):
+            continue
+        buffer = BytesIO()
+        rows.to_csv(buffer, index=False)
+        buffer.seek(0)
+        s3.upload_fileobj(buffer, BUCKET, key)
+
+
+def consolidated(s3, df):
+    write_partition(s3, BUCKET, PREFIX, "dividends", df, RUN_DATE)
+
+
+def run(name, fn, df):
+    with mock_aws():
+        s3 = moto_s3_client(BUCKET)
+        counter = S3CallCounter(s3)
+        start = time.perf_counter()
+        fn(s3, df)
+        elapsed = time.perf_counter() - start
+        first = dict(counter.calls)
+        fn(s3, df)
+        rerun = {k: counter.calls[k] - first.get(k, 0) for k in counter.calls if counter.calls[k] - first.get(k, 0)}
+        objects = s3.list_objects_v2(Bucket=BUCKET).get('KeyCount', 0)
+    print(f"{name:<13} s3_calls={sum(first.values()):>5} objects={objects:>5} "
+          f"elapsed={elapsed:6.2f}s  first={first}  rerun={rerun}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    args = parser.parse_args()
+
+    df = make_frame(args.tickers)
+    run("per-ticker", per_ticker, df)
+    run("consolidated", consolidated, df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# benchmarks/bench_divisense.py
+#
+# Dashboard query latency against the DiviSense summary before and after
+# materializing it, on DuckDB. "Before" is the old view chain: prev-day
+# market data, average dividend per year, and the six-scan sentiment
+# comments view over the article history. "After" reads the incrementally
+# maintained DiviSense_SP500_SUMMARY through v_DeviSense_SP500_SUMMARY.
+# Also times the incremental refresh after one more day of loads.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_divisense --days 250 --articles 4
+
+import argparse
+import statistics
+import time
+
+import duckdb
+
+from benchmarks.dbt_duckdb import build_model, model_path, profiled, render, run_incremental
+
+# Upstream views DIVISENSE joins; their models are not part of this repo
+UPSTREAM_VIEWS = """
+create or replace view v_SP500_MarketData_PrevDay as
+select * from SP500_MarketData_Hist
+qualify row_number() over (partition by TICKER order by MARKET_DATE desc) = 1;
+
+create or replace view v_SP500_Dividend_Avg_PrevYear as
+select TICKER, max(year(DIVIDEND_DATE)) as DIVIDEND_YEAR, avg(DIVIDEND) as AVG_DIVIDEND_PERYEAR
+from SP500_STOCKS_DIVIDENDData_Hist
+where DIVIDEND_DATE >= current_date - 365
+group by TICKER;
+"""
+
+# The sentiment comments view and summary view as they were before
+BEFORE = """
+create or replace view old_sentiment_comments as
+select ss.TICKER, concat(ss.TICKER, ' has a Sentiment Scrore of ', estimatedsentiment,
+       ', Somewhat-Bullish :: ', coalesce(sb.n, 0), ', Neutral ::', coalesce(nt.n, 0),
+       ', Bullish ::', coalesce(bl.n, 0), ', Somewhat-Bearish ::', coalesce(sbr.n, 0),
+       ', Bearish ::', coalesce(br.n, 0)) as COMMENTS
+from (select TICKER, sum(RELEVANCE_SCORE * OVERALL_SENTIMENT_SCORE) / sum(RELEVANCE_SCORE) as estimatedsentiment
+      from SP500_SentimentData_Hist group by TICKER) ss
+left join (select TICKER, count(1) n from SP500_SentimentData_Hist
+           where OVERALL_SENTIMENT_LABEL = 'Somewhat-Bullish' group by TICKER) sb on ss.TICKER = sb.TICKER
+left join (select TICKER, count(1) n from SP500_SentimentData_Hist
+           where OVERALL_SENTIMENT_LABEL = 'Neutral' group by TICKER) nt on sb.TICKER = nt.TICKER
+left join (select TICKER, count(1) n from SP500_SentimentData_Hist
+           where OVERALL_SENTIMENT_LABEL = 'Bullish' group by TICKER) bl on sb.TICKER = bl.TICKER
+left join (select TICKER, count(1) n from SP500_SentimentData_Hist
+           where OVERALL_SENTIMENT_LABEL = 'Somewhat-Bearish' group by TICKER) sbr on sb.TICKER = sbr.TICKER
+left join (select TICKER, count(1) n from SP500_SentimentData_Hist
+           where OVERALL_SENTIMENT_LABEL = 'Bearish' group by TICKER) br on sb.TICKER = br.TICKER;
+
+create or replace view old_divisense_summary as
+select md.TICKER, md.MARKET_DATE, md.OPEN, md.HIGH, md.LOW, md.CLOSE, md.VOLUME,
+       da.AVG_DIVIDEND_PERYEAR Dividend, da.DIVIDEND_YEAR, ts.COMMENTS
+from v_SP500_MarketData_PrevDay md
+inner join v_SP500_Dividend_Avg_PrevYear da on md.TICKER = da.TICKER
+inner join old_sentiment_comments ts on md.TICKER = ts.TICKER;
+"""
+
+LABEL = """case when s < -0.5 then 'Bearish' when s < -0.1 then 'Somewhat-Bearish'
+               when s < 0.1 then 'Neutral' when s < 0.5 then 'Somewhat-Bullish' else 'Bullish' end"""
+
+
+def load_sentiment(db, day: int, tickers: int, articles: int):
+    # Sentiment rows carry only the load date, as in Snowflake
+    db.execute(f"""
+        insert into SP500_SentimentData_Hist
+        select TICKER, RELEVANCE_SCORE, s, {LABEL}, date '2000-01-01' + {day}
+        from (select 'T' || lpad(t::varchar, 3, '0') as TICKER, 0.1 + random() * 0.9 as RELEVANCE_SCORE,
+                     random() * 2 - 1 as s
+              from range({tickers}) r(t), range({articles}) a(i))
+    """)
+
+
+def load_day(db, day: int, horizon: int, tickers: int, articles: int):
+    # One trading day of market rows, sentiment articles and (every 21st
+    # day) dividends, stamped with that day's load time. Day `horizon` is
+    # today.
+    loaded = f"timestamp '2000-01-01' + to_days({day})"
+    market_date = f"current_date - {horizon - day}"
+    db.execute(f"""
+        insert into SP500_MarketData_Hist
+        select 'T' || lpad(t::varchar, 3, '0'), {market_date}, 100.0 + t, 101.0 + t, 99.0 + t, 100.5 + t,
+               1000000 + t, {loaded}, current_date
+        from range({tickers}) r(t)
+    """)
+    load_sentiment(db, day, tickers, articles)
+    if day % 21 == 0:
+        db.execute(f"""
+            insert into SP500_STOCKS_DIVIDENDData_Hist
+            select 'T' || lpad(t::varchar, 3, '0'), 0.1 + t / 1000, {market_date}, {loaded}, current_date
+            from range({tickers}) r(t)
+        """)
+
+
+def build(days: int, tickers: int, articles: int):
+    # Leaves yesterday free for the incremental step
+    db = duckdb.connect()
+    db.execute("""
+        create table SP500_MarketData_Hist (TICKER varchar, MARKET_DATE date, OPEN double, HIGH double,
+            LOW double, CLOSE double, VOLUME bigint, Src_Inserted_Date timestamp, INSERTED_DATE date);
+        create table SP500_STOCKS_DIVIDENDData_Hist (TICKER varchar, DIVIDEND double, DIVIDEND_DATE date,
+            Src_Inserted_Date timestamp, INSERTED_DATE date);
+        create table SP500_SentimentData_Hist (TICKER varchar, RELEVANCE_SCORE double,
+            OVERALL_SENTIMENT_SCORE double, OVERALL_SENTIMENT_LABEL varchar, INSERTED_DATE date);
+    """)
+    for day in range(days):
+        load_day(db, day, days + 1, tickers, articles)
+    db.execute(UPSTREAM_VIEWS)
+    db.execute(BEFORE)
+
+    build_model(db, "SentimentData_Domain/SP500_Sentiment_Ticker_Summary.sql", "SP500_Sentiment_Ticker_Summary")
+    build_model(db, "SentimentData_Domain/ v_Ticker_Sentiment_Score_Comments.sql",
+                "v_Ticker_Sentiment_Score_Comments", materialized="view")
+    build_model(db, "DIVISENSE/DiviSense_SP500_SUMMARY.sql", "DiviSense_SP500_SUMMARY")
+    build_model(db, "DIVISENSE/v_DeviSense_SP500_SUMMARY.sql", "v_DeviSense_SP500_SUMMARY", materialized="view")
+    return db
+
+
+def timed(db, sql: str, repeat: int) -> tuple:
+    runs = [profiled(db, sql) for _ in range(repeat)]
+    return statistics.median(r[0] for r in runs), runs[0][1], runs[0][2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--articles", type=int, default=4, help="sentiment articles per ticker per day")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = build(args.days, args.tickers, args.articles)
+    print(f"Built {args.days} days x {args.tickers} tickers in {time.perf_counter() - start:.1f}s")
+
+    queries = {
+        "full summary": "select * from {}",
+        "one ticker": "select * from {} where TICKER = 'T042'",
+    }
+    print(f"{'query':<14} {'before':>28} {'after':>28}")
+    for name, query in queries.items():
+        before = timed(db, query.format("old_divisense_summary"), args.repeat)
+        after = timed(db, query.format("v_DeviSense_SP500_SUMMARY"), args.repeat)
+        assert before[2] == after[2], (before, after)
+        print(f"{name:<14} {before[0] * 1000:8.1f}ms scanned={before[1]:>9,} "
+              f"{after[0] * 1000:8.1f}ms scanned={after[1]:>9,}")
+
+    # Next day's loads, then the incremental refresh dbt would run
+    load_day(db, args.days, args.days + 1, args.tickers, args.articles)
+    start = time.perf_counter()
+    run_incremental(db, "SentimentData_Domain/SP500_Sentiment_Ticker_Summary.sql",
+                    "SP500_Sentiment_Ticker_Summary", ['TICKER'])
+    merged = run_incremental(db, "DIVISENSE/DiviSense_SP500_SUMMARY.sql", "DiviSense_SP500_SUMMARY",
+                             ['TICKER', 'MARKET_DATE'])
+    refresh = time.perf_counter() - start
+
+    full_sql = render(model_path("DIVISENSE/DiviSense_SP500_SUMMARY.sql"), db, "DiviSense_SP500_SUMMARY", False)
+    expected = db.execute(f"select TICKER, MARKET_DATE, Dividend, COMMENTS from ({full_sql}) "
+                          f"except select TICKER, MARKET_DATE, Dividend, COMMENTS from DiviSense_SP500_SUMMARY").fetchall()
+    assert not expected, expected[:3]
+    print(f"incremental refresh after one day: {refresh * 1000:.1f}ms, {merged} rows merged")
+
+    # A second sentiment load later the same day: the boundary day is
+    # re-read, and the totals must match a full rebuild
+    load_sentiment(db, args.days, args.tickers, args.articles)
+    run_incremental(db, "SentimentData_Domain/SP500_Sentiment_Ticker_Summary.sql",
+                    "SP500_Sentiment_Ticker_Summary", ['TICKER'])
+    full_sql = render(model_path("SentimentData_Domain/SP500_Sentiment_Ticker_Summary.sql"), db,
+                      "SP500_Sentiment_Ticker_Summary", False)
+    columns = "TICKER, SENTIMENT_COUNT, BULLISH_COUNT, NEUTRAL_COUNT, BEARISH_COUNT, round(RELEVANCE_SUM, 6)"
+    expected = db.execute(f"select {columns} from ({full_sql}) "
+                          f"except select {columns} from SP500_Sentiment_Ticker_Summary").fetchall()
+    assert not expected, expected[:3]
+    print("sentiment totals after a second load the same day match a full rebuild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_import_time.py
+#
+# Cold-import cost of each loader, measured with `python -X importtime` in a
+# fresh interpreter. Importing a loader should not connect to anything or
+# pull in snowpark/yfinance/pandas_market_calendars; those load on first use.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_import_time
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, module, directories put on sys.path ahead of the repo root)
+LOADERS = [
+    ("dividend daily", "main_dividend", ["dividend-data/daily-load", "dividend-data"]),
+    ("dividend full", "main_dividend", ["dividend-data/full-load"]),
+    ("market daily", "load_sp500_marketdata", ["market-data/daily-load", "market-data"]),
+    ("market full", "load_sp500_marketdata", ["market-data/full-load", "market-data"]),
+    ("sentiment", "main", ["sentiment-data"]),
+]
+
+HEAVY = ("snowflake", "yfinance", "pandas_market_calendars")
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def measure(module: str, paths: list) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.join(ROOT, p) for p in paths] + [ROOT])
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, cwd=os.path.join(ROOT, paths[0]))
+    wall = time.perf_counter() - start
+
+    cumulative_us = 0
+    heavy = set()
+    for match in LINE.finditer(proc.stderr):
+        name = match.group(3)
+        if name == module:
+            cumulative_us = int(match.group(2))
+        if name.split(".")[0] in HEAVY:
+            heavy.add(name.split(".")[0])
+
+    return {
+        'ok': proc.returncode == 0,
+        'wall': wall,
+        'import_ms': cumulative_us / 1000,
+        'heavy': sorted(heavy),
+        'error': proc.stderr.strip().splitlines()[-1] if proc.returncode else "",
+    }
+
+
+def main():
+    for label, module, paths in LOADERS:
+        result = measure(module, paths)
+        status = "ok" if result['ok'] else f"FAILED: {result['error']}"
+        heavy = ", ".join(result['heavy']) or "none"
+        print(f"{label:<15} import={result['import_ms']:8.1f}ms  process={result['wall']:6.2f}s  "
+              f"heavy imports={heavy}  {status}")
+
+
+if __name__ == "__main__":
+    main()
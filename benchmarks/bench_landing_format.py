@@ -0,0 +1,105 @@
+# benchmarks/bench_landing_format.py
+#
+# Landing-file formats for the three S3 datasets: plain CSV (full dividend
+# load, sentiment spool), gzip CSV (daily dividend partition) and the
+# schema-validated zstd Parquet from utils/landing_format.py. Reports
+# bytes, serialize time, and load time into a table on DuckDB as a
+# stand-in for the Snowflake COPY, plus whether the column types survive.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_landing_format --tickers 500
+
+import argparse
+import os
+import tempfile
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from utils.landing_format import get_schema, serialize
+
+
+def make_frames(tickers: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    names = np.array([f"T{i:03d}" for i in range(tickers)])
+
+    quarters = pd.date_range("2005-01-15", "2024-12-15", freq="QS", tz="America/New_York")
+    dividends = pd.DataFrame({
+        'date': np.tile(quarters, tickers),
+        'dividend': rng.uniform(0.01, 2.0, tickers * len(quarters)).round(4),
+        'ticker': np.repeat(names, len(quarters)),
+    })
+
+    days = pd.bdate_range("2020-01-01", "2024-12-31")
+    size = tickers * len(days)
+    price = rng.uniform(10, 500, size)
+    market = pd.DataFrame({
+        'TICKER': np.repeat(names, len(days)), 'DATE': np.tile(days, tickers),
+        'OPEN': price, 'HIGH': price * 1.01, 'LOW': price * 0.99, 'PRICE': price,
+        'VOLUME': rng.integers(100_000, 50_000_000, size),
+        'SECTOR': 'Information Technology', 'INDUSTRY': 'Software - Infrastructure',
+        'LAST_UPDATED': pd.Timestamp("2025-01-02 06:00:00", tz="UTC"),
+    })
+
+    articles = tickers * 40
+    published = pd.Timestamp("2024-12-01") + pd.to_timedelta(rng.integers(0, 30 * 86400, articles), unit='s')
+    relevance = rng.uniform(0, 1, articles).round(6)
+    relevance[rng.random(articles) < 0.05] = np.nan
+    sentiment = pd.DataFrame({
+        'ticker': np.repeat(names, 40),
+        'title': [f"Company {i % tickers} reports quarterly results ahead of estimates, shares move" for i in range(articles)],
+        'source': rng.choice(['Benzinga', 'Motley Fool', 'Zacks Commentary', 'Reuters'], articles),
+        'time_published': published.strftime('%Y%m%dT%H%M%S'),
+        'overall_sentiment_score': rng.uniform(-1, 1, articles).round(6),
+        'overall_sentiment_label': rng.choice(['Bearish', 'Somewhat-Bearish', 'Neutral', 'Somewhat-Bullish', 'Bullish'], articles),
+        'relevance_score': relevance,
+        'sentiment_date': published.normalize(),
+    })
+    return {"dividends": dividends, "marketdata": market, "sentiment": sentiment}
+
+
+def write(df: pd.DataFrame, dataset: str, fmt: str, path: str) -> float:
+    start = time.perf_counter()
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "csv.gz":
+        df.to_csv(path, index=False, compression={'method': 'gzip', 'mtime': 0})
+    else:
+        body, _ = serialize(df, dataset, "parquet")
+        with open(path, "wb") as f:
+            f.write(body.getbuffer())
+    return time.perf_counter() - start
+
+
+def load(db, fmt: str, path: str) -> tuple:
+    reader = f"read_parquet('{path}')" if fmt == "parquet" else f"read_csv('{path}')"
+    start = time.perf_counter()
+    db.execute(f"create or replace table landed as select * from {reader}")
+    seconds = time.perf_counter() - start
+    types = {name: kind for name, kind, *_ in db.execute("describe landed").fetchall()}
+    return seconds, types
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    args = parser.parse_args()
+
+    frames = make_frames(args.tickers)
+    db = duckdb.connect()
+    with tempfile.TemporaryDirectory() as root:
+        print(f"{'dataset':<11} {'format':<8} {'rows':>9} {'bytes':>12} {'serialize':>10} {'load':>9}  types")
+        for dataset, df in frames.items():
+            date_field = next(f.name for f in get_schema(dataset).schema if 'date' in str(f.type))
+            for fmt in ("csv", "csv.gz", "parquet"):
+                path = os.path.join(root, f"{dataset}.{fmt}")
+                serialize_seconds = write(df, dataset, fmt, path)
+                load_seconds, types = load(db, fmt, path)
+                print(f"{dataset:<11} {fmt:<8} {len(df):>9,} {os.path.getsize(path):>12,} "
+                      f"{serialize_seconds * 1000:8.1f}ms {load_seconds * 1000:7.1f}ms  "
+                      f"{date_field}={types[date_field]}")
+
+
+if __name__ == "__main__":
+    main()
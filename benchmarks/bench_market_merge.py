@@ -0,0 +1,103 @@
+# benchmarks/bench_market_merge.py
+#
+# Daily market-data load at 500 tickers: TRUNCATE + per-batch write_pandas
+# appends vs one staged MERGE on (TICKER, DATE), run against DuckDB with
+# simulated Snowflake latencies. Each mode loads the day, re-runs it, and
+# then runs again with a failure after the third batch to show what the
+# table is left holding.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_market_merge --tickers 500
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stand_ins import DuckDBSession
+from utils.snowflake_merge import AppendLoad, StagedMerge
+
+TABLE = "RAW_MARKETDATA"
+KEYS = ['TICKER', 'DATE']
+COLUMNS = ['TICKER', 'DATE', 'OPEN', 'HIGH', 'LOW', 'PRICE', 'VOLUME', 'SECTOR', 'INDUSTRY', 'LAST_UPDATED']
+
+CREATE = f"""
+CREATE TABLE {TABLE} (
+    TICKER VARCHAR, DATE DATE, OPEN DOUBLE, HIGH DOUBLE, LOW DOUBLE, PRICE DOUBLE,
+    VOLUME BIGINT, SECTOR VARCHAR, INDUSTRY VARCHAR, LAST_UPDATED TIMESTAMP,
+    INSERTED_DATE TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+class Failure(Exception):
+    pass
+
+
+def make_batches(tickers: int, batch_size: int, day: str = "2024-01-02") -> list:
+    rng = np.random.default_rng(0)
+    price = rng.uniform(10, 500, tickers).round(2)
+    df = pd.DataFrame({
+        'TICKER': [f"T{i:03d}" for i in range(tickers)],
+        'DATE': pd.Timestamp(day).date(),
+        'OPEN': price, 'HIGH': price * 1.01, 'LOW': price * 0.99, 'PRICE': price,
+        'VOLUME': rng.integers(1e5, 1e7, tickers),
+        'SECTOR': 'N/A', 'INDUSTRY': 'N/A',
+        'LAST_UPDATED': pd.Timestamp.now().floor('s'),
+    })
+    return [df.iloc[i:i + batch_size] for i in range(0, tickers, batch_size)]
+
+
+def load(session, mode: str, batches: list, fail_after: int = None) -> dict:
+    if mode == "append":
+        loader = AppendLoad(session, TABLE)
+    else:
+        loader = StagedMerge(session, TABLE, keys=KEYS, columns=COLUMNS,
+                             compare=COLUMNS[2:-1], order_by='LAST_UPDATED')
+    for i, batch in enumerate(batches, 1):
+        if fail_after is not None and i > fail_after:
+            raise Failure(f"failed at batch {i}")
+        loader.write(batch)
+    return loader.close()
+
+
+def run(mode: str, batches: list, statement_latency: float, write_latency: float):
+    session = DuckDBSession(statement_latency, write_latency)
+    session.db.execute(CREATE)
+    rows = lambda: session.db.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+    results = []
+    for label in ("first run", "re-run"):
+        trips = session.round_trips
+        start = time.perf_counter()
+        stats = load(session, mode, batches)
+        results.append((label, time.perf_counter() - start, session.round_trips - trips, stats, rows()))
+
+    try:
+        load(session, mode, batches, fail_after=3)
+    except Failure:
+        pass
+    after_failure = rows()
+
+    for label, elapsed, trips, stats, count in results:
+        print(f"{mode:<7} {label:<10} {elapsed:6.2f}s  round_trips={trips:>3}  "
+              f"rows_written={stats['merged']:>4}  table_rows={count}")
+    print(f"{mode:<7} failed run leaves table_rows={after_failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--statement-latency", type=float, default=0.15)
+    parser.add_argument("--write-latency", type=float, default=1.2,
+                        help="seconds per write_pandas (PUT + COPY)")
+    args = parser.parse_args()
+
+    batches = make_batches(args.tickers, args.batch_size)
+    for mode in ("append", "merge"):
+        run(mode, batches, args.statement_latency, args.write_latency)
+
+
+if __name__ == "__main__":
+    main()
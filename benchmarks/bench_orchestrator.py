@@ -0,0 +1,69 @@
+# benchmarks/bench_orchestrator.py
+#
+# The three daily loads run back to back (each stage one item at a time)
+# vs the same stages under utils.orchestrator with bounded queues and the
+# default per-stage concurrency. Stage work is simulated with sleeps sized
+# like the real calls (yfinance per ticker/batch, Alpha Vantage per request,
+# Snowflake writes).
+#
+#   PYTHONPATH=. python -m benchmarks.bench_orchestrator --tickers 100 --scale 0.01
+
+import argparse
+import time
+
+from utils.orchestrator import Pipeline, Stage, run_pipelines
+
+# Seconds per item for (fetch, transform, load) before scaling
+LATENCY = {
+    "dividend": (0.6, 0.01, 0.002),
+    "market": (8.0, 0.3, 1.5),
+    "sentiment": (1.0, 0.0, 0.05),
+}
+CONCURRENCY = {"dividend": 8, "market": 2, "sentiment": 4}
+
+
+def sleeper(seconds: float):
+    def fn(item):
+        time.sleep(seconds)
+        return item
+    return fn
+
+
+def build(tickers: list, scale: float, concurrent: bool) -> list:
+    sources = {
+        "dividend": tickers,
+        "market": [tickers[i:i + 100] for i in range(0, len(tickers), 100)],
+        "sentiment": tickers,
+    }
+    pipelines = []
+    for name, (fetch, transform, load) in LATENCY.items():
+        workers = CONCURRENCY[name] if concurrent else 1
+        pipelines.append(Pipeline(name, lambda items=sources[name]: items, [
+            Stage("fetch", sleeper(fetch * scale), workers),
+            Stage("transform", sleeper(transform * scale)),
+            Stage("load", sleeper(load * scale)),
+        ]))
+    return pipelines
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--scale", type=float, default=0.01)
+    args = parser.parse_args()
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+
+    # Back to back: each pipeline on its own, one item per stage at a time
+    start = time.perf_counter()
+    for pipeline in build(tickers, args.scale, concurrent=False):
+        run_pipelines([pipeline])
+    sequential = time.perf_counter() - start
+
+    stats = run_pipelines(build(tickers, args.scale, concurrent=True))
+    print(stats.summary())
+    print(f"\nsequential={sequential:.2f}s  orchestrated={stats.wall():.2f}s  "
+          f"speedup={sequential / stats.wall():.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/bench_replay.py
+#
+# The three daily pipelines from daily_ingest.py run end to end offline:
+# upstream calls are replayed from a utils/data_sources.py archive,
+# Snowflake is DuckDB (market MERGE) plus a counting connection
+# (sentiment inserts), and S3 is moto. Each scenario reports wall time
+# and a digest of everything written, so repeated runs can be checked for
+# identical output and compared on timing alone.
+#
+# The archive is built first. Wikipedia and Alpha Vantage are recorded
+# over HTTP from local stand-in servers; yfinance responses are stored
+# directly, since there is no stand-in for it.
+#
+#   PYTHONPATH=.:dividend-data:market-data:sentiment-data python -m benchmarks.bench_replay
+
+import argparse
+import contextlib
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from moto import mock_aws
+
+import daily_ingest
+from benchmarks.bench_sp500_universe import PageServer, make_page
+from benchmarks.fake_alpha_vantage import FakeAlphaVantage
+from benchmarks.stand_ins import MARKET_TABLE_SQL, DuckDBSession, StandInPool, moto_s3_client
+from utils.data_sources import DataSource, set_data_source
+from utils.landing_format import LANDING_FORMAT, landing_extension
+from utils.sentiment_data import AlphaVantageClient
+from utils.sp500_universe import SP500Universe
+from utils.trading_calendar import get_calendar
+
+BUCKET = "bench-replay"
+
+
+# -------------------
+# Archive
+# -------------------
+def record_archive(archive: str, urls: dict, batch_size: int) -> list:
+    source = DataSource("record", archive)
+    set_data_source(source)
+
+    # Wikipedia and Alpha Vantage: recorded over HTTP
+    page = PageServer(make_page())
+    urls['wikipedia'] = page.url
+    with tempfile.TemporaryDirectory() as cache:
+        symbols = SP500Universe(cache, url=page.url).tickers()
+    page.close()
+
+    fake = FakeAlphaVantage().start()
+    urls['alphavantage'] = fake.url
+    client = AlphaVantageClient("demo", calls_per_minute=1e6, max_workers=8, base_url=fake.url)
+    for _ in client.fetch_all(symbols, batch_size=batch_size):
+        pass
+    client.close()
+    fake.stop()
+
+    # yfinance: stored as the shapes yfinance returns
+    rng = np.random.default_rng(0)
+    calendar = get_calendar()
+    today = datetime.now(timezone.utc)
+    previous = calendar.previous_session(today.date())
+    dividend_day = calendar.previous_session(datetime.today())
+    for i, ticker in enumerate(symbols):
+        days = pd.DatetimeIndex([dividend_day - pd.DateOffset(months=3 * k) for k in range(20)][::-1],
+                                name='Date').tz_localize("America/New_York")
+        paid = days if i % 4 == 0 else days[:-1]
+        source.store("yfinance.dividends", {'ticker': ticker},
+                     pd.Series(np.full(len(paid), round(0.2 + 0.01 * (i % 50), 2)), index=paid, name='Dividends'))
+        source.store("yfinance.info", {'ticker': ticker},
+                     {'sector': ["Information Technology", "Health Care", "Financials"][i % 3],
+                      'industry': f"Industry {i % 20}"})
+
+    window = {'start': previous.strftime('%Y-%m-%d'), 'end': today.strftime('%Y-%m-%d')}
+    size = daily_ingest.MARKET_BATCH_SIZE
+    for i in range(0, len(symbols), size):
+        batch = symbols[i:i + size]
+        price = rng.uniform(10, 500, len(batch)).round(2)
+        fields = {'Close': price, 'High': price * 1.01, 'Low': price * 0.99, 'Open': price,
+                  'Volume': rng.integers(100_000, 50_000_000, len(batch)).astype(float)}
+        wide = pd.DataFrame([np.concatenate(list(fields.values()))], index=pd.DatetimeIndex([previous], name='Date'),
+                            columns=pd.MultiIndex.from_product([list(fields), batch], names=['Price', 'Ticker']))
+        source.store("yfinance.download", {'tickers': batch}, (wide, {}), variant=window)
+
+    return symbols
+
+
+# -------------------
+# Replayed run
+# -------------------
+def frame_digest(df: pd.DataFrame) -> str:
+    df = df.sort_values(list(df.columns)).reset_index(drop=True)
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()[:10]
+
+
+def run_once(archive: str, urls: dict, workdir: str, latency, error_rate: float, seed: int) -> dict:
+    source = DataSource("replay", archive, latency=latency, error_rate=error_rate, seed=seed)
+    set_data_source(source)
+
+    dividend = daily_ingest.load_loader("bench_dividend", "dividend-data/daily-load/main_dividend.py")
+    market = daily_ingest.load_loader("bench_market", "market-data/daily-load/load_sp500_marketdata.py")
+    sentiment = daily_ingest.load_loader("bench_sentiment", "sentiment-data/main.py")
+
+    duck = DuckDBSession()
+    pool = StandInPool()
+    dividend.DIVIDEND_CACHE_DIR = os.path.join(workdir, "dividends")
+    dividend.S3_BUCKET = BUCKET
+    market.generate_rsa_keys = lambda: None
+    market.get_session = lambda: duck
+    market.create_table = lambda: duck.sql(MARKET_TABLE_SQL.format(table="RAW_MARKETDATA")).collect()
+    market.REFERENCE_CACHE_PATH = os.path.join(workdir, "sector_industry.parquet")
+    sentiment.S3_BUCKET = BUCKET
+    sentiment.S3_KEY = f"sentiment/sentiment_bench{landing_extension()}"
+    sentiment.get_snowflake_pool = lambda: pool
+    client = AlphaVantageClient("demo", calls_per_minute=1e6, max_workers=4, base_url=urls['alphavantage'])
+    sentiment.get_alpha_vantage_client = lambda: client
+
+    universe = daily_ingest.Universe(lambda: SP500Universe(os.path.join(workdir, "sp500"),
+                                                           url=urls['wikipedia']).tickers())
+    limits = daily_ingest.parse_concurrency("")
+    with mock_aws():
+        s3 = moto_s3_client(BUCKET)
+        started = time.perf_counter()
+        stats = daily_ingest.run_pipelines([
+            daily_ingest.dividend_pipeline(dividend, universe, s3, limits),
+            daily_ingest.market_pipeline(market, universe, limits),
+            daily_ingest.sentiment_pipeline(sentiment, universe, s3, limits),
+        ], prepare=universe)
+        wall = time.perf_counter() - started
+
+        landed = {}
+        for item in s3.list_objects_v2(Bucket=BUCKET).get('Contents', []):
+            if item['Key'].endswith(landing_extension()):
+                body = io.BytesIO(s3.get_object(Bucket=BUCKET, Key=item['Key'])['Body'].read())
+                landed[item['Key'].split("/")[0]] = (pd.read_parquet(body) if LANDING_FORMAT == "parquet"
+                                                     else pd.read_csv(body, compression='gzip'))
+
+    market_rows = duck.db.execute(
+        "SELECT TICKER, DATE, OPEN, HIGH, LOW, PRICE, VOLUME, SECTOR, INDUSTRY FROM RAW_MARKETDATA").df()
+    outputs = {'dividends': landed.get('dividends', pd.DataFrame()), 'market': market_rows,
+               'sentiment': landed.get('sentiment', pd.DataFrame())}
+    return {
+        'wall': wall,
+        'pipelines': {name: p['wall'] for name, p in stats.as_dict()['pipelines'].items()},
+        'rows': {name: len(df) for name, df in outputs.items()},
+        'digest': {name: frame_digest(df) if len(df) else '-' for name, df in outputs.items()},
+        'errors': sum(s['errors'] for p in stats.as_dict()['pipelines'].values() for s in p['stages'].values()),
+        'source': source,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added per replayed call")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    # The loaders' own progress output is dropped; the table is the result
+    logging.basicConfig(level=logging.ERROR)
+    with tempfile.TemporaryDirectory() as root:
+        archive = os.path.join(root, "archive")
+        urls = {}
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            symbols = record_archive(archive, urls, batch_size=1)
+        print(f"recorded {len(symbols)} tickers in {time.perf_counter() - started:.1f}s: "
+              f"{DataSource('replay', archive).archive.summary()}")
+
+        scenarios = [
+            ("replay", 0, 0.0, 0),
+            ("replay again", 0, 0.0, 0),
+            (f"+{args.latency * 1000:.0f}ms/call", args.latency, 0.0, 0),
+            (f"{args.error_rate:.0%} errors", 0, args.error_rate, 1),
+            (f"{args.error_rate:.0%} errors again", 0, args.error_rate, 1),
+        ]
+        print(f"\n{'scenario':<18} {'wall':>7} {'dividend':>9} {'market':>7} {'sentiment':>9} "
+              f"{'calls':>6} {'injected':>8} {'errors':>6}  rows / digest (dividends, market, sentiment)")
+        for name, latency, error_rate, seed in scenarios:
+            with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+                result = run_once(archive, urls, workdir, latency, error_rate, seed)
+            walls = result['pipelines']
+            source = result['source']
+            outputs = "  ".join(f"{result['rows'][k]}/{result['digest'][k]}" for k in ('dividends', 'market', 'sentiment'))
+            print(f"{name:<18} {result['wall']:6.2f}s {walls['dividend']:8.2f}s {walls['market']:6.2f}s "
+                  f"{walls['sentiment']:8.2f}s {source.calls:>6} {source.injected:>8} {result['errors']:>6}  {outputs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_screener.py
+#
+# Screener latency on a synthetic S&P 500 history. The curated tables live
+# in DuckDB standing in for Snowflake; the benchmark does a first full
+# snapshot refresh, builds the per-ticker metrics (vectorized vs a
+# per-ticker groupby.apply), runs each preset screen, then loads one more
+# day and times the incremental refresh.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_screener --tickers 500 --years 15
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import duckdb
+import pandas as pd
+
+from screener.screens import PRESETS, build_metrics
+from screener.snapshot import Snapshot, curated_tables
+
+
+def build(tickers: int, years: int):
+    days = years * 252
+    db = duckdb.connect()
+    db.execute(f"""
+        create table SP500_MarketData_Hist as
+        select 'T' || lpad(t::varchar, 3, '0') as TICKER,
+               current_date - {days} + d::integer as MARKET_DATE,
+               (10 + t % 60) * (1 + d / {days}) as CLOSE, 1000000 + t as VOLUME,
+               timestamp '2000-01-01' + to_days(d::integer) as Src_Inserted_Date
+        from range({days}) r1(d), range({tickers}) r2(t)
+    """)
+    # Quarterly dividends; a ticker's growth rate and cut years depend on t
+    db.execute(f"""
+        create table SP500_STOCKS_DIVIDENDData_Hist as
+        select 'T' || lpad(t::varchar, 3, '0') as TICKER,
+               current_date - {days} + q::integer * 91 as DIVIDEND_DATE,
+               case when t % 7 = 0 and q % 12 < 4 then 0.05
+                    else 0.1 + (t % 5) * 0.05 * (1 + (t % 4) * 0.03 * (q // 4)) end as DIVIDEND,
+               timestamp '2000-01-01' + to_days(q::integer * 91) as Src_Inserted_Date
+        from range({days // 91}) r1(q), range({tickers}) r2(t)
+        where t % 9 != 0
+    """)
+    db.execute(f"""
+        create table SP500_Sentiment_Ticker_Summary as
+        select 'T' || lpad(t::varchar, 3, '0') as TICKER, random() * 2 - 1 as ESTIMATED_SENTIMENT,
+               (random() * 200)::integer as SENTIMENT_COUNT,
+               timestamp '2000-01-01' + to_days({days - 1}) as LAST_INSERTED_DATE
+        from range({tickers}) r(t)
+    """)
+    return db, days
+
+
+def load_next_day(db, day: int):
+    loaded = f"timestamp '2000-01-01' + to_days({day})"
+    db.execute(f"""
+        insert into SP500_MarketData_Hist
+        select TICKER, MARKET_DATE + 1, CLOSE * 1.001, VOLUME, {loaded}
+        from SP500_MarketData_Hist where MARKET_DATE = (select max(MARKET_DATE) from SP500_MarketData_Hist)
+    """)
+    db.execute(f"""
+        update SP500_Sentiment_Ticker_Summary
+        set ESTIMATED_SENTIMENT = ESTIMATED_SENTIMENT * 0.9, LAST_INSERTED_DATE = {loaded}
+        where TICKER < 'T050'
+    """)
+
+
+def per_ticker_metrics(dividends: pd.DataFrame, market: pd.DataFrame, as_of) -> pd.DataFrame:
+    # Baseline: the same numbers computed one ticker at a time
+    def one(group):
+        dates = pd.to_datetime(group['dividend_date'])
+        annual = group.groupby(dates.dt.year)['dividend'].sum()
+        annual = annual[annual.index < as_of.year]
+        streak = 0
+        for previous, following in zip(annual.values[-2::-1], annual.values[:0:-1]):
+            if following > previous * 1.005:
+                streak += 1
+            else:
+                break
+        ttm = group.loc[dates > as_of - pd.Timedelta(days=365), 'dividend'].sum()
+        return pd.Series({'ttm_dividend': ttm, 'growth_streak': streak})
+
+    prices = market.groupby('ticker')['close'].last()
+    out = dividends.groupby('ticker').apply(one)
+    out['yield_ttm'] = out['ttm_dividend'] / prices.reindex(out.index)
+    return out
+
+
+def timed(fn, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db, days = build(args.tickers, args.years)
+    with tempfile.TemporaryDirectory() as root:
+        snapshot = Snapshot(root, curated_tables("main"))
+        start = time.perf_counter()
+        pulled = snapshot.refresh(db.cursor())
+        print(f"full refresh: {time.perf_counter() - start:.2f}s {pulled}")
+
+        dividends, market = snapshot.frame("dividends"), snapshot.frame("market")
+        sentiment = snapshot.frame("sentiment")
+        as_of = pd.to_datetime(market['market_date']).max()
+
+        seconds, metrics = timed(lambda: build_metrics(dividends, market, sentiment), args.repeat)
+        baseline, expected = timed(lambda: per_ticker_metrics(dividends, market, as_of), 1)
+        joined = metrics.join(expected, rsuffix='_baseline', how='inner')
+        assert (joined['growth_streak'] == joined['growth_streak_baseline']).all()
+        assert ((joined['yield_ttm'] - joined['yield_ttm_baseline']).abs() < 1e-9).all()
+        print(f"metrics: vectorized {seconds * 1000:.1f}ms, per-ticker apply {baseline * 1000:.1f}ms "
+              f"({len(metrics)} tickers)")
+
+        for name, screen in PRESETS.items():
+            seconds, picks = timed(lambda: screen.apply(metrics), args.repeat)
+            print(f"screen {name:<17} {seconds * 1000:6.2f}ms  {len(picks):>4} matches")
+
+        load_next_day(db, days)
+        start = time.perf_counter()
+        pulled = snapshot.refresh(db.cursor())
+        refresh = time.perf_counter() - start
+        assert len(snapshot.frame("market")) == (days + 1) * args.tickers
+        print(f"incremental refresh after one day: {refresh * 1000:.1f}ms {pulled}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_sentiment_fetch.py
+#
+# Serial requests.get per ticker vs AlphaVantageClient (one ticker per
+# request, then multi-ticker batches) against the fake Alpha Vantage server.
+#
+#   PYTHONPATH=.:sentiment-data python -m benchmarks.bench_sentiment_fetch --tickers 100 --latency 0.05
+
+import argparse
+import time
+
+import requests
+
+from benchmarks.fake_alpha_vantage import FakeAlphaVantage
+from utils.sentiment_data import AlphaVantageClient, parse_feed
+
+
+def serial(url, tickers):
+    records = []
+    for ticker in tickers:
+        response = requests.get(f"{url}?function=NEWS_SENTIMENT&tickers={ticker}&apikey=demo")
+        if response.status_code == 200:
+            records.extend(parse_feed(ticker, response.json()))
+    return records
+
+
+def pooled(url, tickers, workers, calls_per_minute, batch_size=1):
+    client = AlphaVantageClient("demo", calls_per_minute=calls_per_minute, max_workers=workers,
+                                base_url=url, backoff_seconds=0.05)
+    records = []
+    for _, sentiments in client.fetch_all(tickers, batch_size=batch_size):
+        records.extend(sentiments)
+    client.close()
+    return records
+
+
+def run(name, fn, args, tickers):
+    server = FakeAlphaVantage(latency=args.latency, throttle_every=args.throttle_every).start()
+    start = time.perf_counter()
+    records = fn(server.url, tickers)
+    elapsed = time.perf_counter() - start
+    server.stop()
+    print(f"{name:<8} records={len(records):>6} requests={server.requests:>5} "
+          f"throttled={server.throttled:>4} elapsed={elapsed:7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--throttle-every", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--calls-per-minute", type=float, default=6000)
+    parser.add_argument("--batch-size", type=int, default=5)
+    args = parser.parse_args()
+
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    run("serial", serial, args, tickers)
+    run("pooled", lambda url, t: pooled(url, t, args.workers, args.calls_per_minute), args, tickers)
+    run("batched", lambda url, t: pooled(url, t, args.workers, args.calls_per_minute, args.batch_size),
+        args, tickers)
+
+
+if __name__ == "__main__":
+    main()
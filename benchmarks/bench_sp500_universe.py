@@ -0,0 +1,159 @@
+# benchmarks/bench_sp500_universe.py
+#
+# Resolving the S&P 500 universe: the old per-loader pd.read_html over the
+# whole Wikipedia page vs utils/sp500_universe.py, which streams only the
+# first table and caches it. The page is a generated copy with the same
+# layout (a ~500-row constituents table followed by a long changes table);
+# pass --html to use a saved copy of the real page instead.
+#
+# A local HTTP server with ETag support then shows the request pattern
+# across runs: first fetch, TTL hit, 304 revalidation, and a membership
+# change written to changes.jsonl.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_sp500_universe
+#   PYTHONPATH=. python -m benchmarks.bench_sp500_universe --html sp500.html
+
+import argparse
+import hashlib
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+import pandas as pd
+
+from utils.sp500_universe import SP500Universe, parse_constituents
+
+SECTORS = ["Information Technology", "Health Care", "Financials", "Industrials", "Energy"]
+
+
+def make_page(members: int = 503, changes: int = 3000, removed: int = 0, added: int = 0) -> str:
+    symbols = [f"S{i:03d}" for i in range(removed, members)] + [f"N{i:03d}" for i in range(added)]
+    rows = "".join(
+        f'<tr>\n<td><a rel="nofollow" class="external text" href="https://www.nyse.com/quote/XNYS:{s}">{s}</a>\n</td>'
+        f'<td><a href="/wiki/{s}_Inc." title="{s} Inc.">{s} Inc.</a></td>\n<td>{SECTORS[i % 5]}</td>\n'
+        f'<td>Subindustry {i % 40}</td>\n<td><a href="/wiki/City">City, State</a></td>\n'
+        f'<td>2001-01-01</td>\n<td>{i:010d}</td>\n<td>1950</td>\n</tr>\n'
+        for i, s in enumerate(symbols))
+    history = "".join(
+        f'<tr>\n<td>{2000 + i % 25}-06-{1 + i % 28:02d}</td>\n<td>A{i}</td>\n<td>Added {i} Corp.</td>\n'
+        f'<td>R{i}</td>\n<td>Removed {i} Corp.</td>\n<td>Market capitalization change.<sup><a href="#cite">[{i}]</a></sup></td>\n</tr>\n'
+        for i in range(changes))
+    padding = "<p>" + "Lorem ipsum dolor sit amet. " * 40 + "</p>\n"
+    return (
+        "<!DOCTYPE html><html><head><title>List of S&amp;P 500 companies</title></head><body>\n"
+        + padding * 20
+        + '<table class="wikitable sortable" id="constituents">\n<tbody><tr>\n<th>Symbol</th>\n<th>Security</th>\n'
+          '<th>GICS Sector</th>\n<th>GICS Sub-Industry</th>\n<th>Headquarters Location</th>\n'
+          '<th>Date added</th>\n<th>CIK</th>\n<th>Founded</th>\n</tr>\n'
+        + rows + "</tbody></table>\n"
+        + padding * 5
+        + '<table class="wikitable sortable" id="changes">\n<tbody><tr><th rowspan="2">Effective Date</th>'
+          '<th colspan="2">Added</th><th colspan="2">Removed</th><th rowspan="2">Reason</th></tr>\n'
+          '<tr><th>Ticker</th><th>Security</th><th>Ticker</th><th>Security</th></tr>\n'
+        + history + "</tbody></table>\n"
+        + padding * 60 + "</body></html>\n")
+
+
+# -------------------
+# Local page server
+# -------------------
+class PageServer:
+    def __init__(self, html: str):
+        self.requests = []
+        self.set_page(html)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", server.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=UTF-8")
+                self.send_header("Content-Length", str(len(server.body)))
+                self.send_header("ETag", server.etag)
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/wiki/List_of_S%26P_500_companies"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def set_page(self, html: str):
+        self.body = html.encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def timed(fn, repeat: int = 5) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--html", help="saved copy of the Wikipedia page")
+    parser.add_argument("--loaders", type=int, default=5, help="loaders resolving the universe per day")
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, encoding="utf-8") as f:
+            html = f.read()
+    else:
+        html = make_page()
+    print(f"page: {len(html.encode('utf-8')):,} bytes")
+
+    read_html_seconds, tables = timed(lambda: pd.read_html(StringIO(html)))
+    old = tables[0]['Symbol'].tolist()
+    stream_seconds, members = timed(lambda: parse_constituents(
+        html[i:i + 64 * 1024] for i in range(0, len(html), 64 * 1024)))
+    new = [m['symbol'] for m in members]
+    print(f"pd.read_html  {read_html_seconds * 1000:8.1f}ms  {len(tables)} tables, {len(old)} symbols")
+    print(f"first table   {stream_seconds * 1000:8.1f}ms  {len(new)} symbols  same={old == new}")
+
+    server = PageServer(html)
+    try:
+        with tempfile.TemporaryDirectory() as cache:
+            def run(label, ttl_hours, force=False):
+                universe = SP500Universe(cache, url=server.url, ttl_hours=ttl_hours)
+                before = len(server.requests)
+                start = time.perf_counter()
+                diff = universe.refresh(force=force)
+                elapsed = time.perf_counter() - start
+                sent = server.requests[before:]
+                print(f"{label:<22} {elapsed * 1000:7.1f}ms  requests={len(sent)} "
+                      f"conditional={sum(1 for etag in sent if etag)} not_modified={universe.not_modified} "
+                      f"members={len(universe.state['members'])} "
+                      f"diff=+{len(diff.get('added', []))}/-{len(diff.get('removed', []))}")
+                return universe
+
+            print()
+            run("first run", ttl_hours=24)
+            for _ in range(args.loaders - 1):
+                run("same day, TTL hit", ttl_hours=24)
+            run("next day, unchanged", ttl_hours=0)
+            if not args.html:
+                server.set_page(make_page(removed=2, added=2))
+                universe = run("next day, changed", ttl_hours=0)
+                print(f"changes.jsonl: {[(c['at'][:19], len(c['added']), len(c['removed'])) for c in universe.changes()]}")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_trading_calendar.py
+#
+# Previous-trading-day lookup the old way (build the NYSE calendar and a
+# 10-day valid_days range per call) vs the cached session index, plus gap
+# detection over 500 tickers x 5 years of daily rows with a few sessions
+# dropped. Checks both lookups agree for every day of the last two years.
+#
+#   PYTHONPATH=. python -m benchmarks.bench_trading_calendar    # needs pandas_market_calendars
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.trading_calendar import TradingCalendar, get_calendar
+
+
+def old_previous_trading_day(now: date) -> str:
+    # The lookup load_sp500_marketdata.py used to run
+    import pandas_market_calendars as mcal
+
+    nyse = mcal.get_calendar('NYSE')
+    schedule = nyse.valid_days(start_date=(now - timedelta(days=10)).strftime('%Y-%m-%d'),
+                               end_date=now.strftime('%Y-%m-%d'))
+    previous_day = schedule[-2] if schedule[-1].date() == now else schedule[-1]
+    return previous_day.strftime('%Y-%m-%d')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--check-days", type=int, default=730)
+    args = parser.parse_args()
+
+    today = date.today()
+    start = time.perf_counter()
+    old_previous_trading_day(today)
+    old = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "sessions.npz")
+        start = time.perf_counter()
+        get_calendar(path)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        calendar = TradingCalendar.load(path)
+        calendar.previous_session(today)
+        cached = time.perf_counter() - start
+
+    days = [today - timedelta(days=i) for i in range(args.check_days)]
+    start = time.perf_counter()
+    for day in days:
+        calendar.previous_session(day)
+    per_lookup = (time.perf_counter() - start) / len(days)
+    for day in days[:60]:
+        assert calendar.previous_session(day).strftime('%Y-%m-%d') == old_previous_trading_day(day), day
+
+    print(f"old per-run lookup      {old * 1000:8.1f}ms")
+    print(f"one-off build + save    {build * 1000:8.1f}ms ({len(calendar.sessions):,} sessions)")
+    print(f"load cache + lookup     {cached * 1000:8.2f}ms")
+    print(f"previous_session        {per_lookup * 1e6:8.1f}us per call")
+
+    # Gap detection: every ticker has every session except ~1 in 400
+    sessions = calendar.sessions_between(calendar.previous_session(today) - pd.DateOffset(years=args.years),
+                                         calendar.previous_session(today))
+    rng = np.random.default_rng(0)
+    tickers = np.repeat([f"T{i:03d}" for i in range(args.tickers)], len(sessions))
+    dates = np.tile(sessions, args.tickers)
+    keep = rng.random(len(dates)) > 1 / 400
+    keep[::len(sessions)] = True
+    keep[len(sessions) - 1::len(sessions)] = True
+    frame = pd.DataFrame({'TICKER': tickers[keep], 'DATE': pd.to_datetime(dates[keep]).strftime('%Y-%m-%d')})
+
+    start = time.perf_counter()
+    gaps = calendar.missing_by_ticker(frame)
+    seconds = time.perf_counter() - start
+    assert len(gaps) == (~keep).sum(), (len(gaps), (~keep).sum())
+    print(f"missing_by_ticker       {seconds * 1000:8.1f}ms for {len(frame):,} rows, "
+          f"{len(gaps)} gaps in {gaps['TICKER'].nunique()} tickers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/dbt_duckdb.py
+#
+# Just enough of dbt to run the models in dbt/model on DuckDB: renders a
+# model with the project macros and stand-ins for config/ref/this/
+# is_incremental/run_query, and applies a merge the way dbt's incremental
+# merge strategy does.
+
+import glob
+import json
+import os
+import tempfile
+import time
+
+import jinja2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS = os.path.join(ROOT, "dbt", "model")
+
+
+class _Column:
+    def __init__(self, values):
+        self._values = values
+
+    def values(self):
+        return self._values
+
+
+class _Table:
+    # The slice of agate.Table that run_query() results are read through
+    def __init__(self, cursor):
+        rows = cursor.fetchall()
+        self.columns = [_Column([row[i] for row in rows]) for i in range(len(cursor.description))]
+
+
+def model_path(relative: str) -> str:
+    return os.path.join(MODELS, relative)
+
+
+def render(path: str, db, this: str, incremental: bool) -> str:
+    macros = "".join(open(p).read() for p in sorted(glob.glob(os.path.join(ROOT, "dbt", "macros", "*.sql"))))
+    template = jinja2.Environment().from_string(macros + open(path).read())
+    return template.render(
+        config=lambda **kwargs: "",
+        ref=lambda name: name,
+        this=this,
+        is_incremental=lambda: incremental,
+        execute=True,
+        run_query=lambda sql: _Table(db.execute(sql)),
+    )
+
+
+def build_model(db, relative: str, name: str, materialized: str = "table"):
+    sql = render(model_path(relative), db, name, incremental=False)
+    db.execute(f"create or replace {materialized} {name} as {sql}")
+
+
+def merge(db, this: str, select_sql: str, unique_key: list) -> int:
+    on = " and ".join(f"t.{k} = s.{k}" for k in unique_key)
+    return db.execute(
+        f"merge into {this} t using ({select_sql}) s on {on} "
+        f"when matched then update set * when not matched then insert *"
+    ).fetchone()[0]
+
+
+def run_incremental(db, relative: str, this: str, unique_key: list) -> int:
+    return merge(db, this, render(model_path(relative), db, this, incremental=True), unique_key)
+
+
+def profiled(db, sql: str):
+    # (seconds, rows scanned, rows returned)
+    path = os.path.join(tempfile.gettempdir(), "bench_dbt_profile.json")
+    db.execute("PRAGMA enable_profiling='json'")
+    db.execute(f"PRAGMA profiling_output='{path}'")
+    start = time.perf_counter()
+    rows = db.execute(sql).fetchall()
+    elapsed = time.perf_counter() - start
+    db.execute("PRAGMA disable_profiling")
+    with open(path) as f:
+        profile = json.load(f)
+    return elapsed, profile.get('cumulative_rows_scanned', 0), len(rows)
@@ -0,0 +1,96 @@
+# benchmarks/fake_alpha_vantage.py
+#
+# Local NEWS_SENTIMENT server with injected latency and throttling.
+#
+#   server = FakeAlphaVantage(latency=0.05, throttle_every=10).start()
+#   client = AlphaVantageClient("demo", base_url=server.url)
+#   ...
+#   server.stop()
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_feed(tickers: list, articles: int = 5) -> dict:
+    feed = []
+    for i in range(articles):
+        feed.append({
+            'title': f"Article {i} on {', '.join(tickers)}",
+            'source': "Fake Wire",
+            'time_published': f"202401{(i % 28) + 1:02d}T120000",
+            'overall_sentiment_score': round(0.1 * (i % 10) - 0.4, 3),
+            'overall_sentiment_label': "Neutral",
+            'ticker_sentiment': [
+                {'ticker': t, 'relevance_score': f"{0.9 - 0.1 * n:.3f}",
+                 'ticker_sentiment_score': "0.1", 'ticker_sentiment_label': "Neutral"}
+                for n, t in enumerate(tickers)
+            ],
+        })
+    return {'items': str(len(feed)), 'feed': feed}
+
+
+class FakeAlphaVantage:
+    # throttle_every=N: every Nth request is throttled, alternating between
+    # an HTTP 429 and a 200 carrying a "Note" payload.
+    def __init__(self, latency: float = 0.0, throttle_every: int = 0, articles: int = 5):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.articles = articles
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/query"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                with fake.lock:
+                    fake.requests += 1
+                    n = fake.requests
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.throttle_every and n % fake.throttle_every == 0:
+                    with fake.lock:
+                        fake.throttled += 1
+                    if (n // fake.throttle_every) % 2:
+                        self._send(429, {'Information': "rate limited"})
+                    else:
+                        self._send(200, {'Note': "Thank you for using Alpha Vantage! Please slow down."})
+                    return
+                tickers = params.get('tickers', [''])[0].split(',')
+                self._send(200, make_feed(tickers, fake.articles))
+
+        return Handler
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
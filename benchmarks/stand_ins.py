@@ -0,0 +1,160 @@
+# benchmarks/stand_ins.py
+#
+# Local stand-ins for the services the loaders talk to, so runs can be
+# timed without credentials.
+
+import time
+
+
+class CountingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._results = []
+
+    def execute(self, sql, params=None):
+        self.conn._round_trip(sql, 1)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        rows = list(seq_of_params)
+        self.conn._round_trip(sql, len(rows))
+        return self
+
+    def fetchall(self):
+        return self._results
+
+    def close(self):
+        pass
+
+
+class CountingConnection:
+    # Mimics snowflake.connector's connection: every execute/executemany is
+    # one network round-trip, optionally delayed by `latency` seconds.
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.round_trips = 0
+        self.rows_written = 0
+        self.statements = []
+
+    def _round_trip(self, sql, rows):
+        self.round_trips += 1
+        self.rows_written += rows
+        self.statements.append(sql)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def cursor(self):
+        return CountingCursor(self)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StandInPool:
+    # acquire/release from utils/snowflake_pool.py, always handing out the
+    # same connection
+    def __init__(self, conn=None):
+        self.conn = conn or CountingConnection()
+
+    def acquire(self, profile):
+        return self.conn
+
+    def release(self, profile, conn):
+        pass
+
+
+# -------------------
+# S3 (moto)
+# -------------------
+class S3CallCounter:
+    # Counts API operations issued by a boto3 client, e.g. {'HeadObject': 500}
+    def __init__(self, client):
+        self.calls = {}
+        client.meta.events.register('before-call.s3', self._count)
+
+    def _count(self, model, **kwargs):
+        self.calls[model.name] = self.calls.get(model.name, 0) + 1
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+
+def moto_s3_client(bucket: str, region: str = "us-east-1"):
+    # Call inside an active moto mock_aws() context
+    import boto3
+
+    s3 = boto3.client("s3", region_name=region, aws_access_key_id="testing",
+                      aws_secret_access_key="testing")
+    s3.create_bucket(Bucket=bucket)
+    return s3
+
+
+# -------------------
+# Snowpark (DuckDB)
+# -------------------
+class _Row(dict):
+    def as_dict(self):
+        return dict(self)
+
+
+class _Query:
+    def __init__(self, session, sql):
+        self.session = session
+        self.sql = sql
+
+    def collect(self):
+        self.session._round_trip(self.sql, self.session.statement_latency)
+        cursor = self.session.db.execute(self.sql)
+        if cursor.description is None:
+            return []
+        names = [d[0] for d in cursor.description]
+        return [_Row(zip(names, row)) for row in cursor.fetchall()]
+
+
+# The market-data tables in DuckDB types
+MARKET_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    TICKER VARCHAR, DATE DATE, OPEN DOUBLE, HIGH DOUBLE, LOW DOUBLE, PRICE DOUBLE,
+    VOLUME BIGINT, SECTOR VARCHAR, INDUSTRY VARCHAR, LAST_UPDATED TIMESTAMP,
+    INSERTED_DATE TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+class DuckDBSession:
+    # Enough of snowflake.snowpark.Session (sql().collect(), write_pandas)
+    # to run the loaders' SQL against an in-process DuckDB. Each statement
+    # costs `statement_latency` seconds and each write_pandas (PUT + COPY
+    # in Snowflake) costs `write_latency`.
+    def __init__(self, statement_latency: float = 0.0, write_latency: float = 0.0):
+        import duckdb
+
+        self.db = duckdb.connect()
+        self.statement_latency = statement_latency
+        self.write_latency = write_latency
+        self.round_trips = 0
+        self.writes = 0
+        self.statements = []
+
+    def _round_trip(self, sql, latency):
+        self.round_trips += 1
+        self.statements.append(sql)
+        if latency:
+            time.sleep(latency)
+
+    def sql(self, query):
+        return _Query(self, query)
+
+    def write_pandas(self, df, table_name, auto_create_table=False, overwrite=False,
+                     use_logical_type=True, **kwargs):
+        self.writes += 1
+        self._round_trip(f"COPY INTO {table_name}", self.write_latency)
+        self.db.register("_write_pandas", df)
+        if overwrite:
+            self.db.execute(f"DELETE FROM {table_name}")
+        self.db.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM _write_pandas")
+        self.db.unregister("_write_pandas")
@@ -0,0 +1,554 @@
+# benchmarks/suite.py
+#
+# End-to-end timings for every loader: dividend daily and full load,
+# market-data daily and full (backfill) load, and sentiment. Each case runs
+# the loader's own code in a fresh process against local stand-ins:
+# upstream calls are replayed from an archive (utils/data_sources.py),
+# Snowflake is DuckDB or a counting connection, and S3 is moto.
+#
+# Per case and per stage it reports wall and busy time, peak RSS, rows and
+# rows/sec, upstream calls, S3 calls and Snowflake statements. Results are
+# written as JSON to --results (one file per run, named by time and commit)
+# and compared with the previous file there, or with --baseline. Counts
+# are deterministic, so any increase is flagged; times and RSS are flagged
+# past --threshold.
+#
+#   PYTHONPATH=. python -m benchmarks.suite
+#   PYTHONPATH=. python -m benchmarks.suite --cases market_daily,sentiment --repeat 3
+#   PYTHONPATH=. python -m benchmarks.suite --baseline .cache/bench_results/20250101T000000_abc1234.json --fail-on-regression
+#
+# The archive is built first: Wikipedia and Alpha Vantage are recorded
+# through the real clients from local stand-in servers, and yfinance
+# responses are generated. Daily stages come from daily_ingest.py's
+# pipelines and full-load stages from their StageTimer. Work outside a
+# stage (universe resolution, reference lookups, table setup) counts under
+# "other", as do S3 transfers made on boto3's own threads.
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from utils.orchestrator import count_records
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUCKET = "bench-suite"
+
+# name -> (PYTHONPATH entries, stage whose rows are the case's rows)
+CASES = {
+    "dividend_daily": (["dividend-data"], "load"),
+    "dividend_full": (["dividend-data/full-load"], "upload"),
+    "market_daily": (["market-data"], "load"),
+    "market_full": (["market-data"], "write"),
+    "sentiment": (["sentiment-data"], "load"),
+}
+FIXTURE_PATH = ["dividend-data", "market-data", "sentiment-data"]
+
+COUNTERS = ("upstream_calls", "s3_calls", "snowflake_statements")
+
+
+# -------------------
+# Meter
+# -------------------
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+class Meter:
+    # Time, rows, counters and peak RSS per stage. The current stage is
+    # tracked per thread; counts on threads outside a stage go to "other".
+    # A sampler thread reads RSS every `interval` seconds and charges it to
+    # every stage running at the time.
+    def __init__(self, interval: float = 0.02):
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.active = {}
+        self.peak_rss = 0.0
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def _entry(self, name: str) -> dict:
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'busy': 0.0, 'first': None, 'last': None, 'rows': 0,
+                                 'peak_rss_mb': 0.0, **{c: 0 for c in COUNTERS}}
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0):
+        previous = getattr(self.local, 'stage', None)
+        self.local.stage = name
+        started = time.perf_counter()
+        with self.lock:
+            entry = self._entry(name)
+            entry['first'] = entry['first'] or started
+            self.active[name] = self.active.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self.local.stage = previous
+            with self.lock:
+                self.active[name] -= 1
+                entry['calls'] += 1
+                entry['busy'] += ended - started
+                entry['last'] = ended
+                entry['rows'] += rows
+
+    def wrap(self, name: str, fn, count_rows: bool = False):
+        def wrapped(*args):
+            with self.stage(name):
+                result = fn(*args)
+            if count_rows and result is not None:
+                with self.lock:
+                    self.stages[name]['rows'] += count_records(result)
+            return result
+        return wrapped
+
+    def count(self, counter: str, n: int = 1):
+        with self.lock:
+            self._entry(getattr(self.local, 'stage', None) or "other")[counter] += n
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            rss = rss_mb()
+            with self.lock:
+                self.peak_rss = max(self.peak_rss, rss)
+                for name, running in self.active.items():
+                    if running:
+                        self.stages[name]['peak_rss_mb'] = max(self.stages[name]['peak_rss_mb'], rss)
+
+    def start(self):
+        threading.Thread(target=self._sample, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def as_dict(self) -> dict:
+        stages = {}
+        for name, s in self.stages.items():
+            wall = s['last'] - s['first'] if s['first'] is not None and s['last'] is not None else 0.0
+            stages[name] = {'calls': s['calls'], 'busy': s['busy'], 'wall': wall, 'rows': s['rows'],
+                            'rows_per_sec': s['rows'] / wall if wall else 0.0,
+                            'peak_rss_mb': s['peak_rss_mb'], **{c: s[c] for c in COUNTERS}}
+        return stages
+
+
+def instrument_stage_timer(meter: Meter):
+    # StageTimer.stage() also opens a meter stage of the same name
+    from utils.stage_timer import StageTimer
+
+    timed = StageTimer.stage
+
+    @contextmanager
+    def stage(timer, name: str, items: int = 0):
+        with meter.stage(name, rows=items), timed(timer, name, items):
+            yield
+
+    StageTimer.stage = stage
+
+
+def instrument_pipeline(meter: Meter, pipeline):
+    for stage in pipeline.stages:
+        stage.fn = meter.wrap(stage.name, stage.fn, count_rows=True)
+        if stage.finish is not None:
+            stage.finish = meter.wrap(stage.name, stage.finish)
+    pipeline.source = meter.wrap("source", pipeline.source)
+    return pipeline
+
+
+def metered_stand_ins(meter: Meter):
+    # Stand-ins whose round trips and calls are charged to the meter
+    from benchmarks.stand_ins import CountingConnection, DuckDBSession
+    from utils.data_sources import DataSource
+
+    class MeteredDuckDBSession(DuckDBSession):
+        def _round_trip(self, sql, latency):
+            meter.count('snowflake_statements')
+            super()._round_trip(sql, latency)
+
+    class MeteredConnection(CountingConnection):
+        def _round_trip(self, sql, rows):
+            meter.count('snowflake_statements')
+            super()._round_trip(sql, rows)
+
+    class MeteredDataSource(DataSource):
+        # Every replayed call, function or HTTP, passes through _inject
+        def _inject(self, source, identity):
+            meter.count('upstream_calls')
+            return super()._inject(source, identity)
+
+    return MeteredDuckDBSession, MeteredConnection, MeteredDataSource
+
+
+# -------------------
+# Fixtures
+# -------------------
+def build_fixtures(root: str, years: int, articles: int):
+    import numpy as np
+    import pandas as pd
+    import requests
+
+    from benchmarks.bench_sp500_universe import PageServer, make_page
+    from benchmarks.fake_alpha_vantage import FakeAlphaVantage
+    from utils.backfill import plan_shards
+    from utils.data_sources import DataSource, set_data_source
+    from utils.dividend_data import INDEX_TZ, DividendCache
+    from utils.sentiment_data import ALPHA_VANTAGE_URL, AlphaVantageClient, is_throttled
+    from utils.sp500_universe import SP500_URL, SP500Universe
+    from utils.trading_calendar import get_calendar
+
+    archive = os.path.join(root, "archive")
+    source = DataSource("record", archive)
+    set_data_source(source)
+
+    # HTTP, recorded through the real clients. The production URLs are
+    # routed to the local servers, so the recordings carry the same keys a
+    # live run would.
+    page = PageServer(make_page())
+    fake = FakeAlphaVantage(articles=articles).start()
+    routes = {SP500_URL: page.url, ALPHA_VANTAGE_URL: fake.url}
+
+    class LocalRoutes(requests.Session):
+        def get(self, url, **kwargs):
+            return super().get(routes.get(url, url), **kwargs)
+
+    universe = SP500Universe(os.path.join(root, "sp500"), session=source.wrap_session(LocalRoutes(), "wikipedia"))
+    tickers = universe.tickers()
+    client = AlphaVantageClient("demo", calls_per_minute=1e6, max_workers=8)
+    client.session = source.wrap_session(LocalRoutes(), "alphavantage", transient=is_throttled)
+    for _ in client.fetch_all(tickers, batch_size=int(os.getenv("ALPHA_VANTAGE_BATCH_SIZE", "1"))):
+        pass
+    page.close()
+    fake.stop()
+
+    # yfinance, generated in the shapes it returns
+    rng = np.random.default_rng(0)
+    calendar = get_calendar()
+    now = datetime.now(timezone.utc)
+    previous = calendar.previous_session(now.date())
+    dividend_day = calendar.previous_session(datetime.today())
+    recent = pd.DatetimeIndex(calendar.sessions_between(dividend_day - pd.Timedelta(days=30), dividend_day),
+                              name='Date').tz_localize(INDEX_TZ)
+    for i, ticker in enumerate(tickers):
+        amount = round(0.2 + 0.01 * (i % 50), 2)
+        pays = i % 4 == 0
+        days = pd.DatetimeIndex([dividend_day - pd.DateOffset(months=3 * k) for k in range(1, 20)][::-1]
+                                + ([dividend_day] if pays else []), name='Date').tz_localize(INDEX_TZ)
+        source.store("yfinance.dividends", {'ticker': ticker},
+                     pd.Series(np.full(len(days), amount), index=days, name='Dividends'))
+        source.store("yfinance.history", {'ticker': ticker}, pd.DataFrame({
+            'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.0, 'Volume': 1_000_000,
+            'Dividends': np.where(recent == recent[-1], amount if pays else 0.0, 0.0), 'Stock Splits': 0.0,
+        }, index=recent))
+        source.store("yfinance.info", {'ticker': ticker},
+                     {'sector': ["Information Technology", "Health Care", "Financials"][i % 3],
+                      'industry': f"Industry {i % 20}"})
+
+    def wide_frame(batch: list, days) -> pd.DataFrame:
+        price = rng.uniform(10, 500, (len(days), len(batch))).round(2)
+        fields = {'Close': price, 'High': price * 1.01, 'Low': price * 0.99, 'Open': price,
+                  'Volume': rng.integers(100_000, 50_000_000, price.shape).astype(float)}
+        return pd.DataFrame(np.hstack(list(fields.values())), index=pd.DatetimeIndex(days, name='Date'),
+                            columns=pd.MultiIndex.from_product([list(fields), batch], names=['Price', 'Ticker']))
+
+    # Daily: 100-ticker batches over the last session (daily_ingest.MARKET_BATCH_SIZE)
+    window = {'start': previous.strftime('%Y-%m-%d'), 'end': now.strftime('%Y-%m-%d')}
+    for i in range(0, len(tickers), 100):
+        batch = tickers[i:i + 100]
+        source.store("yfinance.download", {'tickers': batch}, (wide_frame(batch, [previous]), {}), variant=window)
+
+    # Backfill: the shards plan_shards cuts for the window, every NYSE session in each
+    start = calendar.session_on_or_after((now - pd.DateOffset(years=years)).date()).strftime('%Y-%m-%d')
+    backfill = {'start': start, 'end': window['end']}
+    for shard in plan_shards(tickers, start, backfill['end']):
+        days = calendar.sessions_between(shard.start, shard.end - pd.Timedelta(days=1))
+        variant = {'start': shard.start.strftime('%Y-%m-%d'), 'end': shard.end.strftime('%Y-%m-%d')}
+        source.store("yfinance.download", {'tickers': shard.tickers},
+                     (wide_frame(shard.tickers, days), {}), variant=variant)
+
+    # A dividend cache one day old, for the daily case to refresh
+    set_data_source(DataSource("replay", archive))
+    cache = DividendCache(os.path.join(root, "dividend_cache"))
+    for ticker in tickers:
+        cache.refresh(ticker)
+    cache.save_manifest()
+    cache.manifest['fetched_through'] = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=1)
+    cache.save_manifest()
+
+    with open(os.path.join(root, "fixtures.json"), "w") as f:
+        json.dump({'tickers': len(tickers), 'backfill': backfill, 'archive': source.archive.summary()}, f)
+
+
+# -------------------
+# Cases
+# -------------------
+def run_case(case: str, root: str, workdir: str, statement_latency: float, write_latency: float) -> dict:
+    from moto import mock_aws
+
+    import daily_ingest
+    from benchmarks.bench_backfill import DuckDBCopyLoad
+    from benchmarks.stand_ins import MARKET_TABLE_SQL, StandInPool, moto_s3_client
+    from utils.data_sources import set_data_source
+    from utils.sp500_universe import resolve_tickers
+
+    with open(os.path.join(root, "fixtures.json")) as f:
+        fixtures = json.load(f)
+    meter = Meter()
+    MeteredDuckDBSession, MeteredConnection, MeteredDataSource = metered_stand_ins(meter)
+    set_data_source(MeteredDataSource("replay", os.path.join(root, "archive")))
+    instrument_stage_timer(meter)
+    limits = daily_ingest.parse_concurrency(daily_ingest.INGEST_STAGE_CONCURRENCY)
+
+    def duckdb_session(table: str):
+        session = MeteredDuckDBSession(statement_latency, write_latency)
+        session.db.execute(MARKET_TABLE_SQL.format(table=table))
+        return session
+
+    def pipeline(build):
+        # build(universe) -> one of daily_ingest's pipelines
+        universe = daily_ingest.Universe(resolve_tickers)
+        built = instrument_pipeline(meter, build(universe))
+        return lambda: daily_ingest.run_pipelines([built], prepare=meter.wrap("universe", universe))
+
+    with mock_aws():
+        s3 = moto_s3_client(BUCKET)
+        s3.meta.events.register('before-call.s3', lambda **kwargs: meter.count('s3_calls'))
+
+        if case == "dividend_daily":
+            loader = daily_ingest.load_loader("suite_dividend", "dividend-data/daily-load/main_dividend.py")
+            run = pipeline(lambda universe: daily_ingest.dividend_pipeline(loader, universe, s3, limits))
+        elif case == "dividend_full":
+            from utils.checkpoint import Checkpoint
+
+            loader = daily_ingest.load_loader("suite_dividend_full", "dividend-data/full-load/main_dividend.py")
+
+            def run():
+                tickers = meter.wrap("universe", resolve_tickers)()
+                return loader.run_full_load(tickers, s3, Checkpoint(loader.CHECKPOINT_PATH))
+        elif case == "market_daily":
+            loader = daily_ingest.load_loader("suite_market", "market-data/daily-load/load_sp500_marketdata.py")
+            session = duckdb_session(loader.MARKETDATA_TABLE)
+            loader.generate_rsa_keys = lambda: None
+            loader.create_table = lambda: None
+            loader.get_session = lambda: session
+            run = pipeline(lambda universe: daily_ingest.market_pipeline(loader, universe, limits))
+        elif case == "market_full":
+            loader = daily_ingest.load_loader("suite_market_full", "market-data/full-load/load_sp500_marketdata.py")
+            session = duckdb_session(loader.TARGET_TABLE)
+            loader.get_session = lambda: session
+            loader.StagedCopyLoad = DuckDBCopyLoad
+            window = fixtures['backfill']
+
+            def run():
+                tickers = meter.wrap("universe", loader.get_sp500_tickers)()
+                return loader.run_backfill(tickers, window['start'], window['end'])
+        elif case == "sentiment":
+            loader = daily_ingest.load_loader("suite_sentiment", "sentiment-data/main.py")
+            pool = StandInPool(MeteredConnection())
+            loader.get_snowflake_pool = lambda: pool
+            run = pipeline(lambda universe: daily_ingest.sentiment_pipeline(loader, universe, s3, limits))
+        else:
+            raise ValueError(f"Unknown case '{case}'; expected one of {', '.join(CASES)}")
+
+        baseline_rss = rss_mb()
+        meter.start()
+        started = time.perf_counter()
+        run()
+        wall = time.perf_counter() - started
+        meter.stop()
+
+    stages = meter.as_dict()
+    rows = stages.get(CASES[case][1], {}).get('rows', 0)
+    totals = {c: sum(s[c] for s in stages.values()) for c in COUNTERS}
+    return {
+        'case': case, 'wall': wall, 'rows': rows, 'rows_per_sec': rows / wall if wall else 0.0,
+        'baseline_rss_mb': baseline_rss,
+        'peak_rss_mb': max(meter.peak_rss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        **totals, 'network_calls': sum(totals.values()), 'stages': stages,
+    }
+
+
+# -------------------
+# Driver
+# -------------------
+def child(args: list, pythonpath: list, env: dict = None) -> subprocess.CompletedProcess:
+    env = {**os.environ, **(env or {}), 'PYTHONPATH': os.pathsep.join([ROOT] + [os.path.join(ROOT, p) for p in pythonpath])}
+    return subprocess.run([sys.executable, "-m", "benchmarks.suite", *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+
+
+def case_env(workdir: str, root: str) -> dict:
+    # Every cache and checkpoint in the case's own directory; the rate
+    # limit is lifted since requests are replayed
+    return {
+        'DATA_SOURCE_MODE': "replay", 'DATA_SOURCE_ARCHIVE': os.path.join(root, "archive"),
+        'UNIVERSE_SOURCE': "sp500", 'SP500_UNIVERSE_CACHE': os.path.join(workdir, "sp500"),
+        'DIVIDEND_CACHE_DIR': os.path.join(workdir, "dividend_cache"),
+        'FULL_LOAD_CHECKPOINT': os.path.join(workdir, "dividend_full_load.checkpoint"),
+        'MARKETDATA_REFERENCE_CACHE': os.path.join(workdir, "sector_industry.parquet"),
+        'MARKETDATA_BACKFILL_DIR': os.path.join(workdir, "marketdata_backfill"),
+        'S3_BUCKET': BUCKET, 'AWS_BUCKET_NAME': BUCKET, 'AWS_REGION': "us-east-1",
+        'AWS_ACCESS_KEY_ID': "testing", 'AWS_SECRET_ACCESS_KEY': "testing", 'AWS_DEFAULT_REGION': "us-east-1",
+        'ALPHA_VANTAGE_API_KEY': "demo", 'ALPHA_VANTAGE_CALLS_PER_MINUTE': "1000000",
+    }
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def latest_result(results_dir: str) -> str:
+    # File names start with the UTC time, so they sort by age
+    if not os.path.isdir(results_dir):
+        return None
+    files = sorted(f for f in os.listdir(results_dir) if f.endswith(".json"))
+    return os.path.join(results_dir, files[-1]) if files else None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    # Counts regress on any increase; time and memory past the threshold
+    regressions = []
+    for case, result in current['cases'].items():
+        before = baseline['cases'].get(case)
+        if not before:
+            continue
+        for metric in ('wall', 'peak_rss_mb'):
+            if before[metric] and result[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{case}: {metric} {before[metric]:.2f} -> {result[metric]:.2f} "
+                                   f"(+{result[metric] / before[metric] - 1:.0%})")
+        for stage, s in result['stages'].items():
+            old = before['stages'].get(stage, {})
+            for counter in COUNTERS:
+                if s[counter] > old.get(counter, 0):
+                    regressions.append(f"{case}/{stage}: {counter} {old.get(counter, 0)} -> {s[counter]}")
+    return regressions
+
+
+def summary(results: dict) -> str:
+    lines = [f"{'case / stage':<24} {'wall(s)':>8} {'busy(s)':>8} {'rows':>9} {'rows/s':>10} {'peak MB':>8} "
+             f"{'upstream':>8} {'s3':>5} {'sf stmts':>8}"]
+    for case, r in results['cases'].items():
+        lines.append(f"{case:<24} {r['wall']:>8.2f} {'':>8} {r['rows']:>9,} {r['rows_per_sec']:>10,.0f} "
+                     f"{r['peak_rss_mb']:>8.0f} {r['upstream_calls']:>8} {r['s3_calls']:>5} "
+                     f"{r['snowflake_statements']:>8}")
+        for stage, s in r['stages'].items():
+            lines.append(f"  {stage:<22} {s['wall']:>8.2f} {s['busy']:>8.2f} {s['rows']:>9,} "
+                         f"{s['rows_per_sec']:>10,.0f} {s['peak_rss_mb']:>8.0f} {s['upstream_calls']:>8} "
+                         f"{s['s3_calls']:>5} {s['snowflake_statements']:>8}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end loader benchmarks against local stand-ins.")
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the median run is kept")
+    parser.add_argument("--years", type=int, default=5, help="market backfill window")
+    parser.add_argument("--articles", type=int, default=5, help="articles per Alpha Vantage response")
+    parser.add_argument("--statement-latency", type=float, default=0.0, help="seconds per Snowflake statement")
+    parser.add_argument("--write-latency", type=float, default=0.0, help="seconds per Snowflake PUT/write_pandas")
+    parser.add_argument("--results", default=".cache/bench_results")
+    parser.add_argument("--baseline", help="result file to compare with (default: the latest in --results)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative increase in time/RSS")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    # Internal: one case (or the fixtures) in a child process
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--build-fixtures", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.build_fixtures:
+        build_fixtures(args.root, args.years, args.articles)
+        return
+    if args.run_case:
+        result = run_case(args.run_case, args.root, args.workdir, args.statement_latency, args.write_latency)
+        with open(args.out, "w") as f:
+            json.dump(result, f)
+        return
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = {
+        'commit': git_commit(), 'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0], 'platform': sys.platform,
+        'settings': {k: getattr(args, k) for k in ('repeat', 'years', 'articles', 'statement_latency',
+                                                   'write_latency')},
+        'cases': {},
+    }
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        built = child(["--build-fixtures", "--root", root, "--years", str(args.years),
+                       "--articles", str(args.articles)], FIXTURE_PATH, {'DATA_SOURCE_MODE': "record"})
+        if built.returncode:
+            sys.exit(f"Building fixtures failed:\n{built.stdout[-2000:]}{built.stderr[-4000:]}")
+        with open(os.path.join(root, "fixtures.json")) as f:
+            fixtures = json.load(f)
+        results['fixtures'] = fixtures
+        print(f"Fixtures for {fixtures['tickers']} tickers built in {time.perf_counter() - started:.1f}s")
+
+        for case in cases:
+            runs = []
+            for attempt in range(args.repeat):
+                workdir = os.path.join(root, f"{case}-{attempt}")
+                os.makedirs(workdir)
+                if case == "dividend_daily":
+                    shutil.copytree(os.path.join(root, "dividend_cache"), os.path.join(workdir, "dividend_cache"))
+                out = os.path.join(workdir, "result.json")
+                done = child(["--run-case", case, "--root", root, "--workdir", workdir, "--out", out,
+                              "--statement-latency", str(args.statement_latency),
+                              "--write-latency", str(args.write_latency)],
+                             CASES[case][0], case_env(workdir, root))
+                if done.returncode:
+                    sys.exit(f"{case} failed:\n{done.stdout[-2000:]}{done.stderr[-4000:]}")
+                with open(out) as f:
+                    runs.append(json.load(f))
+            median = statistics.median_low([r['wall'] for r in runs])
+            kept = next(r for r in runs if r['wall'] == median)
+            kept['walls'] = [r['wall'] for r in runs]
+            results['cases'][case] = kept
+            print(f"{case}: {', '.join(f'{w:.2f}s' for w in kept['walls'])}")
+
+    print()
+    print(summary(results))
+
+    os.makedirs(args.results, exist_ok=True)
+    path = os.path.join(args.results, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}_{results['commit']}.json")
+    baseline_path = args.baseline or latest_result(args.results)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {path}")
+
+    if not baseline_path:
+        return
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    print(f"Compared with {baseline_path} ({baseline['commit']}): "
+          f"{len(regressions)} regression{'s' if len(regressions) != 1 else ''}")
+    for line in regressions:
+        print(f"  {line}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# daily_ingest.py
+#
+# Runs the daily dividend, market-data and sentiment loads as one job: the
+# ticker universe is resolved once, the three pipelines run concurrently as
+# fetch -> transform -> load stages with bounded queues between them, and
+# they share the pooled Snowflake connections, one S3 client and one Alpha
+# Vantage session.
+#
+#   PYTHONPATH=.:dividend-data:market-data:sentiment-data python daily_ingest.py
+#   PYTHONPATH=.:dividend-data:market-data:sentiment-data python daily_ingest.py --pipelines market,sentiment
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils.data_sources import get_data_source
+from utils.landing_format import LandingSpool
+from utils.orchestrator import Pipeline, Stage, run_pipelines
+from utils.snowflake_pool import get_pool
+from utils.sp500_universe import UNIVERSE_SOURCE, resolve_tickers
+from utils.trading_calendar import get_calendar
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+PIPELINES = ("dividend", "market", "sentiment")
+
+# Where the single ticker universe comes from: the in-scope table in
+# Snowflake, or the cached S&P 500 list (utils/sp500_universe.py)
+INGEST_UNIVERSE = os.getenv("INGEST_UNIVERSE", UNIVERSE_SOURCE)
+
+# "pipeline.stage=n" pairs overriding DEFAULT_CONCURRENCY. Load stages
+# write through a single cursor/session and always run one at a time.
+INGEST_STAGE_CONCURRENCY = os.getenv("INGEST_STAGE_CONCURRENCY", "")
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+INGEST_STATS_PATH = os.getenv("INGEST_STATS_PATH")
+
+# yf.download calls are serialized (utils/market_data.py _DOWNLOAD_LOCK) and
+# each already fans out over its batch, so a second market fetch worker
+# would only wait on the first
+DEFAULT_CONCURRENCY = {
+    "dividend.fetch": 8,
+    "dividend.transform": 2,
+    "market.fetch": 1,
+}
+
+MARKET_BATCH_SIZE = 100
+
+
+def parse_concurrency(spec: str) -> dict:
+    limits = dict(DEFAULT_CONCURRENCY)
+    for pair in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = pair.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+# -------------------
+# Loader modules
+# -------------------
+# Each loader is a standalone script and several share a module name
+# (main_dividend, main), so they are loaded by path under unique names.
+def load_loader(name: str, relative_path: str):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_s3_client():
+    import boto3
+
+    return boto3.client(
+        's3',
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_KEY"),
+        region_name=os.getenv("AWS_REGION")
+    )
+
+
+class Universe:
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.tickers = []
+
+    def __call__(self):
+        self.tickers = self.resolve()
+        print(f"Resolved {len(self.tickers)} tickers.")
+
+
+# -------------------
+# Dividends
+# -------------------
+def dividend_pipeline(loader, universe: Universe, s3, limits: dict) -> Pipeline:
+    from utils.dividend_data import DividendCache
+
+    cache = DividendCache(loader.DIVIDEND_CACHE_DIR)
+    yesterday = get_calendar().previous_session(datetime.today())
+    paid, log_records = [], []
+
+    def fetch(ticker):
+        # A failed refresh is logged as an error rather than no_dividend,
+        # then re-raised so the stage counts it and drops the ticker
+        try:
+            cache.refresh(ticker)
+        except Exception as e:
+            log_records.append({'as_of': yesterday.date(), 'ticker': ticker, 'event': 'error', 'message': str(e)})
+            raise
+        return ticker
+
+    def transform(ticker):
+        return ticker, cache.dividends_on(yesterday, [ticker])
+
+    def load(item):
+        ticker, rows = item
+        if rows.empty:
+            msg = f"{datetime.today().strftime('%Y-%m-%d')} - No dividend data for {ticker} on {yesterday.date()}"
+            log_records.append({'as_of': yesterday.date(), 'ticker': ticker, 'event': 'no_dividend', 'message': msg})
+        else:
+            paid.append(rows)
+        return rows
+
+    def finish():
+        cache.save_manifest()
+        print(cache.summary())
+        if paid:
+            loader.upload_to_s3(pd.concat(paid, ignore_index=True)[['date', 'dividend', 'ticker']], s3)
+        loader.append_log_to_s3(log_records, s3)
+
+    return Pipeline("dividend", lambda: universe.tickers, [
+        Stage("fetch", fetch, limits["dividend.fetch"]),
+        Stage("transform", transform, limits["dividend.transform"]),
+        Stage("load", load, 1, finish=finish),
+    ], queue_size=INGEST_QUEUE_SIZE)
+
+
+# -------------------
+# Market data
+# -------------------
+def market_pipeline(loader, universe: Universe, limits: dict) -> Pipeline:
+    from utils.market_data import AdaptiveThrottle, ReferenceCache, enrich_batch, fetch_history_batch
+
+    throttle = AdaptiveThrottle()
+    reference = ReferenceCache(loader.REFERENCE_CACHE_PATH, ttl_days=loader.REFERENCE_TTL_DAYS)
+    now = datetime.now(timezone.utc)
+    window = {}
+
+    def source():
+        loader.generate_rsa_keys()
+        loader.create_table()
+        window['start'] = loader.get_previous_trading_day()
+        window['end'] = now.strftime('%Y-%m-%d')
+        print(f"Fetching market data for: {window['start']}")
+        window['load'] = loader.open_market_load(loader.get_session())
+
+        tickers = universe.tickers
+        return [(i // MARKET_BATCH_SIZE + 1, tickers[i:i + MARKET_BATCH_SIZE])
+                for i in range(0, len(tickers), MARKET_BATCH_SIZE)]
+
+    def fetch(item):
+        batch_number, batch = item
+        df = fetch_history_batch(batch, batch_number, throttle, replay_latest=True,
+                                 start=window['start'], end=window['end'])
+        return (batch_number, batch, df) if not df.empty else None
+
+    def transform(item):
+        batch_number, batch, df = item
+        return batch_number, enrich_batch(df, reference.lookup(batch), now)
+
+    def load(item):
+        batch_number, df = item
+        window['load'].write(df)
+        print(f"Staged market batch {batch_number} for Snowflake")
+        return df
+
+    def finish():
+        reference.save()
+        print(reference.summary())
+        if 'load' in window:
+            stats = window['load'].close()
+            print(f"Loaded RAW_MARKETDATA: {stats['inserted']} inserted, {stats['updated']} updated")
+
+    return Pipeline("market", source, [
+        Stage("fetch", fetch, limits["market.fetch"]),
+        # ReferenceCache and the Snowpark session are not thread-safe
+        Stage("transform", transform, 1),
+        Stage("load", load, 1, finish=finish),
+    ], queue_size=INGEST_QUEUE_SIZE)
+
+
+# -------------------
+# Sentiment
+# -------------------
+def sentiment_pipeline(loader, universe: Universe, s3, limits: dict) -> Pipeline:
+    pool = loader.get_snowflake_pool()
+    client = loader.get_alpha_vantage_client()
+    state = {}
+
+    def source():
+        # The spool is opened only once the pipeline runs; finish() closes it
+        spool_file = tempfile.TemporaryFile(mode="w+b")
+        spool = LandingSpool(spool_file, "sentiment")
+        state.update(spool_file=spool_file, spool=spool)
+        # One pooled connection is held for the whole load and committed once
+        conn = pool.acquire(loader.SNOWFLAKE_PROFILE)
+        cursor = conn.cursor()
+        state.update(conn=conn, cursor=cursor,
+                     writer=loader.open_sentiment_writer(cursor, on_batch=spool.write))
+
+        tickers = universe.tickers
+        size = loader.ALPHA_VANTAGE_BATCH_SIZE
+        return [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+    def fetch(group):
+        return client.get_sentiment_for_tickers(group) or None
+
+    def load(records):
+        state['writer'].write(records)
+        return records
+
+    def finish():
+        if not state:
+            return
+        # A failed load never uploads its partial spool, and the file is
+        # closed either way
+        try:
+            if 'writer' not in state:
+                return
+            try:
+                stats = state['writer'].close()
+                state['conn'].commit()
+            finally:
+                state['cursor'].close()
+                pool.release(loader.SNOWFLAKE_PROFILE, state['conn'])
+            print(f"Inserted {stats['rows']} sentiment records into Snowflake in {stats['batches']} batches.")
+            state['spool'].close()
+            if stats['rows']:
+                loader.upload_to_s3(state['spool_file'], loader.S3_BUCKET, loader.S3_KEY, s3=s3)
+        finally:
+            state['spool_file'].close()
+
+    return Pipeline("sentiment", source, [
+        # Defaults to the client's worker count, which sizes its token bucket
+        Stage("fetch", fetch, limits.get("sentiment.fetch", client.max_workers)),
+        # One cursor, one writer
+        Stage("load", load, 1, finish=finish),
+    ], queue_size=INGEST_QUEUE_SIZE)
+
+
+# -------------------
+# Run
+# -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Run the daily loads concurrently.")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES),
+                        help="comma-separated subset of: " + ", ".join(PIPELINES))
+    args = parser.parse_args()
+    selected = [p.strip() for p in args.pipelines.split(",") if p.strip()]
+    unknown = set(selected) - set(PIPELINES)
+    if unknown:
+        parser.error(f"unknown pipelines: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO)
+    limits = parse_concurrency(INGEST_STAGE_CONCURRENCY)
+
+    dividend = load_loader("dividend_daily", "dividend-data/daily-load/main_dividend.py")
+    market = load_loader("market_daily", "market-data/daily-load/load_sp500_marketdata.py")
+    sentiment = load_loader("sentiment_main", "sentiment-data/main.py")
+    if "dividend" in selected:
+        dividend.validate_env_variables()
+
+    if INGEST_UNIVERSE == "inscope":
+        universe = Universe(sentiment.get_tickers_from_snowflake)
+    else:
+        universe = Universe(resolve_tickers)
+
+    s3 = get_s3_client()
+    pipelines = []
+    if "dividend" in selected:
+        pipelines.append(dividend_pipeline(dividend, universe, s3, limits))
+    if "market" in selected:
+        pipelines.append(market_pipeline(market, universe, limits))
+    if "sentiment" in selected:
+        pipelines.append(sentiment_pipeline(sentiment, universe, s3, limits))
+
+    stats = run_pipelines(pipelines, prepare=universe)
+    print(stats.summary())
+    print(get_pool().metrics.summary())
+    if get_data_source().mode != "live":
+        print(get_data_source().summary())
+    if INGEST_STATS_PATH:
+        with open(INGEST_STATS_PATH, "w") as f:
+            json.dump(stats.as_dict(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
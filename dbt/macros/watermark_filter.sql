@@ -0,0 +1,18 @@
+{% macro watermark_filter(column, target_column=none, inclusive=true) -%}
+    {#- Rows loaded at or after the newest one already in this model
+        (target_column names it there if it differs from column). The
+        watermark is looked up first and inlined as a literal so the source
+        scan can prune micro-partitions; max() on the target is answered
+        from metadata. Inclusive suits models that merge on unique_key,
+        where re-reading boundary rows is harmless. inclusive=false skips
+        the boundary value, so it is only safe on a load timestamp no
+        later load can repeat, never on a DATE. -#}
+    {%- if is_incremental() -%}
+        {%- set watermark = '1900-01-01 00:00:00' -%}
+        {%- if execute -%}
+            {%- set result = run_query("select coalesce(max(" ~ (target_column or column) ~ "), cast('1900-01-01' as timestamp)) from " ~ this) -%}
+            {%- set watermark = result.columns[0].values()[0] -%}
+        {%- endif %}
+  AND {{ column }} {{ '>=' if inclusive else '>' }} cast('{{ watermark }}' as timestamp)
+    {%- endif %}
+{%- endmacro %}
@@ -0,0 +1,82 @@
+{{
+  config(
+    materialized = 'incremental',
+    incremental_strategy = 'merge',
+    unique_key = ['TICKER', 'MARKET_DATE'],
+    cluster_by = ['TICKER', 'MARKET_DATE'],
+    on_schema_change='fail',
+    transient=false
+    )
+}}
+
+-- DiviSense summary, one row per (TICKER, MARKET_DATE). Incremental runs
+-- only rebuild tickers with new market, dividend or sentiment rows since
+-- the load timestamps recorded here, so the join chain runs over a day's
+-- worth of tickers instead of the whole history.
+
+with market_new as
+(
+    select TICKER, Src_Inserted_Date
+    from {{ ref("SP500_MarketData_Hist") }}
+    where Src_Inserted_Date is not null
+    {{ watermark_filter('Src_Inserted_Date', 'MARKET_LOADED_AT') }}
+),
+
+dividend_new as
+(
+    select TICKER, Src_Inserted_Date
+    from {{ ref("SP500_STOCKS_DIVIDENDData_Hist") }}
+    where Src_Inserted_Date is not null
+    {{ watermark_filter('Src_Inserted_Date', 'DIVIDEND_LOADED_AT') }}
+),
+
+sentiment_new as
+(
+    select TICKER, LAST_INSERTED_DATE
+    from {{ ref("SP500_Sentiment_Ticker_Summary") }}
+    where LAST_INSERTED_DATE is not null
+    {{ watermark_filter('LAST_INSERTED_DATE', 'SENTIMENT_LOADED_AT') }}
+),
+
+touched as
+(
+    select TICKER from market_new
+    union
+    select TICKER from dividend_new
+    union
+    select TICKER from sentiment_new
+),
+
+watermarks as
+(
+    select
+        (select max(Src_Inserted_Date) from market_new) as MARKET_LOADED_AT
+        , (select max(Src_Inserted_Date) from dividend_new) as DIVIDEND_LOADED_AT
+        , (select max(LAST_INSERTED_DATE) from sentiment_new) as SENTIMENT_LOADED_AT
+),
+
+src_DeviSense_SP500_SUMMARY as
+(
+    select 
+        MD_PD.TICKER, MD_PD.MARKET_DATE, MD_PD.OPEN, MD_PD.HIGH, MD_PD.LOW, MD_PD.CLOSE, MD_PD.VOLUME,
+        DA_PY.AVG_DIVIDEND_PERYEAR Dividend, DA_PY.DIVIDEND_YEAR,
+        TS_PM.COMMENTS
+    from 
+        {{ ref("v_SP500_MarketData_PrevDay")}}   MD_PD
+    inner join 
+        {{ ref("v_SP500_Dividend_Avg_PrevYear")}} DA_PY
+        on MD_PD.Ticker=DA_PY.TICKER
+    inner join
+        {{ ref("v_Ticker_Sentiment_Score_Comments")}} TS_PM
+        on md_pd.ticker=ts_pm.ticker 
+    where MD_PD.TICKER in (select TICKER from touched)
+)
+
+select
+    s.*
+    , w.MARKET_LOADED_AT
+    , w.DIVIDEND_LOADED_AT
+    , w.SENTIMENT_LOADED_AT
+    , current_timestamp as REFRESHED_AT
+from src_DeviSense_SP500_SUMMARY s
+cross join watermarks w
@@ -0,0 +1,23 @@
+{{
+  config(
+    materialized = 'view'
+            )
+}}
+
+-- Latest summary row per ticker, read from the materialized
+-- DiviSense_SP500_SUMMARY table instead of re-running the join chain
+
+with src_DeviSense_SP500_SUMMARY as
+(
+
+    select 
+    TICKER, MARKET_DATE, OPEN, HIGH, LOW, CLOSE, VOLUME,
+    Dividend, DIVIDEND_YEAR,
+    COMMENTS
+from 
+    {{ ref("DiviSense_SP500_SUMMARY")}}
+qualify row_number() over (partition by TICKER order by MARKET_DATE desc) = 1
+
+)
+
+Select * from src_DeviSense_SP500_SUMMARY
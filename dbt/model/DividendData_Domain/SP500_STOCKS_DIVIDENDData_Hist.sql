@@ -1,6 +1,9 @@
 {{
   config(
     materialized = 'incremental',
+    incremental_strategy = 'merge',
+    unique_key = ['TICKER', 'DIVIDEND_DATE'],
+    cluster_by = ['TICKER', 'DIVIDEND_DATE'],
     on_schema_change='fail',
     transient=false
     )
@@ -13,14 +16,13 @@ with src_dividenddata as
         , DIVIDEND
         , DIVIDEND_DATE
         , INSERTED_AT as Src_Inserted_Date
-        , to_date(getdate()) as INSERTED_DATE
+        , current_date as INSERTED_DATE
     from 
         {{ ref('staging_dividend_data') }}
      )
 
 SELECT * FROM src_dividenddata
 where Src_Inserted_Date is not null
-
-{% if is_incremental() %}
-  AND Src_Inserted_Date not in  (select INSERTED_DATE from {{ this }})
-{% endif %}
+{{ watermark_filter('Src_Inserted_Date') }}
+-- A (TICKER, DIVIDEND_DATE) restated within the window is merged once, latest load wins
+qualify row_number() over (partition by TICKER, DIVIDEND_DATE order by Src_Inserted_Date desc) = 1
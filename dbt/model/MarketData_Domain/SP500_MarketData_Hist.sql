@@ -1,6 +1,9 @@
 {{
   config(
     materialized = 'incremental',
+    incremental_strategy = 'merge',
+    unique_key = ['TICKER', 'MARKET_DATE'],
+    cluster_by = ['TICKER', 'MARKET_DATE'],
     on_schema_change='fail',
     transient=false
     )
@@ -17,14 +20,13 @@ with src_marketdata as
     , CLOSE
     , VOLUME
     , INSERTED_DATE as Src_Inserted_Date
-    , to_date(getdate()) as INSERTED_DATE
+    , current_date as INSERTED_DATE
     from 
      {{ ref('staging_market_data') }}
      )
 
 SELECT * FROM src_marketdata
 where Src_Inserted_Date is not null
-
-{% if is_incremental() %}
-  AND Src_Inserted_Date not in  (select INSERTED_DATE from {{ this }})
-{% endif %}
+{{ watermark_filter('Src_Inserted_Date') }}
+-- A (TICKER, MARKET_DATE) restated within the window is merged once, latest load wins
+qualify row_number() over (partition by TICKER, MARKET_DATE order by Src_Inserted_Date desc) = 1
@@ -0,0 +1,109 @@
+{{
+  config(
+    materialized = 'incremental',
+    incremental_strategy = 'merge',
+    unique_key = 'TICKER',
+    on_schema_change='fail',
+    transient=false
+    )
+}}
+
+-- Running per-ticker sentiment totals. Each run aggregates only the
+-- articles loaded since the last one (one pass, conditional counts) and
+-- adds them onto the stored totals, so the history is never rescanned.
+--
+-- INSERTED_DATE is a DATE, so the watermark is inclusive: a later load on
+-- the boundary day must still be counted. That day is re-read in full, so
+-- the totals it contributed last time (the LAST_DAY_ columns) are taken
+-- off before it is added back. Sums are coalesced to 0, since a day whose
+-- articles all lack a relevance score would otherwise turn the running
+-- totals NULL for good.
+
+{%- set total_columns = ['WEIGHTED_SCORE_SUM', 'RELEVANCE_SUM', 'SENTIMENT_COUNT', 'BULLISH_COUNT',
+                         'SOMEWHAT_BULLISH_COUNT', 'NEUTRAL_COUNT', 'SOMEWHAT_BEARISH_COUNT', 'BEARISH_COUNT'] %}
+
+with new_sentiment as
+(
+    select
+        TICKER
+        , RELEVANCE_SCORE
+        , OVERALL_SENTIMENT_SCORE
+        , OVERALL_SENTIMENT_LABEL
+        , INSERTED_DATE
+    from
+        {{ ref("SP500_SentimentData_Hist") }}
+    where INSERTED_DATE is not null
+    {{ watermark_filter('INSERTED_DATE', 'LAST_INSERTED_DATE') }}
+),
+
+by_day as
+(
+    select
+        TICKER
+        , INSERTED_DATE
+        , coalesce(sum(RELEVANCE_SCORE * OVERALL_SENTIMENT_SCORE), 0) as WEIGHTED_SCORE_SUM
+        , coalesce(sum(RELEVANCE_SCORE), 0) as RELEVANCE_SUM
+        , count(*) as SENTIMENT_COUNT
+        , count_if(OVERALL_SENTIMENT_LABEL = 'Bullish') as BULLISH_COUNT
+        , count_if(OVERALL_SENTIMENT_LABEL = 'Somewhat-Bullish') as SOMEWHAT_BULLISH_COUNT
+        , count_if(OVERALL_SENTIMENT_LABEL = 'Neutral') as NEUTRAL_COUNT
+        , count_if(OVERALL_SENTIMENT_LABEL = 'Somewhat-Bearish') as SOMEWHAT_BEARISH_COUNT
+        , count_if(OVERALL_SENTIMENT_LABEL = 'Bearish') as BEARISH_COUNT
+    from new_sentiment
+    group by TICKER, INSERTED_DATE
+),
+
+delta as
+(
+    select
+        TICKER
+    {%- for col in total_columns %}
+        , sum({{ col }}) as {{ col }}
+    {%- endfor %}
+        , min(INSERTED_DATE) as FIRST_INSERTED_DATE
+        , max(INSERTED_DATE) as LAST_INSERTED_DATE
+    from by_day
+    group by TICKER
+),
+
+totals as
+(
+    select
+        d.TICKER
+    {%- for col in total_columns %}
+        {%- if is_incremental() %}
+        , coalesce(t.{{ col }}, 0)
+          - case when t.LAST_INSERTED_DATE >= d.FIRST_INSERTED_DATE then coalesce(t.LAST_DAY_{{ col }}, 0) else 0 end
+          + coalesce(d.{{ col }}, 0) as {{ col }}
+        {%- else %}
+        , coalesce(d.{{ col }}, 0) as {{ col }}
+        {%- endif %}
+        , coalesce(l.{{ col }}, 0) as LAST_DAY_{{ col }}
+    {%- endfor %}
+        , d.LAST_INSERTED_DATE
+    from delta d
+    inner join by_day l
+        on d.TICKER = l.TICKER
+        and d.LAST_INSERTED_DATE = l.INSERTED_DATE
+    {%- if is_incremental() %}
+    left join {{ this }} t
+        on d.TICKER = t.TICKER
+    {%- endif %}
+)
+
+select
+    TICKER
+    , WEIGHTED_SCORE_SUM / nullif(RELEVANCE_SUM, 0) as ESTIMATED_SENTIMENT
+    , WEIGHTED_SCORE_SUM
+    , RELEVANCE_SUM
+    , SENTIMENT_COUNT
+    , BULLISH_COUNT
+    , SOMEWHAT_BULLISH_COUNT
+    , NEUTRAL_COUNT
+    , SOMEWHAT_BEARISH_COUNT
+    , BEARISH_COUNT
+    , LAST_INSERTED_DATE
+{%- for col in total_columns %}
+    , LAST_DAY_{{ col }}
+{%- endfor %}
+from totals
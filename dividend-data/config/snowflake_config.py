@@ -1,11 +1,10 @@
 import os
-import snowflake.connector
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_snowflake_connection():
-    return snowflake.connector.connect(
+def get_connection_parameters():
+    return dict(
         user=os.getenv("SF_USER"),
         password=os.getenv("SF_PASSWORD"),
         account=os.getenv("SF_ACCOUNT"),
@@ -13,3 +12,8 @@ def get_snowflake_connection():
         database="FINANCE_DB",
         schema="DIVIDENDS_SCHEMA"
     )
+
+def get_snowflake_connection():
+    import snowflake.connector
+
+    return snowflake.connector.connect(**get_connection_parameters())
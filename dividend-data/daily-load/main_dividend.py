@@ -1,13 +1,13 @@
 import pandas as pd
-import boto3
 import uuid
-from io import BytesIO
-from datetime import datetime, timedelta
-import snowflake.connector
-from utils.dividend_data import get_dividend_history
-from snowflake.snowpark import Session
-from cryptography.hazmat.primitives import serialization
+from datetime import datetime
+from utils.dividend_data import DividendCache
+from utils.s3_landing import write_partition
+from utils.trading_calendar import get_calendar
+from utils.sp500_universe import resolve_tickers
+from utils.run_log import write_run_log, NO_DIVIDEND_PREFIX
 from dotenv import load_dotenv
+from utils.snowflake_pool import get_pool, load_private_key
 import os
 import sys
 
@@ -37,14 +37,13 @@ def validate_env_variables():
         print(f"Missing environment variables: {', '.join(missing_vars)}")
         sys.exit(1)
 
-validate_env_variables()
 
 # -------------------
 # Environment Setup
 # -------------------
 S3_BUCKET = os.getenv("S3_BUCKET")
 S3_PREFIX = "dividends/"
-LOG_FILE_KEY = "logs/no_dividend_log.txt"
+DIVIDEND_CACHE_DIR = os.getenv("DIVIDEND_CACHE_DIR", ".cache/dividends")
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_KEY")
@@ -62,21 +61,26 @@ SNOWFLAKE_TICKER_TABLE = os.getenv("SNOWFLAKE_TICKER_TABLE")
 # -------------------
 # Snowflake Connection
 # -------------------
-with open(SNOWFLAKE_PRIVATE_KEY_PATH, "rb") as key_file:
-    private_key = serialization.load_pem_private_key(
-        key_file.read(),
-        password=None
-    )
-
-connection_parameters = {
-    "account": SNOWFLAKE_ACCOUNT,
-    "user": SNOWFLAKE_USER,
-    "private_key": private_key,
-    "role": SNOWFLAKE_ROLE,
-    "warehouse": SNOWFLAKE_WAREHOUSE,
-    "database": SNOWFLAKE_DATABASE,
-    "schema": SNOWFLAKE_SCHEMA
-}
+def get_private_key():
+    return load_private_key(SNOWFLAKE_PRIVATE_KEY_PATH)
+
+def get_connection_parameters():
+    return {
+        "account": SNOWFLAKE_ACCOUNT,
+        "user": SNOWFLAKE_USER,
+        "private_key": get_private_key(),
+        "role": SNOWFLAKE_ROLE,
+        "warehouse": SNOWFLAKE_WAREHOUSE,
+        "database": SNOWFLAKE_DATABASE,
+        "schema": SNOWFLAKE_SCHEMA
+    }
+
+SNOWFLAKE_PROFILE = "dividend_daily"
+
+def get_snowflake_pool():
+    pool = get_pool()
+    pool.register(SNOWFLAKE_PROFILE, get_connection_parameters)
+    return pool
 
 TICKER_QUERY = f"SELECT DISTINCT Ticker FROM {SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TICKER_TABLE}"
 
@@ -84,69 +88,26 @@ TICKER_QUERY = f"SELECT DISTINCT Ticker FROM {SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TICKE
 # Helper Functions
 # -------------------
 def get_tickers_from_snowflake():
-    ctx = snowflake.connector.connect(**connection_parameters)
-    cs = ctx.cursor()
-    try:
+    with get_snowflake_pool().cursor(SNOWFLAKE_PROFILE) as cs:
         cs.execute(TICKER_QUERY)
         tickers = [row[0] for row in cs.fetchall()]
         return tickers
-    finally:
-        cs.close()
-        ctx.close()
-
-def file_exists_in_s3(s3, bucket, key):
-    try:
-        s3.head_object(Bucket=bucket, Key=key)
-        return True
-    except s3.exceptions.ClientError as e:
-        if e.response['Error']['Code'] == '404':
-            return False
-        else:
-            raise
-
-def upload_to_s3(df: pd.DataFrame, ticker: str, s3):
-    date_str = datetime.today().strftime("%Y-%m-%d")
-    filename = f"{ticker}_dividends_{date_str}.csv"
-    key = S3_PREFIX + filename
-
-    if file_exists_in_s3(s3, S3_BUCKET, key):
-        print(f"{key} already exists in S3. Skipping upload.")
-        return
-
-    csv_buffer = BytesIO()
-    df.to_csv(csv_buffer, index=False)
-    csv_buffer.seek(0)
-
-    s3.upload_fileobj(csv_buffer, S3_BUCKET, key)
-    print(f"Uploaded {key} to S3.")
-
-def append_log_to_s3(log_messages, s3):
-    if not log_messages:
-        return
-
-    try:
-        existing_log = s3.get_object(Bucket=S3_BUCKET, Key=LOG_FILE_KEY)
-        log_data = existing_log['Body'].read().decode("utf-8")
-    except s3.exceptions.ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchKey':
-            log_data = ""
-        else:
-            raise
-
-    new_log_entries = "\n".join(log_messages)
-    combined_log = log_data.strip() + "\n" + new_log_entries
-
-    log_buffer = BytesIO()
-    log_buffer.write(combined_log.encode())
-    log_buffer.seek(0)
-
-    s3.upload_fileobj(log_buffer, S3_BUCKET, LOG_FILE_KEY)
-    print(f"Appended logs to S3: {LOG_FILE_KEY}")
+
+def upload_to_s3(df: pd.DataFrame, s3, run_date: str = None):
+    date_str = run_date or datetime.today().strftime("%Y-%m-%d")
+    return write_partition(s3, S3_BUCKET, S3_PREFIX, "dividends", df, date_str)
+
+def append_log_to_s3(log_records, s3):
+    write_run_log(s3, S3_BUCKET, NO_DIVIDEND_PREFIX, log_records)
 
 # -------------------
 # Main Function
 # -------------------
 def main():
+    validate_env_variables()
+
+    import boto3
+
     s3 = boto3.client(
         's3',
         aws_access_key_id=AWS_ACCESS_KEY_ID,
@@ -154,23 +115,41 @@ def main():
         region_name=AWS_REGION
     )
 
-    tickers = get_tickers_from_snowflake()
-    log_messages = []
-    yesterday = datetime.today() - timedelta(days=1)
+    tickers = resolve_tickers(inscope=get_tickers_from_snowflake)
+    log_records = []
+    # Last NYSE session before today, so Monday runs look at Friday and
+    # holidays are skipped
+    yesterday = get_calendar().previous_session(datetime.today())
 
+    # Bring each ticker's cached series up to date, then answer
+    # "who paid on the last session" from the local index in one lookup.
+    cache = DividendCache(DIVIDEND_CACHE_DIR)
+    failed = {}
     for ticker in tickers:
-        df = get_dividend_history(ticker, filter_date=yesterday)
+        try:
+            cache.refresh(ticker)
+        except Exception as e:
+            print(f"Error refreshing dividends for {ticker}: {e}")
+            failed[ticker] = str(e)
+    cache.save_manifest()
+    print(cache.summary())
 
-        if df.empty:
+    paid = cache.dividends_on(yesterday, tickers)
+    paid_tickers = set(paid['ticker'])
+
+    for ticker in tickers:
+        if ticker in failed:
+            log_records.append({'as_of': yesterday.date(), 'ticker': ticker, 'event': 'error', 'message': failed[ticker]})
+        elif ticker.upper() not in paid_tickers:
             msg = f"{datetime.today().strftime('%Y-%m-%d')} - No dividend data for {ticker} on {yesterday.date()}"
             print(msg)
-            log_messages.append(msg)
-            continue
+            log_records.append({'as_of': yesterday.date(), 'ticker': ticker, 'event': 'no_dividend', 'message': msg})
 
-        df['ticker'] = ticker
-        upload_to_s3(df, ticker, s3)
+    if not paid.empty:
+        upload_to_s3(paid[['date', 'dividend', 'ticker']], s3)
 
-    append_log_to_s3(log_messages, s3)
+    append_log_to_s3(log_records, s3)
+    print(get_snowflake_pool().metrics.summary())
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,18 @@
 import pandas as pd
-import boto3
 import uuid
-from io import BytesIO
 from datetime import datetime
-import snowflake.connector
 from utils.dividend_data import get_dividend_history
-from snowflake.snowpark import Session
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from dotenv import load_dotenv
+from utils.snowflake_pool import get_pool, load_private_key
 import os
 import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.checkpoint import Checkpoint
+from utils.stage_timer import StageTimer
+from utils.landing_format import landing_extension, serialize
+from utils.sp500_universe import resolve_tickers
 
 # -------------------
 # Load Environment Variables
@@ -42,15 +44,13 @@ def validate_env_variables():
         print(f"Missing environment variables: {', '.join(missing_vars)}")
         sys.exit(1)  # Exit the program with error code 1
 
-validate_env_variables()
-
-
 
 # -------------------
 # Fetch Environment Variables
 # -------------------
 S3_BUCKET = os.getenv("S3_BUCKET")
 S3_PREFIX = "dividends/"
+CHECKPOINT_PATH = os.getenv("FULL_LOAD_CHECKPOINT", ".cache/dividend_full_load.checkpoint")
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_KEY")
@@ -68,21 +68,26 @@ SNOWFLAKE_TICKER_TABLE = os.getenv("SNOWFLAKE_TICKER_TABLE")
 # ------------------------
 # 1. Load Private Key and Connect to Snowflake
 # ------------------------
-with open(SNOWFLAKE_PRIVATE_KEY_PATH, "rb") as key_file:
-    private_key = serialization.load_pem_private_key(
-        key_file.read(),
-        password=None  # If your key has a password, adjust this
-    )
-
-connection_parameters = {
-    "account": SNOWFLAKE_ACCOUNT,
-    "user": SNOWFLAKE_USER,
-    "private_key": private_key,
-    "role": SNOWFLAKE_ROLE,
-    "warehouse": SNOWFLAKE_WAREHOUSE,
-    "database": SNOWFLAKE_DATABASE,
-    "schema": SNOWFLAKE_SCHEMA
-}
+def get_private_key():
+    return load_private_key(SNOWFLAKE_PRIVATE_KEY_PATH)
+
+def get_connection_parameters():
+    return {
+        "account": SNOWFLAKE_ACCOUNT,
+        "user": SNOWFLAKE_USER,
+        "private_key": get_private_key(),
+        "role": SNOWFLAKE_ROLE,
+        "warehouse": SNOWFLAKE_WAREHOUSE,
+        "database": SNOWFLAKE_DATABASE,
+        "schema": SNOWFLAKE_SCHEMA
+    }
+
+SNOWFLAKE_PROFILE = "dividend_full"
+
+def get_snowflake_pool():
+    pool = get_pool()
+    pool.register(SNOWFLAKE_PROFILE, get_connection_parameters)
+    return pool
 
 #TICKER_QUERY = f"SELECT Distinct Ticker FROM {SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TICKER_TABLE}"
 
@@ -93,16 +98,11 @@ TICKER_QUERY = f"SELECT 'AAPL' FROM {SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TICKER_TABLE}"
 # 2. Helper Functions
 # ------------------------
 def get_tickers_from_snowflake():
-    ctx = snowflake.connector.connect(**connection_parameters)
-    cs = ctx.cursor()
-    cs.execute("SELECT CURRENT_VERSION()")
-    try:
+    with get_snowflake_pool().cursor(SNOWFLAKE_PROFILE) as cs:
+        cs.execute("SELECT CURRENT_VERSION()")
         cs.execute(TICKER_QUERY)
         tickers = [row[0] for row in cs.fetchall()]
         return tickers
-    finally:
-        cs.close()
-        ctx.close()
 
 def file_exists_in_s3(s3, bucket, key):
     try:
@@ -116,42 +116,111 @@ def file_exists_in_s3(s3, bucket, key):
 
 def upload_to_s3(df: pd.DataFrame, ticker: str, s3):
     date_str = datetime.today().strftime("%Y-%m-%d")
-    filename = f"{ticker}_dividends_{date_str}.csv"
+    filename = f"{ticker}_dividends_{date_str}{landing_extension()}"
     key = S3_PREFIX + filename
 
     if file_exists_in_s3(s3, S3_BUCKET, key):
         print(f"{key} already exists in S3. Skipping upload.")
         return
 
-    csv_buffer = BytesIO()
-    df.to_csv(csv_buffer, index=False)
-    csv_buffer.seek(0)
-
-    s3.upload_fileobj(csv_buffer, S3_BUCKET, key)
+    body, _ = serialize(df, "dividends")
+    s3.upload_fileobj(body, S3_BUCKET, key)
     print(f"Uploaded {key} to S3.")
 
 # ------------------------
-# 3. Main Function
+# 3. Parallel Load
+# ------------------------
+# Fetch (yfinance) and upload (S3) run in separate thread pools so the two
+# stages overlap and can be sized independently. A ticker is written to the
+# checkpoint only once its upload has finished (or it had no dividends), so
+# a re-run after a crash resumes with the remaining tickers. The checkpoint
+# is cleared once a run finishes with no failures.
+def fetch_ticker(ticker, timer):
+    with timer.stage("fetch"):
+        df = get_dividend_history(ticker)
+    if not df.empty:
+        df['ticker'] = ticker
+    return df
+
+def upload_ticker(df, ticker, s3, timer, checkpoint):
+    with timer.stage("upload", items=len(df)):
+        upload_to_s3(df, ticker, s3)
+    checkpoint.mark(ticker)
+
+def run_full_load(tickers, s3, checkpoint, fetch_workers=8, upload_workers=4):
+    timer = StageTimer()
+    pending = checkpoint.pending(tickers)
+    print(f"{len(tickers) - len(pending)} tickers already loaded, {len(pending)} to go.")
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ThreadPoolExecutor(max_workers=upload_workers) as upload_pool:
+        fetches = {fetch_pool.submit(fetch_ticker, t, timer): t for t in pending}
+        uploads = {}
+
+        for future in as_completed(fetches):
+            ticker = fetches[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"Error fetching {ticker}: {e}")
+                failed.append(ticker)
+                continue
+            if df.empty:
+                print(f"No dividend data for {ticker}, skipping.")
+                checkpoint.mark(ticker)
+                continue
+            uploads[upload_pool.submit(upload_ticker, df, ticker, s3, timer, checkpoint)] = ticker
+
+        for future in as_completed(uploads):
+            ticker = uploads[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error uploading {ticker}: {e}")
+                failed.append(ticker)
+
+    print(timer.summary())
+    if failed:
+        print(f"{len(failed)} tickers failed and will be retried on the next run: {', '.join(sorted(failed))}")
+    return failed
+
+# ------------------------
+# 4. Main Function
 # ------------------------
 def main():
+    parser = argparse.ArgumentParser(description="Full dividend history load to S3.")
+    parser.add_argument("--fetch-workers", type=int, default=int(os.getenv("FULL_LOAD_FETCH_WORKERS", "8")))
+    parser.add_argument("--upload-workers", type=int, default=int(os.getenv("FULL_LOAD_UPLOAD_WORKERS", "4")))
+    parser.add_argument("--fresh", action="store_true", help="ignore the checkpoint and reload every ticker")
+    args = parser.parse_args()
+
+    validate_env_variables()
+
+    import boto3
+
     s3 = boto3.client(
         's3',
         aws_access_key_id=AWS_ACCESS_KEY_ID,
         aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
         region_name=AWS_REGION
     )
-    
+
     print(f"{TICKER_QUERY}")
 
-    tickers = get_tickers_from_snowflake()
+    tickers = resolve_tickers(inscope=get_tickers_from_snowflake)
 
-    for ticker in tickers:
-        df = get_dividend_history(ticker)
-        if df.empty:
-            print(f"No dividend data for {ticker}, skipping.")
-            continue
-        df['ticker'] = ticker
-        upload_to_s3(df, ticker, s3)
+    checkpoint = Checkpoint(CHECKPOINT_PATH)
+    if args.fresh:
+        checkpoint.reset()
+
+    failed = run_full_load(tickers, s3, checkpoint, args.fetch_workers, args.upload_workers)
+    print(get_snowflake_pool().metrics.summary())
+    if failed:
+        sys.exit(1)
+    # Every ticker made it into today's dated files, so the next run starts
+    # over instead of skipping the whole universe.
+    checkpoint.reset()
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,15 @@
-import yfinance as yf
 import pandas as pd
 
+from utils.data_sources import get_data_source
+
 def get_dividend_history(ticker: str, years: int = 5) -> pd.DataFrame:
-    stock = yf.Ticker(ticker)
-    dividends = stock.dividends
+    def live():
+        import yfinance as yf
+
+        return yf.Ticker(ticker).dividends
+
+    # Same recording key as the daily loader's fetch_dividends
+    dividends = get_data_source().call("yfinance.dividends", {'ticker': ticker}, live)
 
     if dividends.empty:
         return pd.DataFrame()
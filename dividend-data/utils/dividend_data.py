@@ -1,12 +1,46 @@
 # utils/dividend_data.py
 
-import yfinance as yf
+import os
+import threading
+
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
-def get_dividend_history(ticker: str, years: int = 5, filter_date: datetime = None) -> pd.DataFrame:
-    stock = yf.Ticker(ticker)
-    dividends = stock.dividends
+from utils.data_sources import get_data_source
+
+
+# -------------------
+# yfinance calls
+# -------------------
+# Routed through utils/data_sources.py so runs can be recorded and replayed
+def fetch_dividends(ticker: str) -> pd.Series:
+    def live():
+        import yfinance as yf
+
+        return yf.Ticker(ticker).dividends
+
+    return get_data_source().call("yfinance.dividends", {'ticker': ticker}, live)
+
+
+def fetch_actions(ticker: str, start: str) -> pd.DataFrame:
+    def live():
+        import yfinance as yf
+
+        return yf.Ticker(ticker).history(start=start, actions=True)
+
+    # The delta window runs from the watermark to now, so any recording of
+    # it stands in for today's on replay
+    return get_data_source().call("yfinance.history", {'ticker': ticker}, live, variant={'start': start},
+                                  replay_latest=True)
+
+
+def get_dividend_history(ticker: str, years: int = 5, filter_date: datetime = None,
+                         cache=None) -> pd.DataFrame:
+    if cache is not None:
+        dividends = cache.refresh(ticker)
+    else:
+        dividends = fetch_dividends(ticker)
 
     if dividends.empty:
         return pd.DataFrame()
@@ -22,3 +56,197 @@ def get_dividend_history(ticker: str, years: int = 5, filter_date: datetime = No
     df = dividends.reset_index()
     df.columns = ['date', 'dividend']
     return df
+
+
+# -------------------
+# Local dividend cache
+# -------------------
+# One Parquet file per ticker under `root`, plus a _manifest.parquet holding
+# each ticker's watermark (fetched_through) and when it was last pulled in
+# full, and an _index.parquet of every (date, ticker, dividend) sorted by
+# date for cross-ticker lookups. Daily refreshes only ask yfinance for
+# history since the watermark minus `overlap_days`.
+#
+# Refreshes only record each ticker's new rows and manifest entry; the index
+# and manifest are rebuilt once, in save_manifest(). dividends_on() reads
+# the date-sorted index with a binary search, plus any rows stored since.
+#
+# Yahoo restates every past dividend when a ticker splits, so a cached
+# series is thrown away and refetched in full when:
+#   - the delta window contains a stock split,
+#   - a dividend in the overlap window no longer matches the cached value,
+#   - the last full fetch is older than `full_refresh_days`.
+INDEX_TZ = "America/New_York"  # S&P 500 dividends are dated on NYSE time
+
+
+def _day_slice(rows: pd.DataFrame, lo, hi) -> pd.DataFrame:
+    # Rows dated in [lo, hi) of a frame sorted by date, by binary search on
+    # the underlying UTC values
+    start, end = rows['date'].values.searchsorted(np.array([lo.asm8, hi.asm8]))
+    return rows.iloc[start:end]
+
+
+class DividendCache:
+    MANIFEST = "_manifest.parquet"
+    INDEX = "_index.parquet"
+
+    def __init__(self, root: str, overlap_days: int = 14, full_refresh_days: int = 90):
+        self.root = root
+        self.overlap = pd.Timedelta(days=overlap_days)
+        self.full_refresh = pd.Timedelta(days=full_refresh_days)
+        self.full_fetches = 0
+        self.delta_fetches = 0
+        self.invalidations = 0
+        # Refreshes may run on several threads; the in-memory manifest and
+        # index, and the updates pending for them, change under this lock
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.manifest = self._load_manifest()
+        self.index = self._load_index()
+        self._rows = {}      # ticker -> index rows stored since the last rebuild
+        self._entries = {}   # ticker -> manifest entry stored since the last rebuild
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.upper()}.parquet")
+
+    def _load_manifest(self) -> pd.DataFrame:
+        path = os.path.join(self.root, self.MANIFEST)
+        if os.path.exists(path):
+            return pd.read_parquet(path).set_index('ticker')
+        return pd.DataFrame(
+            columns=['fetched_through', 'full_fetched_at', 'last_dividend_date', 'rows']
+        ).rename_axis('ticker')
+
+    def _load_index(self) -> pd.DataFrame:
+        path = os.path.join(self.root, self.INDEX)
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        # Typed, so the first refresh on a cold cache concatenates to datetimes
+        return pd.DataFrame({'date': pd.Series(dtype=f"datetime64[ns, {INDEX_TZ}]"),
+                             'dividend': pd.Series(dtype=float), 'ticker': pd.Series(dtype=str)})
+
+    def _rebuild(self):
+        # Folds the pending rows and entries in; call with the lock held
+        if self._rows:
+            keep = self.index[~self.index['ticker'].isin(self._rows.keys())]
+            self.index = pd.concat([keep, *self._rows.values()], ignore_index=True).sort_values(
+                'date', kind='stable').reset_index(drop=True)
+            self._rows = {}
+        if self._entries:
+            updates = pd.DataFrame.from_dict(self._entries, orient='index').rename_axis('ticker')
+            keep = self.manifest[~self.manifest.index.isin(updates.index)]
+            self.manifest = pd.concat([keep, updates]) if len(keep) else updates
+            self._entries = {}
+
+    def save_manifest(self):
+        with self.lock:
+            self._rebuild()
+            manifest, index = self.manifest.copy(), self.index
+        manifest.reset_index().to_parquet(os.path.join(self.root, self.MANIFEST), index=False)
+        index.to_parquet(os.path.join(self.root, self.INDEX), index=False)
+
+    def _entry(self, ticker: str):
+        # The ticker's manifest entry, pending or saved; call with the lock held
+        if ticker in self._entries:
+            return pd.Series(self._entries[ticker])
+        return self.manifest.loc[ticker].copy() if ticker in self.manifest.index else None
+
+    def load(self, ticker: str) -> pd.Series:
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return pd.Series(dtype=float, name='Dividends')
+        df = pd.read_parquet(path)
+        return df.set_index('date')['dividend'].rename('Dividends')
+
+    def _store(self, ticker: str, dividends: pd.Series, now, full: bool):
+        df = dividends.rename_axis('date').rename('dividend').reset_index()
+        df.to_parquet(self._path(ticker), index=False)
+
+        rows = df.assign(ticker=ticker, date=pd.to_datetime(df['date'], utc=True).dt.tz_convert(INDEX_TZ)
+                         ).sort_values('date', kind='stable')
+        with self.lock:
+            self._rows[ticker] = rows
+            entry = self._entry(ticker)
+            self._entries[ticker] = {
+                'fetched_through': now,
+                'full_fetched_at': now if full or entry is None else entry['full_fetched_at'],
+                'last_dividend_date': dividends.index.max() if not dividends.empty else pd.NaT,
+                'rows': len(dividends),
+            }
+
+    def _count(self, counter: str):
+        # refresh() runs on several threads at once
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _fetch_full(self, ticker: str, now) -> pd.Series:
+        self._count('full_fetches')
+        dividends = fetch_dividends(ticker)
+        self._store(ticker, dividends, now, full=True)
+        return dividends
+
+    def refresh(self, ticker: str) -> pd.Series:
+        ticker = ticker.upper()
+        now = pd.Timestamp.now(tz='UTC')
+
+        with self.lock:
+            entry = self._entry(ticker)
+        if entry is None:
+            return self._fetch_full(ticker, now)
+        if now - pd.Timestamp(entry['full_fetched_at']) > self.full_refresh:
+            return self._fetch_full(ticker, now)
+
+        cached = self.load(ticker)
+        start = pd.Timestamp(entry['fetched_through']) - self.overlap
+
+        self._count('delta_fetches')
+        history = fetch_actions(ticker, start.strftime('%Y-%m-%d'))
+        if history.empty:
+            self._store(ticker, cached, now, full=False)
+            return cached
+
+        if 'Stock Splits' in history and (history['Stock Splits'] > 0).any():
+            self._count('invalidations')
+            return self._fetch_full(ticker, now)
+
+        delta = history.loc[history['Dividends'] > 0, 'Dividends']
+        if not cached.empty:
+            delta.index = delta.index.tz_convert(cached.index.tz)
+            overlap = cached[cached.index >= delta.index.min()] if not delta.empty else cached.iloc[0:0]
+            common = overlap.index.intersection(delta.index)
+            if (overlap.reindex(common) - delta.reindex(common)).abs().gt(1e-9).any():
+                self._count('invalidations')
+                return self._fetch_full(ticker, now)
+
+        merged = pd.concat([cached[~cached.index.isin(delta.index)], delta]).sort_index()
+        self._store(ticker, merged, now, full=False)
+        return merged
+
+    def dividends_on(self, date, tickers: list = None) -> pd.DataFrame:
+        # Answered from the local index only, no network call: the day's
+        # slice of the sorted index, with rows stored since the last
+        # rebuild taking the place of their ticker's saved ones
+        day = pd.Timestamp(pd.Timestamp(date).date())
+        lo, hi = day.tz_localize(INDEX_TZ), (day + pd.Timedelta(days=1)).tz_localize(INDEX_TZ)
+        wanted = {t.upper() for t in tickers} if tickers else None
+        with self.lock:
+            index, pending = self.index, dict(self._rows)
+
+        # Both the index and each ticker's stored rows are date-sorted; the
+        # day's slice is a handful of rows, so it is filtered in Python
+        hits = _day_slice(index, lo, hi)
+        if len(hits):
+            hits = hits[[t not in pending and (wanted is None or t in wanted) for t in hits['ticker']]]
+        found = [hits] if len(hits) else []
+        for ticker in (pending if wanted is None else wanted):
+            if ticker in pending:
+                rows = _day_slice(pending[ticker], lo, hi)
+                if len(rows):
+                    found.append(rows)
+        if len(found) < 2:
+            return (found[0] if found else hits).reset_index(drop=True)
+        return pd.concat(found, ignore_index=True).sort_values('date', kind='stable').reset_index(drop=True)
+
+    def summary(self) -> str:
+        return (f"Dividend cache: {self.delta_fetches} delta fetches, {self.full_fetches} full fetches, "
+                f"{self.invalidations} invalidated")
@@ -1,29 +1,34 @@
-from config.snowflake_config import get_snowflake_connection
+from config.snowflake_config import get_connection_parameters
 from utils.dividend_data import get_dividend_history
+from utils.snowflake_bulk import bulk_insert
+from utils.snowflake_pool import get_pool
 import pandas as pd
 
 TICKERS = ["AAPL", "MSFT", "KO"]
+DIVIDENDS_TABLE = "FINANCE_DB.DIVIDENDS_SCHEMA.DIVIDENDS"
 
 def main():
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-
+    frames = []
     for ticker in TICKERS:
         print(f"Fetching {ticker}...")
         df = get_dividend_history(ticker)
         if df.empty:
             continue
         df['ticker'] = ticker
+        frames.append(df)
+
+    if not frames:
+        print("No dividend data to load.")
+        return
 
-        for _, row in df.iterrows():
-            cursor.execute(
-                "INSERT INTO FINANCE_DB.DIVIDENDS_SCHEMA.DIVIDENDS (date, dividend, ticker) VALUES (%s, %s, %s)",
-                (row['date'].date(), row['dividend'], row['ticker'])
-            )
+    df = pd.concat(frames, ignore_index=True)
+    df['date'] = df['date'].dt.date
 
-    print("Data loaded.")
-    cursor.close()
-    conn.close()
+    pool = get_pool()
+    pool.register("finance", get_connection_parameters)
+    with pool.cursor("finance") as cursor:
+        rows = bulk_insert(cursor, DIVIDENDS_TABLE, df, columns=['date', 'dividend', 'ticker'])
+        print(f"Data loaded: {rows} rows.")
 
 if __name__ == "__main__":
     main()
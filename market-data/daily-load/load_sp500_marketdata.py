@@ -1,14 +1,13 @@
-from snowflake.snowpark import Session
 import pandas as pd
-import requests
-import time
 from datetime import datetime, timezone
-import yfinance as yf
+from utils.snowflake_pool import get_pool, load_private_key
+from utils.snowflake_merge import AppendLoad, StagedMerge
+from utils.trading_calendar import get_calendar
+from utils.sp500_universe import resolve_tickers
+from utils.market_data import fetch_history_batches, enrich_batch, ReferenceCache
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 import os
-from io import StringIO
-import pandas_market_calendars as mcal  # NEW
 
 # ------------------------
 # 1. Generate RSA Key Pair (if not exists)
@@ -37,31 +36,31 @@ def generate_rsa_keys():
     else:
         print("RSA key already exists.")
 
-generate_rsa_keys()
-
 # ------------------------
 # 2. Load Private Key and Connect to Snowflake
 # ------------------------
 key_path = "rsa_key.pem"
 
-with open(key_path, "rb") as key_file:
-    private_key = serialization.load_pem_private_key(
-        key_file.read(),
-        password=None
-    )
-
-connection_parameters = {
-    "account": "FSXJMQY-GLB11603",
-    "user": "DATAENGINEER_USR_1",
-    "private_key": private_key,
-    "role": "DATAENGINEER",
-    "warehouse": "finance_marketdata_dw",
-    "database": "FINANCE_DB",
-    "schema": "RAW_SCHEMA"
-}
-
-session = Session.builder.configs(connection_parameters).create()
-print("Connected to Snowflake.")
+def get_private_key():
+    return load_private_key(key_path)
+
+def get_connection_parameters():
+    return {
+        "account": "FSXJMQY-GLB11603",
+        "user": "DATAENGINEER_USR_1",
+        "private_key": get_private_key(),
+        "role": "DATAENGINEER",
+        "warehouse": "finance_marketdata_dw",
+        "database": "FINANCE_DB",
+        "schema": "RAW_SCHEMA"
+    }
+
+SNOWFLAKE_PROFILE = "marketdata"
+
+def get_session():
+    pool = get_pool()
+    pool.register(SNOWFLAKE_PROFILE, get_connection_parameters)
+    return pool.session(SNOWFLAKE_PROFILE)
 
 # ------------------------
 # 3. Create Table if Not Exists
@@ -81,50 +80,54 @@ CREATE TABLE IF NOT EXISTS RAW_MARKETDATA (
     INSERTED_DATE TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP
 )
 """
-session.sql(create_table_sql).collect()
-print("Verified or created table: FINANCE_DB.RAW_SCHEMA.RAW_MARKETDATA")
+
+def create_table():
+    get_session().sql(create_table_sql).collect()
+    print("Verified or created table: FINANCE_DB.RAW_SCHEMA.RAW_MARKETDATA")
 
 # ------------------------
 # 4. Fetch S&P 500 Tickers from Wikipedia
 # ------------------------
 def get_sp500_tickers():
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-
-    html_content = response.text
-    tables = pd.read_html(StringIO(html_content))
-    df = tables[0]
-    symbols = df['Symbol'].tolist()
-    return symbols
-
-tickers = get_sp500_tickers()
-print(f"Found {len(tickers)} tickers from SP500.")
+    # Cached constituent list, revalidated against Wikipedia at most once per TTL
+    return resolve_tickers()
 
 # ------------------------
 # 5. Determine Previous Trading Day
 # ------------------------
 def get_previous_trading_day():
-    nyse = mcal.get_calendar('NYSE')
-    now = datetime.now(timezone.utc)
-
-    schedule = nyse.valid_days(
-        start_date=(now - pd.Timedelta(days=10)).strftime('%Y-%m-%d'),
-        end_date=now.strftime('%Y-%m-%d')
-    )
-
-    if not schedule.empty:
-        previous_day = schedule[-2] if schedule[-1].date() == now.date() else schedule[-1]
-        return previous_day.strftime('%Y-%m-%d')
-    else:
-        raise ValueError("No valid trading days found.")
+    # Last NYSE session before today (UTC), from the cached session index
+    today = datetime.now(timezone.utc).date()
+    return get_calendar().previous_session(today).strftime('%Y-%m-%d')
 
 # ------------------------
 # 6. Fetch Market Data
 # ------------------------
-def fetch_market_data_in_batches(tickers, batch_size=100, delay_between_batches=30):
+# Sector/industry rarely change, so they come from a local reference cache
+# and are only refetched via .info when missing or older than the TTL.
+REFERENCE_CACHE_PATH = os.getenv("MARKETDATA_REFERENCE_CACHE", ".cache/sector_industry.parquet")
+REFERENCE_TTL_DAYS = int(os.getenv("MARKETDATA_REFERENCE_TTL_DAYS", "30"))
+
+# "merge" stages the run and MERGEs on (TICKER, DATE) once at the end, so
+# a failed run leaves the table untouched and a re-run only rewrites rows
+# that changed. "replace" is the old TRUNCATE + per-batch append.
+MARKETDATA_TABLE = "RAW_MARKETDATA"
+MARKETDATA_KEYS = ['TICKER', 'DATE']
+MARKETDATA_LOAD_COLUMNS = ['TICKER', 'DATE', 'OPEN', 'HIGH', 'LOW', 'PRICE', 'VOLUME',
+                           'SECTOR', 'INDUSTRY', 'LAST_UPDATED']
+MARKETDATA_LOAD_MODE = os.getenv("MARKETDATA_LOAD_MODE", "merge")
+
+def open_market_load(session):
+    if MARKETDATA_LOAD_MODE == "replace":
+        return AppendLoad(session, MARKETDATA_TABLE)
+    # LAST_UPDATED moves every run, so it alone does not count as a change
+    return StagedMerge(session, MARKETDATA_TABLE, keys=MARKETDATA_KEYS, columns=MARKETDATA_LOAD_COLUMNS,
+                       compare=['OPEN', 'HIGH', 'LOW', 'PRICE', 'VOLUME', 'SECTOR', 'INDUSTRY'],
+                       order_by='LAST_UPDATED')
+
+def fetch_market_data_in_batches(tickers, batch_size=100, throttle=None):
     all_data = []
+    reference = ReferenceCache(REFERENCE_CACHE_PATH, ttl_days=REFERENCE_TTL_DAYS)
     now = datetime.now(timezone.utc)
 
     try:
@@ -135,59 +138,46 @@ def fetch_market_data_in_batches(tickers, batch_size=100, delay_between_batches=
         print(f"Error determining trading day: {ve}")
         return pd.DataFrame()
 
-    # ------------------------
-    # Truncate the target table
-    # ------------------------
-    print("Truncating existing data in RAW_MARKETDATA...")
-    session.sql("TRUNCATE TABLE RAW_MARKETDATA").collect()
-
-    for i in range(0, len(tickers), batch_size):
-        batch = tickers[i:i + batch_size]
-        print(f"Processing batch {i // batch_size + 1}: {len(batch)} tickers")
-
-        batch_data = []
-        for ticker in batch:
-            try:
-                stock = yf.Ticker(ticker)
-                historical_data = stock.history(start=previous_trading_day, end=today)
-                info = stock.info
-                sector = info.get('sector', 'N/A')
-                industry = info.get('industry', 'N/A')
-
-                if historical_data.empty:
-                    print(f"Skipping {ticker}: No data for {previous_trading_day}.")
-                    continue
-
-                for index, row in historical_data.iterrows():
-                    batch_data.append({
-                        'TICKER': ticker.upper(),
-                        'DATE': index.strftime('%Y-%m-%d'),
-                        'PRICE': row['Close'],
-                        'VOLUME': row['Volume'],
-                        'OPEN': row['Open'],
-                        'HIGH': row['High'],
-                        'LOW': row['Low'],
-                        'LAST_UPDATED': now,
-                        'SECTOR': sector,
-                        'INDUSTRY': industry
-                    })
-            except Exception as e:
-                print(f"Error with {ticker}: {e}")
-
-        if batch_data:
-            df_batch = pd.DataFrame(batch_data)
-            df_batch['LAST_UPDATED'] = pd.to_datetime(df_batch['LAST_UPDATED'])
-            session.write_pandas(df_batch, "RAW_MARKETDATA", overwrite=False, use_logical_type=True)
-            print(f"Uploaded batch {i // batch_size + 1} to Snowflake")
-
-        all_data.extend(batch_data)
-        time.sleep(delay_between_batches)
-
-    return pd.DataFrame(all_data)
+    load = open_market_load(get_session())
+
+    batches = fetch_history_batches(tickers, batch_size=batch_size, throttle=throttle, replay_latest=True,
+                                    start=previous_trading_day, end=today)
+    for batch_number, batch, df_batch in batches:
+        print(f"Processing batch {batch_number}: {len(batch)} tickers")
+
+        missing = set(t.upper() for t in batch) - set(df_batch['TICKER'])
+        for ticker in sorted(missing):
+            print(f"Skipping {ticker}: No data for {previous_trading_day}.")
+
+        if not df_batch.empty:
+            df_batch = enrich_batch(df_batch, reference.lookup(batch), now)
+            load.write(df_batch)
+            print(f"Staged batch {batch_number} for Snowflake")
+            all_data.append(df_batch)
+
+    reference.save()
+    print(reference.summary())
+
+    stats = load.close()
+    print(f"Loaded RAW_MARKETDATA ({MARKETDATA_LOAD_MODE}): {stats['inserted']} inserted, "
+          f"{stats['updated']} updated from {stats['rows']} rows in {stats['stage_writes']} writes")
+
+    return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
 
 
 # ------------------------
 # 7. Run
 # ------------------------
-df = fetch_market_data_in_batches(tickers, batch_size=50, delay_between_batches=30)
-print(f"Retrieved market data for {len(df)} records for previous trading day.")
+def main():
+    generate_rsa_keys()
+    create_table()
+
+    tickers = get_sp500_tickers()
+    print(f"Found {len(tickers)} tickers from SP500.")
+
+    df = fetch_market_data_in_batches(tickers, batch_size=100)
+    print(get_pool().metrics.summary())
+    print(f"Retrieved market data for {len(df)} records for previous trading day.")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
-from snowflake.snowpark import Session
 import pandas as pd
-import requests
-import time
 from datetime import datetime ,timezone
-import yfinance as yf
+from utils.snowflake_pool import get_pool, load_private_key
+from utils.trading_calendar import get_calendar
+from utils.sp500_universe import resolve_tickers
+from utils.market_data import AdaptiveThrottle, fetch_history_batch, enrich_batch, ReferenceCache
+from utils.backfill import Backfill, StagedCopyLoad, plan_shards
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 import os
-from io import StringIO
+import sys
+import argparse
 
 # ------------------------
 # 1. Generate RSA Key Pair (if not exists)
@@ -16,7 +18,7 @@ def generate_rsa_keys():
     if not os.path.exists("rsa_key.pem"):
         print("Generating RSA key pair...")
         private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
-        
+
         with open("rsa_key.pem", "wb") as f:
             f.write(
                 private_key.private_bytes(
@@ -36,33 +38,31 @@ def generate_rsa_keys():
     else:
         print("RSA key already exists.")
 
-generate_rsa_keys()
-
 # ------------------------
 # 2. Load Private Key and Connect to Snowflake
 # ------------------------
-# Path to your private key file
 key_path = "rsa_key.pem"
 
-# Load the private key
-with open(key_path, "rb") as key_file:
-    private_key = serialization.load_pem_private_key(
-        key_file.read(),
-        password=None  # Add password here if you encrypted the key
-    )
-    
-connection_parameters = {
-    "account": "FSXJMQY-GLB11603",
-    "user": "DATAENGINEER_USR_1",
-    "private_key": private_key,
-    "role": "DATAENGINEER",
-    "warehouse": "finance_marketdata_dw",
-    "database": "FINANCE_DB",
-    "schema": "RAW_SCHEMA"
-}
-
-session = Session.builder.configs(connection_parameters).create()
-print("Connected to Snowflake.")
+def get_private_key():
+    return load_private_key(key_path)
+
+def get_connection_parameters():
+    return {
+        "account": "FSXJMQY-GLB11603",
+        "user": "DATAENGINEER_USR_1",
+        "private_key": get_private_key(),
+        "role": "DATAENGINEER",
+        "warehouse": "finance_marketdata_dw",
+        "database": "FINANCE_DB",
+        "schema": "RAW_SCHEMA"
+    }
+
+SNOWFLAKE_PROFILE = "marketdata"
+
+def get_session():
+    pool = get_pool()
+    pool.register(SNOWFLAKE_PROFILE, get_connection_parameters)
+    return pool.session(SNOWFLAKE_PROFILE)
 
 # ------------------------
 # 3. Create Table if Not Exists
@@ -79,97 +79,110 @@ CREATE TABLE IF NOT EXISTS RAW_SP500_MARKET_DATA_HIST (
     SECTOR STRING,
     INDUSTRY STRING ,
     LAST_UPDATED TIMESTAMP_NTZ ,
-    INSERTED_DATE TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP 
+    INSERTED_DATE TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP
 
 )
 """
-session.sql(create_table_sql).collect()
-print("Verified or created table: FINANCE_DB.RAW_SCHEMA.RAW_SP500_MARKET_DATA_HIST")
+
+def create_table():
+    get_session().sql(create_table_sql).collect()
+    print("Verified or created table: FINANCE_DB.RAW_SCHEMA.RAW_SP500_MARKET_DATA_HIST")
 
 # ------------------------
 # 4. Fetch S&P 500 Tickers from Slickcharts
 # ------------------------
 def get_sp500_tickers():
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+    # Cached constituent list, revalidated against Wikipedia at most once per TTL
+    return resolve_tickers()
 
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
+# ------------------------
+# 5. Backfill Market Data via yfinance
+# ------------------------
+# Sector/industry rarely change, so they come from a local reference cache
+# and are only refetched via .info when missing or older than the TTL.
+REFERENCE_CACHE_PATH = os.getenv("MARKETDATA_REFERENCE_CACHE", ".cache/sector_industry.parquet")
+REFERENCE_TTL_DAYS = int(os.getenv("MARKETDATA_REFERENCE_TTL_DAYS", "30"))
 
+# Shard files and the checkpoint of fetched shards (see utils/backfill.py).
+# Downloads are serialized on yfinance's globals, so a second worker only
+# writes one shard's file while the next downloads; more add nothing.
+BACKFILL_DIR = os.getenv("MARKETDATA_BACKFILL_DIR", ".cache/marketdata_backfill")
+BACKFILL_WORKERS = int(os.getenv("MARKETDATA_BACKFILL_WORKERS", "2"))
 
-    html_content = response.text  # Assuming response.text contains the HTML
-    tables = pd.read_html(StringIO(html_content))
-    #tables = pd.read_html(response.text)
-    df = tables[0]  # First table has the S&P 500 list
+TARGET_TABLE = "RAW_SP500_MARKET_DATA_HIST"
 
-    symbols = df['Symbol'].tolist()
+def make_shard_fetcher(reference, now, calendar, throttle=None):
+    throttle = throttle or AdaptiveThrottle()
 
-    return symbols
+    def fetch_shard(shard):
+        # A failed download raises, so the shard is left out of the checkpoint
+        df = fetch_history_batch(shard.tickers, shard.key, throttle, raise_on_failure=True,
+                                 start=shard.start.strftime('%Y-%m-%d'), end=shard.end.strftime('%Y-%m-%d'))
+        if df.empty:
+            return df
 
-tickers = get_sp500_tickers()
-#tickers = tickers[:200]
-print(f"Found {len(tickers)} tickers from SP500.")
+        gaps = calendar.missing_by_ticker(df)
+        for ticker, count in gaps.groupby('TICKER').size().items():
+            print(f"{ticker}: {count} NYSE sessions missing in {shard.key}")
+        return enrich_batch(df, reference, now)
+
+    return fetch_shard
+
+def run_backfill(tickers, start, end, workers=BACKFILL_WORKERS, group_size=50, span_years=1, fresh=False):
+    now = datetime.now(timezone.utc)
+    calendar = get_calendar()
+
+    reference_cache = ReferenceCache(REFERENCE_CACHE_PATH, ttl_days=REFERENCE_TTL_DAYS)
+    reference = reference_cache.lookup(tickers)
+    reference_cache.save()
+    print(reference_cache.summary())
+
+    engine = Backfill(make_shard_fetcher(reference, now, calendar), BACKFILL_DIR, "marketdata", workers=workers)
+    if fresh:
+        engine.checkpoint.reset()
+
+    shards = plan_shards(tickers, start, end, group_size=group_size, span_years=span_years)
+    print(f"Backfilling {start} to {end} (end exclusive) as {len(shards)} shards.")
+    stats = engine.run(shards)
+    print(f"Fetched {stats['rows']:,} rows in {stats['elapsed']:.1f}s ({stats['rows_per_sec']:,.0f} rows/s), "
+          f"{stats['empty']} empty shards, {stats['failed']} failed")
+
+    loaded = engine.load(StagedCopyLoad(get_session(), TARGET_TABLE, keys=['TICKER', 'DATE'],
+                                        order_by='LAST_UPDATED'))
+    print(f"Loaded {loaded['files']} shard files into {TARGET_TABLE}: {loaded['rows']:,} rows copied, "
+          f"{loaded['inserted']:,} inserted, {loaded['updated']:,} updated")
+    print(engine.timer.summary())
+    return stats
 
 # ------------------------
-# 5. Fetch Market Data via yfinance
+# 6. Run
 # ------------------------
-
-def fetch_market_data_in_batches(tickers, batch_size=100, delay_between_batches=30):
-    all_data = []
+def main():
+    parser = argparse.ArgumentParser(description="Sharded market-data backfill into RAW_SP500_MARKET_DATA_HIST.")
+    parser.add_argument("--start", help="first date (default: five years back)")
+    parser.add_argument("--end", help="end date, exclusive (default: today)")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument("--group-size", type=int, default=50, help="tickers per shard")
+    parser.add_argument("--span-years", type=int, default=1, help="years per shard")
+    parser.add_argument("--fresh", action="store_true", help="ignore the checkpoint and refetch every shard")
+    args = parser.parse_args()
+
+    generate_rsa_keys()
+    create_table()
+
+    tickers = get_sp500_tickers()
+    print(f"Found {len(tickers)} tickers from SP500.")
+
+    # Five years back to the first session on or after that date; end is
+    # exclusive, so today's partial session is left to the daily load
     now = datetime.now(timezone.utc)
-    
-    
-    start_date = (now - pd.DateOffset(years=5)).strftime('%Y-%m-%d')  # Calculate start date
-    end_date = now.strftime('%Y-%m-%d')
-
-    for i in range(0, len(tickers), batch_size):
-        batch = tickers[i:i + batch_size]
-        print(f"Processing batch {i//batch_size + 1}: {len(batch)} tickers")
-
-        batch_data = []
-        for ticker in batch:
-            try:
-                stock = yf.Ticker(ticker)
-                historical_data = stock.history(period="5y")  # Get last 5 years of data
-                info = stock.info
-                sector = info.get('sector', 'N/A')
-                industry = info.get('industry', 'N/A')
-
-                if historical_data.empty:
-                    print(f"Skipping {ticker}: No valid historical data.")
-                    continue
-
-                for index, row in historical_data.iterrows():
-                    batch_data.append({
-                        'TICKER': ticker.upper(),
-                        'DATE': index.strftime('%Y-%m-%d'),
-                        'PRICE': row['Close'],
-                        'VOLUME': row['Volume'],
-                        'OPEN': row['Open'],
-                        'HIGH': row['High'],
-                        'LOW': row['Low'],
-                        'LAST_UPDATED': now,
-                        'SECTOR': sector,
-                        'INDUSTRY': industry
-                    })
-            except Exception as e:
-                print(f"Error with {ticker}: {e}")
-
-        # Convert to DataFrame and write to Snowflake
-        if batch_data:
-            df_batch = pd.DataFrame(batch_data)
-            df_batch['LAST_UPDATED'] = pd.to_datetime(df_batch['LAST_UPDATED'])
-
-            session.write_pandas(df_batch, "RAW_SP500_MARKET_DATA_HIST", overwrite=False, use_logical_type=True)
-            print(f"Uploaded batch {i//batch_size + 1} to Snowflake")
-
-        all_data.extend(batch_data)
-        time.sleep(delay_between_batches)  # Pause to respect rate limits
-
-    return pd.DataFrame(all_data)
-
-df = fetch_market_data_in_batches(tickers, batch_size=50, delay_between_batches=30)
-print(f"Retrieved market data for {len(df)} companies over the past 5 years.")
+    start = args.start or get_calendar().session_on_or_after((now - pd.DateOffset(years=5)).date()).strftime('%Y-%m-%d')
+    end = args.end or now.strftime('%Y-%m-%d')
+
+    stats = run_backfill(tickers, start, end, args.workers, args.group_size, args.span_years, args.fresh)
+    print(get_pool().metrics.summary())
+    if stats['failed']:
+        sys.exit(1)
 
+if __name__ == "__main__":
+    main()
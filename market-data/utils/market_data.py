@@ -0,0 +1,272 @@
+# utils/market_data.py
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+from utils.data_sources import get_data_source
+
+MARKETDATA_COLUMNS = ['TICKER', 'DATE', 'PRICE', 'VOLUME', 'OPEN', 'HIGH', 'LOW']
+
+# Substrings yfinance/Yahoo use when the upstream is pushing back
+RATE_LIMIT_MARKERS = ("rate limit", "too many requests", "429")
+
+# yf.download collects results and errors in module-level dicts, so calls
+# from concurrent threads would mix their output; each call already fans
+# out over its tickers with threads=True
+_DOWNLOAD_LOCK = threading.Lock()
+
+
+# -------------------
+# Adaptive throttling
+# -------------------
+class AdaptiveThrottle:
+    # No delay while Yahoo is happy; doubles the pause (from min_delay up to
+    # max_delay) each time a batch is rate limited and halves it again after
+    # every clean batch. One throttle is shared by every fetch worker, so
+    # the delay changes under a lock; the sleep itself is outside it.
+    def __init__(self, min_delay: float = 5, max_delay: float = 120):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self.backoffs = 0
+        self.lock = threading.Lock()
+
+    def success(self):
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > self.min_delay else 0.0
+
+    def pushback(self):
+        with self.lock:
+            self.backoffs += 1
+            self.delay = min(self.max_delay, max(self.min_delay, self.delay * 2))
+
+    def wait(self):
+        with self.lock:
+            delay = self.delay
+        if delay:
+            print(f"Upstream throttling, waiting {delay:.0f}s...")
+            time.sleep(delay)
+
+
+class BatchFetchError(RuntimeError):
+    pass
+
+
+def is_rate_limited(error) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+# -------------------
+# Batched download
+# -------------------
+def to_long_format(wide: pd.DataFrame, tickers: list) -> pd.DataFrame:
+    # (Date) x (Field, Ticker) -> one row per (TICKER, DATE)
+    if wide.empty:
+        return pd.DataFrame(columns=MARKETDATA_COLUMNS)
+    if not isinstance(wide.columns, pd.MultiIndex):
+        wide = pd.concat({tickers[0]: wide}, axis=1).swaplevel(0, 1, axis=1)
+
+    long = wide.stack(level=1, future_stack=True).dropna(subset=['Close'])
+    long.index = long.index.set_names(['Date', 'Ticker'])
+    long = long.reset_index()
+
+    return pd.DataFrame({
+        'TICKER': long['Ticker'].str.upper(),
+        'DATE': pd.to_datetime(long['Date']).dt.strftime('%Y-%m-%d'),
+        'PRICE': long['Close'],
+        'VOLUME': long['Volume'],
+        'OPEN': long['Open'],
+        'HIGH': long['High'],
+        'LOW': long['Low'],
+    })
+
+
+def download_batch(tickers: list, replay_latest: bool = False, **history_kwargs):
+    # Returns (long_df, errors) where errors maps ticker -> message.
+    # replay_latest is for the daily window only (see utils/data_sources.py)
+    def live():
+        import yfinance as yf
+
+        with _DOWNLOAD_LOCK:
+            wide = yf.download(
+                tickers,
+                group_by='column',
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                **history_kwargs
+            )
+            return wide, dict(getattr(yf.shared, '_ERRORS', {}) or {})
+
+    # The window moves with the run date, so it is the variant, not the key
+    wide, errors = get_data_source().call("yfinance.download", {'tickers': list(tickers)}, live,
+                                          variant=history_kwargs, replay_latest=replay_latest)
+    return to_long_format(wide, tickers), errors
+
+
+def fetch_history_batch(batch: list, batch_number: int, throttle: AdaptiveThrottle,
+                        max_attempts: int = 4, raise_on_failure: bool = False, replay_latest: bool = False,
+                        **history_kwargs) -> pd.DataFrame:
+    # A batch that errors, or is still rate limited after max_attempts,
+    # comes back empty or partial; with raise_on_failure it raises
+    # BatchFetchError instead, for callers that must not record it as done
+    df = pd.DataFrame(columns=MARKETDATA_COLUMNS)
+    failure = None
+
+    for attempt in range(max_attempts):
+        throttle.wait()
+        try:
+            df, errors = download_batch(batch, replay_latest, **history_kwargs)
+        except Exception as e:
+            if not is_rate_limited(e):
+                print(f"Error downloading batch {batch_number}: {e}")
+                failure = str(e)
+                break
+            errors = {'*': str(e)}
+
+        if any(is_rate_limited(msg) for msg in errors.values()):
+            throttle.pushback()
+            failure = f"still rate limited after {max_attempts} attempts"
+            continue
+
+        throttle.success()
+        failure = None
+        for ticker, msg in errors.items():
+            print(f"Error with {ticker}: {msg}")
+        break
+
+    if failure and raise_on_failure:
+        raise BatchFetchError(f"batch {batch_number}: {failure}")
+    return df
+
+
+def fetch_history_batches(tickers: list, batch_size: int = 100, throttle: AdaptiveThrottle = None,
+                          max_attempts: int = 4, replay_latest: bool = False, **history_kwargs):
+    # Yields (batch_number, batch_tickers, long_df) for each batch of symbols
+    throttle = throttle or AdaptiveThrottle()
+
+    for i in range(0, len(tickers), batch_size):
+        batch = tickers[i:i + batch_size]
+        batch_number = i // batch_size + 1
+        yield batch_number, batch, fetch_history_batch(batch, batch_number, throttle, max_attempts,
+                                                       replay_latest=replay_latest, **history_kwargs)
+
+
+# -------------------
+# Sector / industry
+# -------------------
+def fetch_info(ticker: str) -> dict:
+    # Only the fields we read are kept, which keeps recordings small
+    def live():
+        import yfinance as yf
+
+        info = yf.Ticker(ticker).info
+        return {k: info.get(k) for k in ('sector', 'industry') if k in info}
+
+    return get_data_source().call("yfinance.info", {'ticker': ticker}, live)
+
+
+def get_sector_industry(tickers: list) -> pd.DataFrame:
+    rows = []
+    for ticker in tickers:
+        try:
+            info = fetch_info(ticker)
+        except Exception as e:
+            print(f"Error reading info for {ticker}: {e}")
+            info = {}
+        rows.append({
+            'TICKER': ticker.upper(),
+            'SECTOR': info.get('sector', 'N/A'),
+            'INDUSTRY': info.get('industry', 'N/A'),
+        })
+    return pd.DataFrame(rows, columns=['TICKER', 'SECTOR', 'INDUSTRY'])
+
+
+def enrich_batch(df: pd.DataFrame, reference: pd.DataFrame, now) -> pd.DataFrame:
+    df = df.merge(reference, on='TICKER', how='left')
+    df[['SECTOR', 'INDUSTRY']] = df[['SECTOR', 'INDUSTRY']].fillna('N/A')
+    df['LAST_UPDATED'] = pd.Timestamp(now)
+    return df
+
+
+class ReferenceCache:
+    # Local Parquet copy of TICKER -> SECTOR/INDUSTRY. Entries older than
+    # ttl_days, and tickers never seen before, are refetched through
+    # get_sector_industry; everything else is served from the file.
+    def __init__(self, path: str, ttl_days: int = 30, fetch=get_sector_industry):
+        self.path = path
+        self.ttl = pd.Timedelta(days=ttl_days)
+        self.fetch = fetch
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.changed = []
+        self.table = self._load()
+
+    def _load(self) -> pd.DataFrame:
+        if os.path.exists(self.path):
+            return pd.read_parquet(self.path)
+        return pd.DataFrame({
+            'TICKER': pd.Series(dtype=str),
+            'SECTOR': pd.Series(dtype=str),
+            'INDUSTRY': pd.Series(dtype=str),
+            'FETCHED_AT': pd.Series(dtype='datetime64[ns, UTC]'),
+            'CHANGED_AT': pd.Series(dtype='datetime64[ns, UTC]'),
+        })
+
+    def lookup(self, tickers: list) -> pd.DataFrame:
+        now = pd.Timestamp.now(tz='UTC')
+        wanted = pd.Index([t.upper() for t in tickers]).unique()
+        cached = self.table.set_index('TICKER').reindex(wanted)
+
+        missing = cached['FETCHED_AT'].isna()
+        expired = ~missing & (cached['FETCHED_AT'] < now - self.ttl)
+        self.hits += int((~missing & ~expired).sum())
+        self.misses += int(missing.sum())
+        self.stale += int(expired.sum())
+
+        refresh = cached.index[missing | expired].tolist()
+        if refresh:
+            self._refresh(refresh, now)
+
+        result = self.table[self.table['TICKER'].isin(wanted)]
+        return result[['TICKER', 'SECTOR', 'INDUSTRY']].reset_index(drop=True)
+
+    def _refresh(self, tickers: list, now):
+        fresh = self.fetch(tickers).set_index('TICKER')
+        old = self.table.set_index('TICKER').reindex(fresh.index)
+
+        # A failed or empty .info comes back as N/A; keep what we had, and
+        # keep the old FETCHED_AT (null for a new ticker) so the next run
+        # tries again instead of waiting out the TTL
+        unresolved = (fresh['SECTOR'] == 'N/A') & (fresh['INDUSTRY'] == 'N/A')
+        failed = unresolved & old['SECTOR'].notna()
+        fresh.loc[failed, ['SECTOR', 'INDUSTRY']] = old.loc[failed, ['SECTOR', 'INDUSTRY']]
+
+        changed = old['SECTOR'].notna() & (
+            (fresh['SECTOR'] != old['SECTOR']) | (fresh['INDUSTRY'] != old['INDUSTRY'])
+        )
+        for ticker in fresh.index[changed]:
+            self.changed.append(ticker)
+            print(f"Reference change for {ticker}: "
+                  f"{old.at[ticker, 'SECTOR']}/{old.at[ticker, 'INDUSTRY']} -> "
+                  f"{fresh.at[ticker, 'SECTOR']}/{fresh.at[ticker, 'INDUSTRY']}")
+
+        fresh['FETCHED_AT'] = old['FETCHED_AT'].where(unresolved, now)
+        fresh['CHANGED_AT'] = old['CHANGED_AT'].where(~changed, now)
+        fresh.loc[old['SECTOR'].isna(), 'CHANGED_AT'] = now
+
+        keep = self.table[~self.table['TICKER'].isin(fresh.index)]
+        self.table = pd.concat([keep, fresh.reset_index()], ignore_index=True)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.table.to_parquet(self.path, index=False)
+
+    def summary(self) -> str:
+        return (f"Reference cache: {self.hits} hits, {self.misses} misses, "
+                f"{self.stale} stale, {len(self.changed)} changed")
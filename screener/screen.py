@@ -0,0 +1,101 @@
+# screener/screen.py
+#
+# Command-line screener over the local snapshot. --refresh first pulls
+# rows loaded since the last refresh from the dbt target schema; screens
+# themselves never touch the warehouse.
+#
+#   PYTHONPATH=. python -m screener.screen --refresh --preset income
+#   PYTHONPATH=. python -m screener.screen --min-yield 0.025 --min-streak 5 --sentiment 0 1
+#   PYTHONPATH=. python -m screener.screen --where "cut_years == 0 and price < 100" --limit 20
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from screener.screens import PRESETS, Screen, Screener
+from screener.snapshot import Snapshot, curated_tables
+
+SCREENER_SNAPSHOT_DIR = os.getenv("SCREENER_SNAPSHOT_DIR", ".cache/screener")
+# Database.schema the dbt models build into
+SCREENER_SCHEMA = os.getenv("SCREENER_SCHEMA")
+
+
+def get_connection_parameters():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return dict(
+        user=os.getenv("SF_USER"),
+        password=os.getenv("SF_PASSWORD"),
+        account=os.getenv("SF_ACCOUNT"),
+        warehouse=os.getenv("SF_WAREHOUSE"),
+    )
+
+
+def refresh(snapshot: Snapshot):
+    from utils.snowflake_pool import get_pool
+
+    pool = get_pool()
+    pool.register("screener", get_connection_parameters)
+    start = time.perf_counter()
+    with pool.cursor("screener") as cursor:
+        pulled = snapshot.refresh(cursor)
+    print(f"Refreshed in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{name} +{rows}" for name, rows in pulled.items()))
+    print(pool.metrics.summary())
+
+
+def build_screen(args) -> Screen:
+    if args.preset:
+        screen = PRESETS[args.preset]
+        if args.where:
+            screen = Screen(**{**vars(screen), 'where': args.where})
+        return screen
+    return Screen(
+        min_yield=args.min_yield, max_yield=args.max_yield, min_growth_streak=args.min_streak,
+        min_paid_years=args.min_paid_years, max_cut_years=args.max_cuts,
+        sentiment_band=tuple(args.sentiment) if args.sentiment else None, where=args.where,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--refresh", action="store_true", help="pull new rows from Snowflake first")
+    parser.add_argument("--preset", choices=sorted(PRESETS))
+    parser.add_argument("--min-yield", type=float)
+    parser.add_argument("--max-yield", type=float)
+    parser.add_argument("--min-streak", type=int, help="consecutive years of dividend growth")
+    parser.add_argument("--min-paid-years", type=int)
+    parser.add_argument("--max-cuts", type=int)
+    parser.add_argument("--sentiment", type=float, nargs=2, metavar=("LOW", "HIGH"))
+    parser.add_argument("--where", help="extra pandas expression over the metric columns")
+    parser.add_argument("--as-of", help="screen as of this date (default: latest market date)")
+    parser.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.refresh and not SCREENER_SCHEMA:
+        sys.exit("Set SCREENER_SCHEMA to the dbt target schema (DATABASE.SCHEMA) to refresh")
+    snapshot = Snapshot(SCREENER_SNAPSHOT_DIR, curated_tables(SCREENER_SCHEMA or ""))
+    if args.refresh:
+        refresh(snapshot)
+    print(snapshot.summary())
+
+    screener = Screener(snapshot)
+    start = time.perf_counter()
+    metrics = screener.metrics(args.as_of)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    picks = screener.run(build_screen(args), args.as_of)
+    screened = time.perf_counter() - start
+
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(picks.head(args.limit).round(4))
+    print(f"{len(picks)} of {len(metrics)} tickers as of {metrics.attrs['as_of']:%Y-%m-%d} "
+          f"(metrics {built * 1000:.1f}ms, screen {screened * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# screener/screens.py
+#
+# Vectorized dividend screens over a Snapshot. build_metrics() reduces the
+# dividend, market and sentiment tables to one row per ticker (price,
+# trailing yield, CAGR, growth streak, payout consistency, frequency,
+# sentiment); a Screen is then a handful of boolean masks over that frame.
+#
+#   screener = Screener(snapshot)
+#   picks = screener.run(Screen(min_yield=0.03, min_growth_streak=5, sentiment_band=(0, 1)))
+
+import numpy as np
+import pandas as pd
+
+from utils.dividend_analytics import dividend_metrics
+
+
+def build_metrics(dividends: pd.DataFrame, market: pd.DataFrame, sentiment: pd.DataFrame = None,
+                  as_of=None, consistency_years: int = 5) -> pd.DataFrame:
+    # One row per dividend-paying ticker; see utils/dividend_analytics.py
+    metrics = dividend_metrics(
+        dividends.rename(columns={'dividend_date': 'date'}),
+        market.rename(columns={'market_date': 'date', 'close': 'price'}),
+        as_of=as_of, consistency_years=consistency_years,
+    )
+
+    if sentiment is not None and not sentiment.empty:
+        s = sentiment.set_index('ticker')
+        metrics['sentiment'] = s['estimated_sentiment'].reindex(metrics.index)
+        metrics['sentiment_count'] = s['sentiment_count'].reindex(metrics.index).fillna(0).astype(int)
+    else:
+        metrics['sentiment'] = np.nan
+        metrics['sentiment_count'] = 0
+    return metrics
+
+
+class Screen:
+    # Every criterion left as None is ignored. `where` is an optional
+    # DataFrame.query expression over the metric columns.
+    def __init__(self, min_yield: float = None, max_yield: float = None, min_growth_streak: int = None,
+                 min_paid_years: int = None, max_cut_years: int = None, sentiment_band: tuple = None,
+                 where: str = None, sort_by: str = 'yield_ttm'):
+        self.min_yield = min_yield
+        self.max_yield = max_yield
+        self.min_growth_streak = min_growth_streak
+        self.min_paid_years = min_paid_years
+        self.max_cut_years = max_cut_years
+        self.sentiment_band = sentiment_band
+        self.where = where
+        self.sort_by = sort_by
+
+    def mask(self, metrics: pd.DataFrame) -> np.ndarray:
+        keep = np.ones(len(metrics), dtype=bool)
+        if self.min_yield is not None:
+            keep &= (metrics['yield_ttm'] >= self.min_yield).to_numpy()
+        if self.max_yield is not None:
+            keep &= (metrics['yield_ttm'] <= self.max_yield).to_numpy()
+        if self.min_growth_streak is not None:
+            keep &= (metrics['growth_streak'] >= self.min_growth_streak).to_numpy()
+        if self.min_paid_years is not None:
+            keep &= (metrics['paid_years'] >= self.min_paid_years).to_numpy()
+        if self.max_cut_years is not None:
+            keep &= (metrics['cut_years'] <= self.max_cut_years).to_numpy()
+        if self.sentiment_band is not None:
+            low, high = self.sentiment_band
+            keep &= metrics['sentiment'].between(low, high).to_numpy()
+        if self.where:
+            keep &= metrics.eval(self.where).to_numpy(dtype=bool)
+        return keep
+
+    def apply(self, metrics: pd.DataFrame) -> pd.DataFrame:
+        picks = metrics[self.mask(metrics)]
+        return picks.sort_values(self.sort_by, ascending=False) if self.sort_by else picks
+
+
+PRESETS = {
+    "income": Screen(min_yield=0.03, min_paid_years=5, max_cut_years=0),
+    "growth": Screen(min_yield=0.01, min_growth_streak=5, sort_by='growth_streak'),
+    "sentiment_income": Screen(min_yield=0.025, max_cut_years=0, sentiment_band=(0.1, 1.0)),
+}
+
+
+class Screener:
+    # Caches the per-ticker metrics for each as_of date so successive
+    # screens only pay for the masks
+    def __init__(self, snapshot, consistency_years: int = 5):
+        self.snapshot = snapshot
+        self.consistency_years = consistency_years
+        self._metrics = {}
+
+    def metrics(self, as_of=None) -> pd.DataFrame:
+        key = str(as_of)
+        if key not in self._metrics:
+            sentiment = self.snapshot.frame("sentiment") if "sentiment" in self.snapshot.tables else None
+            self._metrics[key] = build_metrics(
+                self.snapshot.frame("dividends"), self.snapshot.frame("market"), sentiment,
+                as_of=as_of, consistency_years=self.consistency_years,
+            )
+        return self._metrics[key]
+
+    def run(self, screen: Screen, as_of=None) -> pd.DataFrame:
+        return screen.apply(self.metrics(as_of))
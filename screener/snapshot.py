@@ -0,0 +1,152 @@
+# screener/snapshot.py
+#
+# Local columnar copy of the curated tables the screener reads. Each table
+# is one Parquet file under `root`, opened memory-mapped, plus an entry in
+# _manifest.json holding its watermark (the newest load timestamp pulled).
+# refresh() only asks the warehouse for rows loaded at or after that
+# watermark and folds them in on the table's key, so a daily refresh moves
+# one day of rows.
+
+import json
+import os
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class SnapshotTable:
+    def __init__(self, name: str, relation: str, columns: list, key: list, watermark: str):
+        self.name = name
+        self.relation = relation
+        self.columns = columns
+        self.key = key
+        self.watermark = watermark
+
+
+def curated_tables(schema: str) -> list:
+    # Column names are lower-cased locally
+    return [
+        SnapshotTable("dividends", f"{schema}.SP500_STOCKS_DIVIDENDData_Hist",
+                      ['TICKER', 'DIVIDEND_DATE', 'DIVIDEND', 'Src_Inserted_Date'],
+                      key=['ticker', 'dividend_date'], watermark='Src_Inserted_Date'),
+        SnapshotTable("market", f"{schema}.SP500_MarketData_Hist",
+                      ['TICKER', 'MARKET_DATE', 'CLOSE', 'VOLUME', 'Src_Inserted_Date'],
+                      key=['ticker', 'market_date'], watermark='Src_Inserted_Date'),
+        SnapshotTable("sentiment", f"{schema}.SP500_Sentiment_Ticker_Summary",
+                      ['TICKER', 'ESTIMATED_SENTIMENT', 'SENTIMENT_COUNT', 'LAST_INSERTED_DATE'],
+                      key=['ticker'], watermark='LAST_INSERTED_DATE'),
+    ]
+
+
+def read_query(cursor, sql: str) -> pd.DataFrame:
+    # Works with any DB-API cursor; the Snowflake connector can hand back
+    # Arrow directly
+    cursor.execute(sql)
+    if hasattr(cursor, "fetch_pandas_all"):
+        df = cursor.fetch_pandas_all()
+    else:
+        df = pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+    df.columns = [c.lower() for c in df.columns]
+    # NUMBER(p,s) and DATE come back as Python objects; screens want
+    # float64 and datetime64 columns
+    for column in df.columns[df.dtypes == object]:
+        sample = df[column].dropna()
+        if len(sample) and isinstance(sample.iloc[0], Decimal):
+            df[column] = df[column].astype(float)
+        elif len(sample) and isinstance(sample.iloc[0], date):
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+
+def _watermark(column: pd.Series):
+    # Newest load timestamp as a naive literal the warehouse can CAST
+    latest = pd.to_datetime(column).max() if len(column) else None
+    if latest is None or pd.isna(latest):
+        return None
+    if latest.tzinfo is not None:
+        latest = latest.tz_convert(None)
+    return str(latest)
+
+
+class Snapshot:
+    MANIFEST = "_manifest.json"
+
+    def __init__(self, root: str, tables: list):
+        self.root = root
+        self.tables = {t.name: t for t in tables}
+        self.manifest = self._load_manifest()
+        self._frames = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.parquet")
+
+    def _load_manifest(self) -> dict:
+        path = os.path.join(self.root, self.MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        path = os.path.join(self.root, self.MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    # -------------------
+    # Refresh
+    # -------------------
+    def refresh(self, cursor) -> dict:
+        # Returns rows pulled per table
+        os.makedirs(self.root, exist_ok=True)
+        pulled = {}
+        for table in self.tables.values():
+            entry = self.manifest.get(table.name, {})
+            sql = f"SELECT {', '.join(table.columns)} FROM {table.relation}"
+            if entry.get('watermark'):
+                # Inclusive, so rows sharing the last timestamp are not
+                # missed; the key-wise merge below makes re-reading them harmless
+                sql += f" WHERE {table.watermark} >= CAST('{entry['watermark']}' AS TIMESTAMP)"
+            new = read_query(cursor, sql)
+            pulled[table.name] = len(new)
+            if new.empty and os.path.exists(self._path(table.name)):
+                continue
+
+            path = self._path(table.name)
+            if os.path.exists(path) and entry.get('watermark'):
+                old = pq.read_table(path).to_pandas()
+                merged = pd.concat([old, new], ignore_index=True)
+                merged = merged.drop_duplicates(subset=table.key, keep='last')
+            else:
+                merged = new
+            merged = merged.sort_values(table.key, kind='stable').reset_index(drop=True)
+            pq.write_table(pa.Table.from_pandas(merged, preserve_index=False), path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+            self.manifest[table.name] = {
+                'watermark': _watermark(merged[table.watermark.lower()]),
+                'rows': len(merged),
+                'refreshed_at': datetime.now(timezone.utc).isoformat(),
+            }
+            self._frames.pop(table.name, None)
+        self._save_manifest()
+        return pulled
+
+    # -------------------
+    # Read
+    # -------------------
+    def frame(self, name: str) -> pd.DataFrame:
+        if name not in self._frames:
+            path = self._path(name)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No snapshot for '{name}' under {self.root}; run a refresh first")
+            self._frames[name] = pq.read_table(path, memory_map=True).to_pandas()
+        return self._frames[name]
+
+    def summary(self) -> str:
+        parts = [f"{name}: {entry.get('rows', 0)} rows through {entry.get('watermark')}"
+                 for name, entry in self.manifest.items()]
+        return "Snapshot: " + ("; ".join(parts) if parts else "empty")
@@ -1,130 +1,135 @@
 import os
-import requests
-import pandas as pd
-import boto3
 import logging
+import tempfile
 from datetime import datetime
-from snowflake.connector import connect, ProgrammingError
+from functools import lru_cache
 from dotenv import load_dotenv
-from io import StringIO
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
+from utils.snowflake_bulk import BatchWriter
+from utils.landing_format import LandingSpool, get_schema, landing_extension
+from utils.snowflake_pool import get_pool, load_private_key
+from utils.sp500_universe import resolve_tickers
+from utils.sentiment_data import AlphaVantageClient
 
 # --- LOAD ENV ---
 # Load API key & Snowflake credentials from .env file
 load_dotenv()
 key_path = "rsa_key.pem"
 
-with open(key_path, "rb") as key_file:
-    private_key = serialization.load_pem_private_key(
-        key_file.read(),
-        password=None  # Add password here if you encrypted the key
-    )
+def get_private_key():
+    return load_private_key(key_path)
 
 # --- CONFIGURATION ---
 ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
+# Requests per minute allowed by our Alpha Vantage plan, and fetch threads
+ALPHA_VANTAGE_CALLS_PER_MINUTE = float(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '75'))
+ALPHA_VANTAGE_WORKERS = int(os.getenv('ALPHA_VANTAGE_WORKERS', '4'))
+# Tickers per NEWS_SENTIMENT request; 1 keeps one request per ticker.
+# Alpha Vantage treats tickers=A,B as "mentions A and B", so a batch only
+# returns articles naming every ticker in it; above 1 it saves quota at
+# the cost of most of the coverage.
+ALPHA_VANTAGE_BATCH_SIZE = int(os.getenv('ALPHA_VANTAGE_BATCH_SIZE', '1'))
 S3_BUCKET = os.getenv('AWS_BUCKET_NAME')
 AWS_REGION = os.getenv('AWS_REGION')
-S3_KEY = f"sentiment/sentiment_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-
-SNOWFLAKE_CFG = {
-    "user": os.getenv("SNOWFLAKE_USER"),
-    "password": os.getenv("SNOWFLAKE_PASSWORD"),
-    "account": os.getenv("SNOWFLAKE_ACCOUNT"),
-    "database": os.getenv("SNOWFLAKE_DATABASE"),
-    "schema": os.getenv("SNOWFLAKE_SCHEMA"),
-    "warehouse": os.getenv("SNOWFLAKE_WAREHOUSE"),
-    "role": os.getenv("SNOWFLAKE_ROLE"),
-    "private_key" : private_key
-}
+S3_KEY = f"sentiment/sentiment_{datetime.now().strftime('%Y%m%d_%H%M%S')}{landing_extension()}"
+
+def get_snowflake_cfg():
+    return {
+        "user": os.getenv("SNOWFLAKE_USER"),
+        "password": os.getenv("SNOWFLAKE_PASSWORD"),
+        "account": os.getenv("SNOWFLAKE_ACCOUNT"),
+        "database": os.getenv("SNOWFLAKE_DATABASE"),
+        "schema": os.getenv("SNOWFLAKE_SCHEMA"),
+        "warehouse": os.getenv("SNOWFLAKE_WAREHOUSE"),
+        "role": os.getenv("SNOWFLAKE_ROLE"),
+        "private_key" : get_private_key()
+    }
+
+SNOWFLAKE_PROFILE = "sentiment"
+
+def get_snowflake_pool():
+    pool = get_pool()
+    pool.register(SNOWFLAKE_PROFILE, get_snowflake_cfg)
+    return pool
 
 # Logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- FUNCTIONS ---
 
 def get_tickers_from_snowflake():
+    from snowflake.connector import ProgrammingError
+
     try:
-        conn = connect(**SNOWFLAKE_CFG)
-        cursor = conn.cursor()
-        cursor.execute("SELECT TICKER FROM FINANCE_DB.REFERENCEData_SCHEMA.TICKERS_INSCOPE WHERE ACTIVE='TRUE'") 
-        tickers = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        conn.close()
+        with get_snowflake_pool().cursor(SNOWFLAKE_PROFILE) as cursor:
+            cursor.execute("SELECT TICKER FROM FINANCE_DB.REFERENCEData_SCHEMA.TICKERS_INSCOPE WHERE ACTIVE='TRUE'")
+            tickers = [row[0] for row in cursor.fetchall()]
         logger.info(f"Retrieved {len(tickers)} tickers from Snowflake.")
         return tickers
     except ProgrammingError as e:
         logger.error(f"Error reading tickers from Snowflake: {e}")
         return []
 
-# --- Updated get_sentiment_for_ticker() ---
+# --- Alpha Vantage client ---
+
+@lru_cache(maxsize=None)
+def get_alpha_vantage_client():
+    return AlphaVantageClient(
+        ALPHA_VANTAGE_API_KEY,
+        calls_per_minute=ALPHA_VANTAGE_CALLS_PER_MINUTE,
+        max_workers=ALPHA_VANTAGE_WORKERS
+    )
 
 def get_sentiment_for_ticker(ticker):
-    try:
-        url = f"https://www.alphavantage.co/query?function=NEWS_SENTIMENT&tickers={ticker}&apikey={ALPHA_VANTAGE_API_KEY}"
-        response = requests.get(url)
-        if response.status_code != 200:
-            logger.warning(f"Failed to fetch sentiment for {ticker}: HTTP {response.status_code}")
-            return []
-        data = response.json()
-        return [
-            {
-                'ticker': ticker,
-                'title': item.get('title'),
-                'source': item.get('source'),
-                'time_published': item.get('time_published'),
-                'sentiment_date': datetime.strptime(item.get('time_published')[:8], "%Y%m%d").date() if item.get('time_published') else None,
-                'overall_sentiment_score': item.get('overall_sentiment_score'),
-                'overall_sentiment_label': item.get('overall_sentiment_label'),
-                'relevance_score': item['ticker_sentiment'][0]['relevance_score']
-                if item.get('ticker_sentiment') else None
-            } for item in data.get('feed', [])
-        ]
-    except Exception as e:
-        logger.error(f"Exception while fetching sentiment for {ticker}: {e}")
-        return []
+    return get_alpha_vantage_client().get_sentiment_for_ticker(ticker)
+
+
+# --- Streaming insert into Snowflake ---
 
+SENTIMENT_TABLE = "RAW_SCHEMA.raw_SENTIMENTs"
+# Declared once in the landing-schema registry; the Snowflake insert and
+# the S3 spool write the same typed batches
+SENTIMENT_SCHEMA = get_schema("sentiment").schema
+SENTIMENT_INSERT_COLUMNS = ['ticker', 'title', 'source', 'overall_sentiment_score',
+                            'overall_sentiment_label', 'relevance_score', 'sentiment_date']
+SENTIMENT_CHUNK_SIZE = 5000
 
 
-# --- Updated insert_sentiments_to_snowflake() ---
+def open_sentiment_writer(cursor, on_batch=None):
+    return BatchWriter(cursor, SENTIMENT_TABLE, SENTIMENT_SCHEMA,
+                       columns=SENTIMENT_INSERT_COLUMNS,
+                       chunk_size=SENTIMENT_CHUNK_SIZE, on_batch=on_batch)
+
 
 def insert_sentiments_to_snowflake(df):
+    from snowflake.connector import ProgrammingError
+
     try:
-        conn = connect(**SNOWFLAKE_CFG)
-        cursor = conn.cursor()
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT INTO RAW_SCHEMA.raw_SENTIMENTs (ticker, title, source, overall_sentiment_score, overall_sentiment_label, relevance_score, sentiment_date)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                row['ticker'],
-                row['title'],
-                row['source'],
-                row['overall_sentiment_score'],
-                row['overall_sentiment_label'],
-                row['relevance_score'],
-                row['sentiment_date']
-            ))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        logger.info(f"Inserted {len(df)} records into Snowflake.")
+        with get_snowflake_pool().connection(SNOWFLAKE_PROFILE) as conn:
+            cursor = conn.cursor()
+            writer = open_sentiment_writer(cursor)
+            writer.write(df.to_dict('records'))
+            stats = writer.close()
+            conn.commit()
+            cursor.close()
+        logger.info(f"Inserted {stats['rows']} records into Snowflake.")
     except ProgrammingError as e:
         logger.error(f"Error inserting sentiment data into Snowflake: {e}")
 
 
-def upload_to_s3(df, bucket, key):
+def upload_to_s3(fileobj, bucket, key, s3=None):
+    import boto3
+
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_KEY'),
-            region_name=AWS_REGION
-        )
-        s3 = session.client('s3')
-        csv_buffer = StringIO()
-        df.to_csv(csv_buffer, index=False)
-        s3.put_object(Bucket=bucket, Key=key, Body=csv_buffer.getvalue())
+        if s3 is None:
+            session = boto3.Session(
+                aws_access_key_id=os.getenv('AWS_ACCESS_KEY'),
+                aws_secret_access_key=os.getenv('AWS_SECRET_KEY'),
+                region_name=AWS_REGION
+            )
+            s3 = session.client('s3')
+        fileobj.seek(0)
+        s3.upload_fileobj(fileobj, bucket, key)
         logger.info(f"Uploaded sentiment data to s3://{bucket}/{key}")
     except Exception as e:
         logger.error(f"Failed to upload to S3: {e}")
@@ -132,22 +137,46 @@ def upload_to_s3(df, bucket, key):
 # --- MAIN ---
 
 def main():
-    tickers = get_tickers_from_snowflake()
-    all_sentiments = []
-
-    for ticker in tickers:
-        sentiments = get_sentiment_for_ticker(ticker)
-        if sentiments:
-            all_sentiments.extend(sentiments)
-
-    if not all_sentiments:
-        logger.warning("No sentiment data retrieved.")
-        return
-
-    df = pd.DataFrame(all_sentiments)
+    from snowflake.connector import ProgrammingError
+
+    logging.basicConfig(level=logging.INFO)
+    tickers = resolve_tickers(inscope=get_tickers_from_snowflake)
+
+    # Each flushed chunk is also appended to a local spool file, so neither
+    # the Snowflake load nor the S3 copy holds every article in memory.
+    with tempfile.TemporaryFile(mode="w+b") as spool_file:
+        spool = LandingSpool(spool_file, "sentiment")
+
+        try:
+            # Same pooled connection that served the ticker read above
+            with get_snowflake_pool().connection(SNOWFLAKE_PROFILE) as conn:
+                cursor = conn.cursor()
+                writer = open_sentiment_writer(cursor, on_batch=spool.write)
+
+                client = get_alpha_vantage_client()
+                for _, sentiments in client.fetch_all(tickers, batch_size=ALPHA_VANTAGE_BATCH_SIZE):
+                    if sentiments:
+                        writer.write(sentiments)
+
+                stats = writer.close()
+                conn.commit()
+                cursor.close()
+        except ProgrammingError as e:
+            logger.error(f"Error inserting sentiment data into Snowflake: {e}")
+            return
+
+        if not stats['rows']:
+            logger.warning("No sentiment data retrieved.")
+            return
+
+        logger.info(
+            f"Inserted {stats['rows']} records into Snowflake in {stats['batches']} batches "
+            f"({stats['rows_per_sec']:,.0f} rows/sec, {stats['bytes']:,} bytes)."
+        )
+        spool.close()
+        upload_to_s3(spool_file, S3_BUCKET, S3_KEY)
 
-    insert_sentiments_to_snowflake(df)
-    upload_to_s3(df, S3_BUCKET, S3_KEY)
+    logger.info(get_snowflake_pool().metrics.summary())
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,220 @@
+# utils/sentiment_data.py
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.data_sources import get_data_source
+
+logger = logging.getLogger(__name__)
+
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+
+# Alpha Vantage answers HTTP 200 with one of these keys in place of "feed"
+# both when throttling and for an invalid or premium-only key. Only
+# messages with rate-limit wording are retried; the rest fail at once.
+THROTTLE_KEYS = ("Note", "Information")
+RATE_LIMIT_MARKERS = ("rate limit", "per minute", "per day", "per second", "spreading out", "slow down")
+
+# Batched requests share one feed across several tickers, so ask for the
+# API maximum instead of the default 50 items.
+BATCH_FEED_LIMIT = 1000
+
+
+# -------------------
+# Rate limiting
+# -------------------
+class TokenBucket:
+    def __init__(self, calls_per_minute: float, burst: int = 1):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# -------------------
+# Record shaping
+# -------------------
+def make_record(ticker: str, item: dict, relevance_score) -> dict:
+    return {
+        'ticker': ticker,
+        'title': item.get('title'),
+        'source': item.get('source'),
+        'time_published': item.get('time_published'),
+        'sentiment_date': datetime.strptime(item.get('time_published')[:8], "%Y%m%d").date() if item.get('time_published') else None,
+        'overall_sentiment_score': item.get('overall_sentiment_score'),
+        'overall_sentiment_label': item.get('overall_sentiment_label'),
+        'relevance_score': relevance_score
+    }
+
+
+def parse_feed(tickers, data: dict) -> list:
+    # Fans each feed item out to every requested ticker listed in its
+    # ticker_sentiment, using that ticker's own relevance score.
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    records = []
+    for item in data.get('feed', []):
+        scores = {
+            ts.get('ticker', '').upper(): ts.get('relevance_score')
+            for ts in item.get('ticker_sentiment') or []
+        }
+        matched = [t for t in tickers if t.upper() in scores]
+        if not matched and len(tickers) == 1:
+            # Single-ticker requests keep untagged articles, as before
+            matched = tickers
+        for ticker in matched:
+            records.append(make_record(ticker, item, scores.get(ticker.upper())))
+    return records
+
+
+def response_json(response):
+    # The parsed body of a 200 response, or None
+    if response.status_code != 200:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def is_throttled(response, data=None) -> bool:
+    # data is the already-parsed body, if the caller has it
+    if response.status_code == 429:
+        return True
+    if data is None:
+        data = response_json(response)
+    if not isinstance(data, dict) or 'feed' in data:
+        return False
+    messages = [str(data[key]).lower() for key in THROTTLE_KEYS if key in data]
+    return any(marker in message for message in messages for marker in RATE_LIMIT_MARKERS)
+
+
+def api_message(data: dict) -> str:
+    # The Note/Information/Error Message text of a response without a feed
+    if 'feed' in data:
+        return None
+    for key in THROTTLE_KEYS + ("Error Message",):
+        if key in data:
+            return str(data[key])
+    return None
+
+
+# -------------------
+# Client
+# -------------------
+class AlphaVantageClient:
+    def __init__(self, api_key: str, calls_per_minute: float = 75, max_workers: int = 4,
+                 base_url: str = ALPHA_VANTAGE_URL, max_retries: int = 5,
+                 backoff_seconds: float = 2.0, timeout: float = 30):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.bucket = TokenBucket(calls_per_minute, burst=max_workers)
+
+        # One pooled session so every worker reuses kept-alive TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Recorded/replayed by URL and query when DATA_SOURCE_MODE is set;
+        # the API key is not part of the recording, and neither are throttle
+        # notices
+        self.session = get_data_source().wrap_session(self.session, "alphavantage", transient=is_throttled)
+
+        self.requests_made = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def _backoff(self, attempt: int, response) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_seconds * (2 ** attempt)
+
+    def query(self, params: dict):
+        # Returns the last response and its parsed body (None unless HTTP 200)
+        params = {**params, 'apikey': self.api_key}
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            data = response_json(response)
+            throttled = is_throttled(response, data)
+            with self.lock:
+                self.requests_made += 1
+                self.throttled += throttled
+            if not throttled:
+                return response, data
+            if attempt == self.max_retries:
+                break
+            wait = self._backoff(attempt, response)
+            logger.warning(f"Alpha Vantage throttled {params.get('tickers')}; retrying in {wait:.1f}s")
+            time.sleep(wait)
+        return response, data
+
+    def get_sentiment_for_tickers(self, tickers: list) -> list:
+        label = ",".join(tickers)
+        params = {'function': 'NEWS_SENTIMENT', 'tickers': label}
+        if len(tickers) > 1:
+            params['limit'] = BATCH_FEED_LIMIT
+        try:
+            response, data = self.query(params)
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch sentiment for {label}: HTTP {response.status_code}")
+                return []
+            if data is None:
+                raise ValueError("response body is not JSON")
+            message = api_message(data)
+            if message:
+                logger.error(f"Alpha Vantage refused {label}: {message}")
+                return []
+            return parse_feed(tickers, data)
+        except Exception as e:
+            logger.error(f"Exception while fetching sentiment for {label}: {e}")
+            return []
+
+    def get_sentiment_for_ticker(self, ticker: str) -> list:
+        return self.get_sentiment_for_tickers([ticker])
+
+    def fetch_all(self, tickers: list, batch_size: int = 1):
+        # Yields (tickers, records) per request in completion order. At most
+        # two requests per worker are in flight, and a result is dropped once
+        # yielded, so a slow consumer never has the whole feed in memory.
+        groups = iter([tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for group in groups:
+                futures[pool.submit(self.get_sentiment_for_tickers, group)] = group
+                if len(futures) >= 2 * self.max_workers:
+                    break
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield futures.pop(future), future.result()
+                    group = next(groups, None)
+                    if group is not None:
+                        futures[pool.submit(self.get_sentiment_for_tickers, group)] = group
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,224 @@
+# utils/backfill.py
+#
+# Historical backfill as (ticker group x date span) shards. Shards are
+# fetched on a worker pool; each finished shard is written to its own
+# Parquet file under `stage_dir` (schema-checked through
+# utils/landing_format.py) and recorded in a checkpoint. The files are then
+# loaded together: one PUT, one COPY into a temporary table, and one MERGE
+# on the key columns into the target.
+#
+#   shards = plan_shards(tickers, "2005-01-01", "2025-01-01", group_size=50, span_years=1)
+#   engine = Backfill(fetch, ".cache/marketdata_backfill", "marketdata", workers=2)
+#   engine.run(shards)
+#   engine.load(StagedCopyLoad(session, "RAW_SP500_MARKET_DATA_HIST", keys=['TICKER', 'DATE']))
+#
+# Spans are aligned to calendar years and always fetched from the start of
+# the year, even when the window starts inside it; only the span still
+# open at the window's end is cut short. Tickers are grouped by a hash of
+# the symbol, so a change to the universe only touches the groups of the
+# tickers added or dropped. A shard's key therefore stays the same while
+# the default window slides forward day by day. Re-running skips shards
+# already in the checkpoint,
+# files left by a run that failed before loading are picked up by the next
+# load, and extending the window back only fetches the new years. The MERGE
+# makes a repeated or overlapping load a no-op for unchanged rows.
+
+import hashlib
+import os
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import pyarrow as pa
+
+from utils.checkpoint import Checkpoint
+from utils.landing_format import get_schema, serialize
+from utils.snowflake_merge import merge_counts, merge_sql
+from utils.stage_timer import StageTimer
+
+
+class Shard:
+    def __init__(self, group: int, tickers: list, start: pd.Timestamp, end: pd.Timestamp):
+        self.group = group
+        self.tickers = tickers
+        self.start = start
+        self.end = end   # exclusive, like yfinance's end=
+        digest = hashlib.sha1(",".join(tickers).encode()).hexdigest()[:8]
+        self.key = f"g{group:03d}-{digest}_{start:%Y%m%d}_{end:%Y%m%d}"
+
+    def __repr__(self):
+        return f"Shard({self.key}, {len(self.tickers)} tickers)"
+
+
+def plan_shards(tickers: list, start, end, group_size: int = 50, span_years: int = 1) -> list:
+    # Every span_years span (counted from 1 January 2000) that overlaps
+    # [start, end), with only its end clipped to the window. Tickers go to
+    # about len / group_size groups by CRC32 of the symbol, which is stable
+    # across runs and processes.
+    tickers = sorted({t.upper() for t in tickers})
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    first = 2000 + (start.year - 2000) // span_years * span_years
+    edges = [pd.Timestamp(year=y, month=1, day=1) for y in range(first, end.year + span_years + 1, span_years)]
+    spans = [(lo, min(hi, end)) for lo, hi in zip(edges, edges[1:]) if hi > start and lo < end]
+
+    groups = [[] for _ in range(max(1, round(len(tickers) / group_size)))]
+    for ticker in tickers:
+        groups[zlib.crc32(ticker.encode()) % len(groups)].append(ticker)
+    return [Shard(g, group, lo, hi) for lo, hi in spans for g, group in enumerate(groups) if group]
+
+
+class Backfill:
+    def __init__(self, fetch, stage_dir: str, dataset: str, workers: int = 2, checkpoint: Checkpoint = None):
+        # fetch(shard) -> DataFrame in the dataset's landing schema (may be
+        # empty); it must raise when the fetch did not complete, since a
+        # shard is checkpointed as soon as fetch returns
+        self.fetch = fetch
+        self.stage_dir = stage_dir
+        self.dataset = dataset
+        self.workers = workers
+        self.checkpoint = checkpoint or Checkpoint(os.path.join(stage_dir, "shards.checkpoint"))
+        self.timer = StageTimer()
+        self.rows = 0
+        self.bytes = 0
+        self.empty = 0
+        self.failed = []
+
+    def _path(self, shard: Shard) -> str:
+        return os.path.join(self.stage_dir, f"{shard.key}.parquet")
+
+    def _run_shard(self, shard: Shard) -> tuple:
+        # Returns (rows, bytes written)
+        with self.timer.stage("fetch"):
+            df = self.fetch(shard)
+        size = 0
+        if not df.empty:
+            with self.timer.stage("write", items=len(df)):
+                body, size = serialize(df, self.dataset, "parquet")
+                path = self._path(shard)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(body.getbuffer())
+                os.replace(path + ".tmp", path)
+        self.checkpoint.mark(shard.key)
+        return len(df), size
+
+    # -------------------
+    # Fetch
+    # -------------------
+    def run(self, shards: list) -> dict:
+        os.makedirs(self.stage_dir, exist_ok=True)
+        pending = [s for s in shards if s.key not in self.checkpoint]
+        print(f"{len(shards) - len(pending)} of {len(shards)} shards already fetched, {len(pending)} to go.")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_shard, shard): shard for shard in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                shard = futures[future]
+                try:
+                    rows, size = future.result()
+                except Exception as e:
+                    print(f"Error in shard {shard.key}: {e}")
+                    self.failed.append(shard.key)
+                    continue
+                self.rows += rows
+                self.bytes += size
+                self.empty += rows == 0
+                if done % 50 == 0 or done == len(pending):
+                    print(f"Fetched {done}/{len(pending)} shards, {self.rows:,} rows")
+        elapsed = time.perf_counter() - started
+
+        if self.failed:
+            print(f"{len(self.failed)} shards failed and will be retried on the next run")
+        return {'shards': len(pending), 'skipped': len(shards) - len(pending), 'empty': self.empty,
+                'failed': len(self.failed), 'rows': self.rows, 'bytes': self.bytes, 'elapsed': elapsed,
+                'rows_per_sec': self.rows / elapsed if elapsed else 0.0}
+
+    # -------------------
+    # Load
+    # -------------------
+    def staged_files(self) -> list:
+        if not os.path.isdir(self.stage_dir):
+            return []
+        return sorted(os.path.join(self.stage_dir, name) for name in os.listdir(self.stage_dir)
+                      if name.endswith(".parquet"))
+
+    def load(self, loader) -> dict:
+        # Loads every staged file (this run's and any left by an earlier
+        # one) and removes them once the load has committed
+        files = self.staged_files()
+        if not files:
+            return {'files': 0, 'rows': 0, 'inserted': 0, 'updated': 0, 'merged': 0, 'elapsed': 0.0}
+        with self.timer.stage("load", items=len(files)):
+            stats = loader.load(files, self.dataset)
+        for path in files:
+            os.remove(path)
+        return {'files': len(files), **stats}
+
+
+# -------------------
+# Snowflake
+# -------------------
+SNOWFLAKE_TYPES = [
+    (pa.types.is_string, "STRING"),
+    (pa.types.is_date, "DATE"),
+    (pa.types.is_timestamp, "TIMESTAMP_NTZ"),
+    (pa.types.is_integer, "NUMBER"),
+    (pa.types.is_floating, "FLOAT"),
+]
+
+
+def copy_select(dataset: str) -> str:
+    # Parquet columns by name, cast to the table's types
+    columns = []
+    for field in get_schema(dataset).schema:
+        kind = next(sql for test, sql in SNOWFLAKE_TYPES if test(field.type))
+        columns.append(f'$1:"{field.name}"::{kind}')
+    return ", ".join(columns)
+
+
+class StagedCopyLoad:
+    # PUTs the shard files to a temporary stage, COPYs them into a
+    # temporary table in one statement and MERGEs that into the target on
+    # `keys`. touch_column is stamped on insert and update, as in StagedMerge.
+    def __init__(self, session, target: str, keys: list, order_by: str = None,
+                 touch_column: str = 'INSERTED_DATE', parallel: int = 8):
+        self.session = session
+        self.target = target
+        self.keys = keys
+        self.order_by = order_by
+        self.touch_column = touch_column
+        self.parallel = parallel
+        suffix = uuid.uuid4().hex[:8].upper()
+        self.stage = f"BACKFILL_STAGE_{suffix}"
+        self.staging = f"{target.split('.')[-1]}_BACKFILL_{suffix}"
+
+    def _put(self, files: list):
+        self.session.sql(f"CREATE TEMPORARY STAGE {self.stage}").collect()
+        directory = os.path.abspath(os.path.dirname(files[0]))
+        self.session.file.put(f"file://{directory}/*.parquet", f"@{self.stage}",
+                              auto_compress=False, overwrite=True, parallel=self.parallel)
+
+    def _copy_sql(self, files: list, dataset: str) -> str:
+        columns = get_schema(dataset).schema.names
+        return (f"COPY INTO {self.staging} ({', '.join(columns)}) "
+                f"FROM (SELECT {copy_select(dataset)} FROM @{self.stage}) "
+                f"FILE_FORMAT = (TYPE = PARQUET) PATTERN = '.*[.]parquet'")
+
+    def load(self, files: list, dataset: str) -> dict:
+        started = time.perf_counter()
+        columns = get_schema(dataset).schema.names
+        self._put(files)
+        self.session.sql(
+            f"CREATE OR REPLACE TEMPORARY TABLE {self.staging} AS "
+            f"SELECT {', '.join(columns)} FROM {self.target} LIMIT 0"
+        ).collect()
+        copied = self.session.sql(self._copy_sql(files, dataset)).collect()
+        rows = sum(int(v) for r in copied for k, v in r.as_dict().items() if k.lower() in ('rows_loaded', 'count'))
+
+        sql = merge_sql(self.target, self.staging, self.keys, columns,
+                        order_by=self.order_by, touch_column=self.touch_column)
+        counts = merge_counts(self.session.sql(sql).collect())
+        self.session.sql(f"DROP TABLE IF EXISTS {self.staging}").collect()
+        return {'rows': rows, **counts, 'elapsed': time.perf_counter() - started}
@@ -0,0 +1,40 @@
+# utils/checkpoint.py
+
+import os
+import threading
+
+
+class Checkpoint:
+    # Durable set of completed work keys, one per line. Each mark() is
+    # flushed and fsynced before returning, so a crash loses at most the
+    # item in flight and a re-run skips everything already recorded.
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, key) -> bool:
+        return key in self.done
+
+    def pending(self, keys: list) -> list:
+        return [k for k in keys if k not in self.done]
+
+    def mark(self, key: str):
+        with self.lock:
+            if key in self.done:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(f"{key}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.done.add(key)
+
+    def reset(self):
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.done = set()
@@ -0,0 +1,334 @@
+# utils/data_sources.py
+#
+# One switch for every upstream the loaders call (yfinance, Alpha Vantage,
+# Wikipedia):
+#
+#   live    call the upstream (default)
+#   record  call it and save each response to DATA_SOURCE_ARCHIVE
+#   replay  answer from the archive only, with optional injected latency
+#           and errors; nothing goes over the network
+#
+# Function calls go through call(); HTTP sessions are wrapped with
+# wrap_session():
+#
+#   get_data_source().call("yfinance.dividends", {'ticker': t}, lambda: yf.Ticker(t).dividends)
+#   self.session = get_data_source().wrap_session(requests.Session())
+#
+# Responses are keyed by source name and identity (ticker, URL and query).
+# Arguments that move with the run date (start/end windows) go in
+# `variant`, and replay serves the exact variant. Calls for a window that
+# is always "the latest days" pass replay_latest=True to fall back to the
+# newest recording, so an archive captured on one day replays on the next;
+# any other missing variant (a backfill year, say) raises ReplayMiss
+# rather than answering with another window's data. API keys are dropped
+# from recorded URLs. Each identity is one
+# gzip'd pickle under <archive>/<source>/; archives are local test
+# fixtures, so only replay archives you recorded yourself.
+
+import codecs
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timezone
+
+DATA_SOURCE_MODE = os.getenv("DATA_SOURCE_MODE", "live")
+DATA_SOURCE_ARCHIVE = os.getenv("DATA_SOURCE_ARCHIVE", ".cache/sources")
+# Replay only: seconds added to each call, or "recorded" to reuse the
+# time the live call took
+DATA_SOURCE_LATENCY = os.getenv("DATA_SOURCE_LATENCY", "0")
+DATA_SOURCE_ERROR_RATE = float(os.getenv("DATA_SOURCE_ERROR_RATE", "0"))
+DATA_SOURCE_SEED = int(os.getenv("DATA_SOURCE_SEED", "0"))
+
+MODES = ("live", "record", "replay")
+SECRET_PARAMS = ("apikey", "api_key", "token")
+
+# Matches the rate-limit markers in utils/market_data.py, so injected
+# errors take the same retry paths as real pushback
+INJECTED_MESSAGE = "429 Too Many Requests (injected)"
+
+
+class ReplayMiss(KeyError):
+    pass
+
+
+class InjectedError(Exception):
+    pass
+
+
+class RecordedError(Exception):
+    # An exception raised by the live call, re-raised on replay
+    pass
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+# -------------------
+# Archive
+# -------------------
+class SourceArchive:
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        self._entries = {}
+
+    def _path(self, source: str, identity: dict) -> str:
+        digest = hashlib.sha1(_canonical(identity).encode()).hexdigest()[:20]
+        return os.path.join(self.root, source, f"{digest}.pkl.gz")
+
+    def _read(self, path: str) -> dict:
+        if path not in self._entries:
+            if os.path.exists(path):
+                with gzip.open(path, "rb") as f:
+                    self._entries[path] = pickle.load(f)
+            else:
+                self._entries[path] = None
+        return self._entries[path]
+
+    def get(self, source: str, identity: dict, variant: dict = None, latest: bool = False) -> dict:
+        # The recorded response for `variant`; with latest, the newest one
+        # recorded when that variant never was
+        with self.lock:
+            entry = self._read(self._path(source, identity))
+        if not entry:
+            raise ReplayMiss(f"No recorded {source} response for {_canonical(identity)}")
+        variants = entry['variants']
+        exact = variants.get(_canonical(variant or {}))
+        if exact:
+            return exact
+        if not latest:
+            raise ReplayMiss(f"No recorded {source} response for {_canonical(identity)} "
+                             f"with {_canonical(variant or {})}")
+        return max(variants.values(), key=lambda v: v['recorded_at'])
+
+    def put(self, source: str, identity: dict, response: dict, variant: dict = None):
+        path = self._path(source, identity)
+        with self.lock:
+            entry = self._read(path) or {'source': source, 'identity': identity, 'variants': {}}
+            entry['variants'][_canonical(variant or {})] = response
+            self._entries[path] = entry
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path + ".tmp", "wb", compresslevel=6) as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+
+    def summary(self) -> dict:
+        # Files and bytes per source
+        sizes = {}
+        if os.path.isdir(self.root):
+            for source in sorted(os.listdir(self.root)):
+                folder = os.path.join(self.root, source)
+                files = [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".pkl.gz")]
+                sizes[source] = {'files': len(files), 'bytes': sum(os.path.getsize(f) for f in files)}
+        return sizes
+
+
+# -------------------
+# Data source
+# -------------------
+class DataSource:
+    def __init__(self, mode: str = DATA_SOURCE_MODE, archive: str = DATA_SOURCE_ARCHIVE,
+                 latency=DATA_SOURCE_LATENCY, error_rate: float = DATA_SOURCE_ERROR_RATE,
+                 seed: int = DATA_SOURCE_SEED):
+        if mode not in MODES:
+            raise ValueError(f"DATA_SOURCE_MODE must be one of {', '.join(MODES)}, not '{mode}'")
+        self.mode = mode
+        self.archive = SourceArchive(archive)
+        self.recorded_latency = latency == "recorded"
+        self.latency = 0.0 if self.recorded_latency else float(latency)
+        self.error_rate = error_rate
+        self.seed = seed
+        self.lock = threading.Lock()
+        self._attempts = {}
+        self.calls = 0
+        self.recorded = 0
+        self.injected = 0
+
+    def _inject(self, source: str, identity: dict) -> bool:
+        # Decided by hashing (seed, call, attempt number), so the same calls
+        # fail on every run regardless of thread scheduling, and a retry
+        # is a fresh draw
+        if not self.error_rate:
+            return False
+        key = f"{source}:{_canonical(identity)}"
+        with self.lock:
+            attempt = self._attempts[key] = self._attempts.get(key, 0) + 1
+        draw = int(hashlib.sha1(f"{self.seed}:{key}:{attempt}".encode()).hexdigest()[:8], 16) / 2 ** 32
+        if draw < self.error_rate:
+            with self.lock:
+                self.injected += 1
+            return True
+        return False
+
+    def _replay(self, source: str, identity: dict, variant: dict, latest: bool = False) -> dict:
+        response = self.archive.get(source, identity, variant, latest)
+        delay = response['seconds'] if self.recorded_latency else self.latency
+        if delay:
+            time.sleep(delay)
+        return response
+
+    def _record(self, source: str, identity: dict, variant: dict, value=None, error: str = None,
+                seconds: float = 0.0):
+        self.archive.put(source, identity, {
+            'value': value, 'error': error, 'seconds': seconds,
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+        }, variant)
+        with self.lock:
+            self.recorded += 1
+
+    def call(self, source: str, identity: dict, fetch, variant: dict = None, replay_latest: bool = False):
+        # fetch() performs the live call; its result must be picklable
+        with self.lock:
+            self.calls += 1
+        if self.mode == "live":
+            return fetch()
+
+        if self.mode == "replay":
+            if self._inject(source, identity):
+                raise InjectedError(INJECTED_MESSAGE)
+            response = self._replay(source, identity, variant, replay_latest)
+            if response['error']:
+                raise RecordedError(response['error'])
+            return response['value']
+
+        started = time.perf_counter()
+        try:
+            value = fetch()
+        except Exception as e:
+            self._record(source, identity, variant, error=str(e), seconds=time.perf_counter() - started)
+            raise
+        self._record(source, identity, variant, value=value, seconds=time.perf_counter() - started)
+        return value
+
+    def store(self, source: str, identity: dict, value, variant: dict = None, seconds: float = 0.0):
+        # Adds a response to the archive directly, e.g. to seed a fixture
+        self._record(source, identity, variant, value=value, seconds=seconds)
+
+    def wrap_session(self, session, source: str = "http", transient=None):
+        # transient(response), if given, flags responses (e.g. an API's
+        # HTTP 200 throttle notice) that must not replace the recording
+        return session if self.mode == "live" else SourceSession(self, session, source, transient)
+
+    def summary(self) -> str:
+        return (f"Data source ({self.mode}): {self.calls} calls, {self.recorded} recorded, "
+                f"{self.injected} injected errors")
+
+
+# -------------------
+# HTTP
+# -------------------
+class RecordedResponse:
+    # The parts of requests.Response the loaders use
+    def __init__(self, status_code: int, headers: dict, content: bytes, url: str, encoding: str = None):
+        from requests.structures import CaseInsensitiveDict
+
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+        self.encoding = encoding
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1, decode_unicode: bool = False):
+        decoder = codecs.getincrementaldecoder(self.encoding or "utf-8")(errors="replace")
+        for i in range(0, len(self.content), chunk_size):
+            chunk = self.content[i:i + chunk_size]
+            yield decoder.decode(chunk) if decode_unicode else chunk
+
+    def raise_for_status(self):
+        if not self.ok:
+            import requests
+
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SourceSession:
+    # Wraps a requests.Session: GETs are recorded or replayed by URL and
+    # query. A replayed request whose If-None-Match matches the recorded
+    # ETag gets a 304, and an injected error is a 429.
+    def __init__(self, data_source: DataSource, session, source: str = "http", transient=None):
+        self.data_source = data_source
+        self.session = session
+        self.source = source
+        self.transient = transient
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def get(self, url: str, params: dict = None, headers: dict = None, **kwargs):
+        query = {k: v for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS}
+        identity = {'url': url, 'params': query}
+        data_source = self.data_source
+
+        if data_source.mode == "replay":
+            with data_source.lock:
+                data_source.calls += 1
+            if data_source._inject(self.source, identity):
+                return RecordedResponse(429, {"Retry-After": "1"}, b"", url)
+            response = data_source._replay(self.source, identity, None)['value']
+            etag = (headers or {}).get("If-None-Match")
+            if etag and etag == response['headers'].get("ETag"):
+                return RecordedResponse(304, {"ETag": etag}, b"", url)
+            return RecordedResponse(**response)
+
+        with data_source.lock:
+            data_source.calls += 1
+        started = time.perf_counter()
+        with self.session.get(url, params=params, headers=headers, **kwargs) as live:
+            response = {'status_code': live.status_code, 'headers': dict(live.headers),
+                        'content': live.content, 'url': url, 'encoding': live.encoding}
+        # A 304 has no body and a 429/5xx or a flagged throttle notice is
+        # transient; the last good response stays the recording
+        recorded = RecordedResponse(**response)
+        if (response['status_code'] not in (304, 429) and response['status_code'] < 500
+                and not (self.transient and self.transient(recorded))):
+            data_source._record(self.source, identity, None, value=response,
+                                seconds=time.perf_counter() - started)
+        return recorded
+
+
+_data_source = None
+_data_source_lock = threading.Lock()
+
+
+def get_data_source() -> DataSource:
+    # One per process, configured from the DATA_SOURCE_* variables
+    global _data_source
+    with _data_source_lock:
+        if _data_source is None:
+            _data_source = DataSource()
+        return _data_source
+
+
+def set_data_source(data_source: DataSource) -> DataSource:
+    # Swaps the process-wide source, e.g. to record and then replay in one
+    # benchmark; returns the previous one. Clients wrap their session when
+    # created, so create them after the swap.
+    global _data_source
+    with _data_source_lock:
+        previous, _data_source = _data_source, data_source
+    return previous
@@ -0,0 +1,150 @@
+# utils/dividend_analytics.py
+#
+# Dividend metrics for every ticker in one batched pass. Inputs are long
+# frames: dividends as (ticker, date, dividend) rows, the shape of
+# DividendCache.index or of get_dividend_history() output with a ticker
+# column added, and closes as (ticker, date, price) rows from RAW_MARKETDATA.
+# Tickers are factorized once. Payments are then summed into a ticker x year
+# matrix with np.bincount, and every metric is column arithmetic on that
+# matrix, so nothing loops over tickers in Python.
+#
+#   metrics = dividend_metrics(dividends, prices, as_of="2024-06-28")
+#
+# Annual metrics (CAGR, streaks, paid/cut years, frequency) only use
+# complete calendar years before as_of. TTM covers the 365 days up to as_of.
+
+import numpy as np
+import pandas as pd
+
+# A year counts as a raise or a cut only past this relative change, so
+# rounding in restated dividends doesn't break a streak
+CHANGE_TOLERANCE = 0.005
+
+# A payment this many times the ticker's median payment is a special dividend
+SPECIAL_RATIO = 2.0
+
+# Prices older than this before as_of are ignored (ticker stopped trading)
+PRICE_LOOKBACK_DAYS = 14
+
+FREQUENCIES = np.array([1, 2, 4, 12])
+FREQUENCY_NAMES = np.array(['annual', 'semiannual', 'quarterly', 'monthly'])
+
+
+def naive_dates(dates: pd.Series) -> pd.Series:
+    # Drop the timezone but keep wall-clock dates (dividends are dated on
+    # exchange time)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    return dates.dt.tz_localize(None) if dates.dt.tz is not None else dates
+
+
+def trailing_run(flags: np.ndarray) -> np.ndarray:
+    # Length of the run of True at the end of each row
+    return np.cumprod(flags[:, ::-1], axis=1).sum(axis=1)
+
+
+class AnnualDividends:
+    # Ticker x year totals and payment counts for complete years
+    def __init__(self, tickers: pd.Index, years: np.ndarray, totals: np.ndarray, counts: np.ndarray):
+        self.tickers = tickers
+        self.years = years
+        self.totals = totals
+        self.counts = counts
+
+
+def annual_dividends(codes: np.ndarray, tickers: pd.Index, dates: pd.Series, amounts: np.ndarray,
+                     last_year: int) -> AnnualDividends:
+    years = dates.dt.year.to_numpy()
+    complete = years <= last_year
+    first_year = int(years[complete].min()) if complete.any() else last_year
+    width = last_year - first_year + 1
+    cells = codes[complete] * width + (years[complete] - first_year)
+    size = len(tickers) * width
+    totals = np.bincount(cells, weights=amounts[complete], minlength=size).reshape(len(tickers), width)
+    counts = np.bincount(cells, minlength=size).reshape(len(tickers), width)
+    return AnnualDividends(tickers, np.arange(first_year, last_year + 1), totals, counts)
+
+
+def latest_prices(prices: pd.DataFrame, as_of: pd.Timestamp) -> pd.Series:
+    dates = naive_dates(prices['date'])
+    keep = ((dates <= as_of) & (dates > as_of - pd.Timedelta(days=PRICE_LOOKBACK_DAYS))).to_numpy()
+    recent = prices[keep]
+    codes, tickers = pd.factorize(recent['ticker'], sort=True)
+    # Sort by (ticker, date); the last row of each ticker's block is its latest close
+    order = np.lexsort((dates.to_numpy()[keep], codes))
+    last = order[np.r_[codes[order][1:] != codes[order][:-1], True]] if len(order) else order
+    return pd.Series(recent['price'].to_numpy(dtype=float)[last], index=tickers[codes[last]], name='price')
+
+
+def cagr(totals: np.ndarray, years: int) -> np.ndarray:
+    # Compound growth of annual totals over the last `years` complete years;
+    # NaN without enough history or with a zero year at either end
+    if totals.shape[1] <= years:
+        return np.full(totals.shape[0], np.nan)
+    start, end = totals[:, -1 - years], totals[:, -1]
+    valid = (start > 0) & (end > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(valid, (end / np.where(valid, start, 1.0)) ** (1.0 / years) - 1.0, np.nan)
+
+
+def dividend_metrics(dividends: pd.DataFrame, prices: pd.DataFrame = None, as_of=None,
+                     cagr_years: tuple = (1, 3, 5), consistency_years: int = 5,
+                     frequency_years: int = 3) -> pd.DataFrame:
+    dates = naive_dates(dividends['date'])
+    if as_of is not None:
+        as_of = pd.Timestamp(as_of)
+    elif prices is not None and len(prices):
+        as_of = naive_dates(prices['date']).max()
+    else:
+        as_of = dates.max()
+
+    paid = (dates <= as_of).to_numpy()
+    dates = dates[paid]
+    amounts = dividends['dividend'].to_numpy(dtype=float)[paid]
+    codes, tickers = pd.factorize(dividends['ticker'].to_numpy()[paid], sort=True)
+    tickers = pd.Index(tickers, name='ticker')
+    annual = annual_dividends(codes, tickers, dates, amounts, as_of.year - 1)
+    totals, counts = annual.totals, annual.counts
+
+    window = (dates > as_of - pd.Timedelta(days=365)).to_numpy()
+    metrics = pd.DataFrame(index=tickers)
+    metrics['ttm_dividend'] = np.bincount(codes[window], weights=amounts[window], minlength=len(tickers))
+    if prices is not None:
+        metrics['price'] = latest_prices(prices, as_of).reindex(tickers)
+        metrics['yield_ttm'] = metrics['ttm_dividend'] / metrics['price'].where(metrics['price'] > 0)
+    metrics['annual_dividend'] = totals[:, -1] if totals.shape[1] else 0.0
+
+    for years in cagr_years:
+        metrics[f'cagr_{years}y'] = cagr(totals, years)
+
+    previous, following = totals[:, :-1], totals[:, 1:]
+    raises = (following > previous * (1 + CHANGE_TOLERANCE)) & (previous > 0)
+    cuts = following < previous * (1 - CHANGE_TOLERANCE)
+    recent = min(consistency_years, totals.shape[1])
+    metrics['growth_streak'] = trailing_run(raises) if raises.shape[1] else 0
+    metrics['paid_years'] = (totals[:, -recent:] > 0).sum(axis=1) if recent else 0
+    metrics['cut_years'] = cuts[:, -(recent - 1):].sum(axis=1) if recent > 1 else 0
+
+    # Frequency: typical payments per year over the last few complete
+    # years, snapped to the nearest standard schedule. Irregular when a
+    # paying year is off the typical count by more than a quarter (one
+    # payment slipping across New Year is tolerated) or a special dividend
+    # was paid since the window started.
+    recent_counts = counts[:, -min(frequency_years, counts.shape[1]):]
+    paying = recent_counts > 0
+    has_history = paying.any(axis=1)
+    with np.errstate(all='ignore'):
+        typical = np.where(has_history, np.nanmedian(np.where(paying, recent_counts, np.nan), axis=1), 0.0)
+    nearest = np.abs(np.log(np.maximum(typical, 0.5))[:, None] - np.log(FREQUENCIES)[None, :]).argmin(axis=1)
+    metrics['payments_per_year'] = typical
+    metrics['frequency'] = np.where(has_history, FREQUENCY_NAMES[nearest], 'none')
+
+    in_window = (dates.dt.year.to_numpy() > as_of.year - 1 - frequency_years)
+    median_payment = pd.Series(amounts[in_window]).groupby(codes[in_window]).transform('median').to_numpy()
+    special = amounts[in_window] > SPECIAL_RATIO * median_payment
+    metrics['special_dividends'] = np.bincount(codes[in_window][special], minlength=len(tickers))
+    uneven = (paying & (np.abs(recent_counts - typical[:, None]) > np.ceil(0.25 * typical)[:, None])).any(axis=1)
+    metrics['irregular'] = (has_history & uneven) | (metrics['special_dividends'].to_numpy() > 0)
+
+    metrics.attrs['as_of'] = as_of
+    return metrics
@@ -0,0 +1,181 @@
+# utils/landing_format.py
+#
+# How files land in S3. Each dataset declares its Arrow schema here once;
+# frames are checked against it (columns, types, NULLs in required fields)
+# before they are written.
+#
+#   body, size = serialize(df, "dividends")
+#   key = f"dividends/{ticker}_dividends_{day}{landing_extension()}"
+#
+# The default is CSV with the columns, in order, that the loaders have
+# always written, now gzipped under a .csv.gz key; the stage definitions
+# live outside this repo, so check that their file format and PATTERN take
+# gzip (COMPRESSION = AUTO does). LANDING_FORMAT=parquet writes zstd
+# Parquet, so dates, floats and NULL scores reach the stage typed instead
+# of as CSV text; switch it once the stages' COPY file format is Parquet.
+
+import gzip
+import os
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+LANDING_FORMAT = os.getenv("LANDING_FORMAT", "csv")
+PARQUET_COMPRESSION = "zstd"
+
+EXTENSIONS = {"parquet": ".parquet", "csv": ".csv.gz"}
+
+
+class LandingSchemaError(ValueError):
+    pass
+
+
+class LandingSchema:
+    def __init__(self, name: str, fields: list):
+        self.name = name
+        self.schema = pa.schema(fields)
+
+    def conform(self, df: pd.DataFrame) -> pa.Table:
+        # Raises LandingSchemaError instead of letting a bad frame land
+        names = self.schema.names
+        missing = [n for n in names if n not in df.columns]
+        extra = [c for c in df.columns if c not in names]
+        if missing or extra:
+            raise LandingSchemaError(f"{self.name}: missing columns {missing}, unexpected columns {extra}")
+
+        arrays = []
+        for field in self.schema:
+            try:
+                arrays.append(pa.array(_prepare(df[field.name], field.type), type=field.type, from_pandas=True))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError, TypeError) as e:
+                raise LandingSchemaError(f"{self.name}.{field.name}: cannot store as {field.type}: {e}") from e
+            if not field.nullable and arrays[-1].null_count:
+                raise LandingSchemaError(f"{self.name}.{field.name}: {arrays[-1].null_count} NULLs in a required field")
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def describe(self) -> list:
+        return [{'name': f.name, 'type': str(f.type), 'nullable': f.nullable} for f in self.schema]
+
+
+def _prepare(col: pd.Series, arrow_type) -> pd.Series:
+    # Date fields take calendar dates in the frame's own timezone (yfinance
+    # dates dividends on exchange time); NTZ timestamps are stored as UTC
+    if pa.types.is_date(arrow_type):
+        if not pd.api.types.is_datetime64_any_dtype(col):
+            col = pd.to_datetime(col)
+        if col.dt.tz is not None:
+            col = col.dt.tz_localize(None)
+        # datetime64[D] converts to date32 without building date objects
+        return col.to_numpy().astype('datetime64[D]')
+    if pa.types.is_timestamp(arrow_type) and arrow_type.tz is None:
+        if not pd.api.types.is_datetime64_any_dtype(col):
+            col = pd.to_datetime(col)
+        if col.dt.tz is not None:
+            col = col.dt.tz_convert('UTC').dt.tz_localize(None)
+    return col
+
+
+# -------------------
+# Registry
+# -------------------
+LANDING_SCHEMAS = {s.name: s for s in [
+    # get_dividend_history() output plus ticker
+    LandingSchema("dividends", [
+        pa.field('date', pa.date32(), nullable=False),
+        pa.field('dividend', pa.float64(), nullable=False),
+        pa.field('ticker', pa.string(), nullable=False),
+    ]),
+    # RAW_MARKETDATA rows as built by the market-data loaders
+    LandingSchema("marketdata", [
+        pa.field('TICKER', pa.string(), nullable=False),
+        pa.field('DATE', pa.date32(), nullable=False),
+        pa.field('OPEN', pa.float64()),
+        pa.field('HIGH', pa.float64()),
+        pa.field('LOW', pa.float64()),
+        pa.field('PRICE', pa.float64()),
+        pa.field('VOLUME', pa.int64()),
+        pa.field('SECTOR', pa.string()),
+        pa.field('INDUSTRY', pa.string()),
+        pa.field('LAST_UPDATED', pa.timestamp('us')),
+    ]),
+    # Alpha Vantage NEWS_SENTIMENT feed items; relevance is NULL when the
+    # ticker is missing from an article's ticker_sentiment list
+    LandingSchema("sentiment", [
+        pa.field('ticker', pa.string(), nullable=False),
+        pa.field('title', pa.string()),
+        pa.field('source', pa.string()),
+        pa.field('time_published', pa.string()),
+        pa.field('sentiment_date', pa.date32()),
+        pa.field('overall_sentiment_score', pa.float64()),
+        pa.field('overall_sentiment_label', pa.string()),
+        pa.field('relevance_score', pa.float64()),
+    ]),
+]}
+
+
+def get_schema(dataset: str) -> LandingSchema:
+    try:
+        return LANDING_SCHEMAS[dataset]
+    except KeyError:
+        raise LandingSchemaError(f"No landing schema registered for '{dataset}'") from None
+
+
+def landing_extension(fmt: str = None) -> str:
+    return EXTENSIONS[fmt or LANDING_FORMAT]
+
+
+# -------------------
+# Writers
+# -------------------
+def serialize(df: pd.DataFrame, dataset: str, fmt: str = None) -> tuple:
+    # Returns (BytesIO positioned at 0, size in bytes)
+    fmt = fmt or LANDING_FORMAT
+    table = get_schema(dataset).conform(df)
+    buffer = BytesIO()
+    if fmt == "parquet":
+        pq.write_table(table, buffer, compression=PARQUET_COMPRESSION)
+    elif fmt == "csv":
+        table.to_pandas().to_csv(buffer, index=False, compression={'method': 'gzip', 'mtime': 0})
+    else:
+        raise ValueError(f"Unknown landing format '{fmt}'")
+    size = buffer.tell()
+    buffer.seek(0)
+    return buffer, size
+
+
+class LandingSpool:
+    # Appends typed batches to an open binary file as one landing file,
+    # e.g. as a BatchWriter on_batch callback. close() finishes the file
+    # (the Parquet footer) but leaves the file object open for upload.
+    def __init__(self, fileobj, dataset: str, fmt: str = None):
+        self.fileobj = fileobj
+        self.schema = get_schema(dataset)
+        self.fmt = fmt or LANDING_FORMAT
+        self.rows = 0
+        self._writer = None
+
+    def write(self, batch):
+        if isinstance(batch, pd.DataFrame):
+            table = self.schema.conform(batch)
+        else:
+            table = pa.Table.from_batches([batch]) if isinstance(batch, pa.RecordBatch) else batch
+            if not table.schema.equals(self.schema.schema, check_metadata=False):
+                table = self.schema.conform(table.to_pandas())
+
+        if self._writer is None:
+            if self.fmt == "parquet":
+                self._writer = pq.ParquetWriter(self.fileobj, self.schema.schema, compression=PARQUET_COMPRESSION)
+            else:
+                self._writer = gzip.GzipFile(fileobj=self.fileobj, mode="wb", mtime=0)
+        if self.fmt == "parquet":
+            self._writer.write_table(table)
+        else:
+            table.to_pandas().to_csv(self._writer, header=self.rows == 0, index=False)
+        self.rows += table.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
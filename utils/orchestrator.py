@@ -0,0 +1,229 @@
+# utils/orchestrator.py
+#
+# Runs several pipelines concurrently on one event loop. A pipeline is a
+# source (a function returning its work items) followed by stages; items
+# flow between stages through bounded queues, so a slow load stage pushes
+# back on its fetch stage instead of letting results pile up in memory.
+#
+#   dividends = Pipeline("dividend", lambda: tickers, [
+#       Stage("fetch", refresh, concurrency=8),
+#       Stage("load", land, finish=write_partition),
+#   ])
+#   stats = run_pipelines([dividends, market], prepare=resolve_universe)
+#   print(stats.summary())
+#
+# Stage functions are ordinary blocking code (yfinance, Snowflake, S3) and
+# run on a shared thread pool; `concurrency` is the number of items a stage
+# works on at once.
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+class Stage:
+    # fn(item) returns the item handed to the next stage, or None to drop
+    # it. finish(), if given, runs once after the stage has drained and its
+    # return value (if not None) is passed on like any other item.
+    def __init__(self, name: str, fn, concurrency: int = 1, finish=None):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.finish = finish
+        self.items = 0
+        self.records = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+
+    def wall(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+class Pipeline:
+    def __init__(self, name: str, source, stages: list, queue_size: int = 4):
+        self.name = name
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    def wall(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+def count_records(item) -> int:
+    # DataFrames, lists and Arrow batches count their rows, anything else 1.
+    # Stages pass (key, rows) or (key, ..., rows) tuples on; the rows are last.
+    if isinstance(item, tuple):
+        return count_records(item[-1]) if item else 0
+    if hasattr(item, "num_rows"):
+        return item.num_rows
+    if hasattr(item, "__len__") and not isinstance(item, (str, bytes, dict)):
+        return len(item)
+    return 1
+
+
+class RunStats:
+    def __init__(self, pipelines: list, prepare_seconds: float, started: float, finished: float):
+        self.pipelines = pipelines
+        self.prepare_seconds = prepare_seconds
+        self.started = started
+        self.finished = finished
+
+    def wall(self) -> float:
+        return self.finished - self.started
+
+    def critical_path(self):
+        # The run ends when its slowest pipeline ends; within that pipeline
+        # the bottleneck is the stage with the most busy time per worker.
+        finished = [p for p in self.pipelines if p.finished is not None]
+        if not finished:
+            return None, None
+        slowest = max(finished, key=lambda p: p.finished)
+        bottleneck = max(slowest.stages, key=lambda s: s.busy / s.concurrency, default=None)
+        return slowest, bottleneck
+
+    def as_dict(self) -> dict:
+        slowest, bottleneck = self.critical_path()
+        return {
+            'wall': self.wall(),
+            'prepare': self.prepare_seconds,
+            'critical_pipeline': slowest.name if slowest else None,
+            'bottleneck_stage': f"{slowest.name}/{bottleneck.name}" if bottleneck else None,
+            'pipelines': {
+                p.name: {
+                    'wall': p.wall(),
+                    'error': str(p.error) if p.error else None,
+                    'stages': {
+                        s.name: {'items': s.items, 'records': s.records, 'errors': s.errors,
+                                 'busy': s.busy, 'wall': s.wall(), 'concurrency': s.concurrency}
+                        for s in p.stages
+                    },
+                }
+                for p in self.pipelines
+            },
+        }
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<24} {'workers':>7} {'items':>7} {'records':>9} {'errors':>6} "
+                 f"{'busy(s)':>8} {'wall(s)':>8}"]
+        for p in self.pipelines:
+            status = f"failed: {p.error}" if p.error else f"{p.wall():.1f}s"
+            lines.append(f"{p.name} ({status})")
+            for s in p.stages:
+                lines.append(f"  {s.name:<22} {s.concurrency:>7} {s.items:>7} {s.records:>9} "
+                             f"{s.errors:>6} {s.busy:>8.1f} {s.wall():>8.1f}")
+
+        slowest, bottleneck = self.critical_path()
+        lines.append(f"Wall clock: {self.wall():.1f}s")
+        if slowest:
+            path = f"prepare {self.prepare_seconds:.1f}s -> {slowest.name} {slowest.wall():.1f}s"
+            if bottleneck:
+                path += (f" (bottleneck {bottleneck.name}: {bottleneck.busy:.1f}s busy "
+                         f"over {bottleneck.concurrency} workers)")
+            lines.append(f"Critical path: {path}")
+        return "\n".join(lines)
+
+
+# -------------------
+# Event loop
+# -------------------
+async def _run_stage(pipeline: Pipeline, index: int, inbox: asyncio.Queue, outbox, executor):
+    stage = pipeline.stages[index]
+    loop = asyncio.get_running_loop()
+
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            if stage.started is None:
+                stage.started = time.perf_counter()
+            start = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(executor, stage.fn, item)
+            except Exception as e:
+                stage.errors += 1
+                print(f"[{pipeline.name}/{stage.name}] {e}")
+                continue
+            finally:
+                stage.busy += time.perf_counter() - start
+            stage.items += 1
+            if result is None:
+                continue
+            stage.records += count_records(result)
+            if outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(stage.concurrency)))
+
+    if stage.finish is not None:
+        start = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(executor, stage.finish)
+        except Exception as e:
+            stage.errors += 1
+            print(f"[{pipeline.name}/{stage.name}] finish: {e}")
+            result = None
+        stage.busy += time.perf_counter() - start
+        if result is not None and outbox is not None:
+            await outbox.put(result)
+    stage.finished = time.perf_counter()
+
+    if outbox is not None:
+        for _ in range(pipeline.stages[index + 1].concurrency):
+            await outbox.put(_DONE)
+
+
+async def _run_pipeline(pipeline: Pipeline, executor):
+    loop = asyncio.get_running_loop()
+    pipeline.started = time.perf_counter()
+    queues = [asyncio.Queue(maxsize=pipeline.queue_size) for _ in pipeline.stages]
+    stages = [
+        asyncio.create_task(_run_stage(pipeline, i, queues[i], queues[i + 1] if i + 1 < len(queues) else None,
+                                       executor))
+        for i in range(len(pipeline.stages))
+    ]
+
+    try:
+        items = await loop.run_in_executor(executor, lambda: list(pipeline.source()))
+    except Exception as e:
+        pipeline.error = e
+        print(f"[{pipeline.name}] source failed: {e}")
+        items = []
+
+    if pipeline.stages:
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(pipeline.stages[0].concurrency):
+            await queues[0].put(_DONE)
+    await asyncio.gather(*stages)
+    pipeline.finished = time.perf_counter()
+
+
+async def run_pipelines_async(pipelines: list, prepare=None, max_threads: int = None) -> RunStats:
+    # prepare(), if given, runs once before any pipeline starts (e.g. to
+    # resolve the ticker universe every pipeline reads)
+    started = time.perf_counter()
+    threads = max_threads or sum(s.concurrency for p in pipelines for s in p.stages) + len(pipelines)
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ingest") as executor:
+        if prepare is not None:
+            await loop.run_in_executor(executor, prepare)
+        prepared = time.perf_counter()
+        await asyncio.gather(*(_run_pipeline(p, executor) for p in pipelines))
+    return RunStats(pipelines, prepared - started, started, time.perf_counter())
+
+
+def run_pipelines(pipelines: list, prepare=None, max_threads: int = None) -> RunStats:
+    return asyncio.run(run_pipelines_async(pipelines, prepare=prepare, max_threads=max_threads))
@@ -0,0 +1,152 @@
+# utils/run_log.py
+#
+# Append-only run log on S3. Every run writes its own small JSONL object
+#
+#   <prefix>dt=YYYY-MM-DD/run-<run_id>.jsonl
+#
+# so nothing is ever read back or rewritten on the write path and concurrent
+# runs cannot overwrite each other. `compact` folds a day's run objects into
+# one gzip file; `query` reads only the day partitions inside the requested
+# range. The `query` command lists the tickers logged with no dividend on
+# every session in the range.
+#
+#   python -m utils.run_log compact --bucket my-bucket --start 2024-01-01 --end 2024-01-31
+#   python -m utils.run_log query   --bucket my-bucket --start 2024-01-01 --end 2024-01-31
+
+import argparse
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.trading_calendar import get_calendar
+
+NO_DIVIDEND_PREFIX = "logs/no_dividend/"
+
+
+def new_run_id() -> str:
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def day_prefix(prefix: str, day) -> str:
+    return f"{prefix}dt={pd.Timestamp(day).strftime('%Y-%m-%d')}/"
+
+
+def write_run_log(s3, bucket: str, prefix: str, records: list, run_id: str = None):
+    # records: dicts carrying at least 'as_of' (the date they describe)
+    if not records:
+        return []
+    run_id = run_id or new_run_id()
+    logged_at = datetime.now(timezone.utc).isoformat()
+
+    keys = []
+    by_day = {}
+    for record in records:
+        by_day.setdefault(pd.Timestamp(record['as_of']).strftime('%Y-%m-%d'), []).append(record)
+    for day, day_records in sorted(by_day.items()):
+        body = "\n".join(
+            json.dumps({**r, 'run_id': run_id, 'logged_at': logged_at}, default=str) for r in day_records
+        )
+        key = f"{day_prefix(prefix, day)}run-{run_id}.jsonl"
+        s3.put_object(Bucket=bucket, Key=key, Body=body.encode())
+        keys.append(key)
+    print(f"Wrote {len(records)} log entries to s3://{bucket}/{prefix} (run {run_id})")
+    return keys
+
+
+def _list_keys(s3, bucket: str, prefix: str) -> list:
+    keys = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        keys.extend(obj['Key'] for obj in page.get('Contents', []))
+    return keys
+
+
+def _read_records(s3, bucket: str, key: str) -> list:
+    body = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+    if key.endswith(".gz"):
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+
+
+def _days(start, end) -> list:
+    return pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+
+
+def compact(s3, bucket: str, prefix: str, start, end) -> int:
+    # Rewrites each day holding more than one object as a single
+    # compacted-<id>.jsonl.gz, then deletes only the objects it read, so
+    # runs landing mid-compaction are kept.
+    compacted_days = 0
+    for day in _days(start, end):
+        keys = _list_keys(s3, bucket, day_prefix(prefix, day))
+        if len(keys) < 2:
+            continue
+        records = [r for key in keys for r in _read_records(s3, bucket, key)]
+        body = "\n".join(json.dumps(r, default=str) for r in records).encode()
+        target = f"{day_prefix(prefix, day)}compacted-{uuid.uuid4().hex[:8]}.jsonl.gz"
+        s3.put_object(Bucket=bucket, Key=target, Body=gzip.compress(body, mtime=0))
+        for i in range(0, len(keys), 1000):
+            s3.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': k} for k in keys[i:i + 1000]]})
+        print(f"Compacted {len(keys)} objects ({len(records)} entries) into {target}")
+        compacted_days += 1
+    return compacted_days
+
+
+def query(s3, bucket: str, prefix: str, start, end) -> pd.DataFrame:
+    records = []
+    for day in _days(start, end):
+        for key in _list_keys(s3, bucket, day_prefix(prefix, day)):
+            records.extend(_read_records(s3, bucket, key))
+    if not records:
+        return pd.DataFrame(columns=['as_of', 'ticker', 'run_id', 'logged_at'])
+    return pd.DataFrame.from_records(records)
+
+
+def tickers_without_dividend(s3, bucket: str, start, end, prefix: str = NO_DIVIDEND_PREFIX) -> list:
+    # Only tickers logged as paying nothing on every NYSE session in the
+    # range; a session without an entry means the ticker paid that day (or
+    # was not checked), so it does not qualify
+    sessions = get_calendar().sessions_between(start, end)
+    df = query(s3, bucket, prefix, start, end)
+    if df.empty or not len(sessions):
+        return []
+    if 'event' in df:
+        df = df[df['event'] == 'no_dividend']
+    days = pd.to_datetime(df['as_of']).values.astype('datetime64[D]')
+    logged = df.assign(as_of=days)[np.isin(days, sessions)].drop_duplicates(['ticker', 'as_of'])
+    counts = logged.groupby('ticker').size()
+    return sorted(counts.index[counts == len(sessions)].tolist())
+
+
+def main():
+    import boto3
+
+    parser = argparse.ArgumentParser(description="Compact or query the S3 run log.")
+    parser.add_argument("command", choices=["compact", "query"])
+    parser.add_argument("--bucket", default=os.getenv("S3_BUCKET"))
+    parser.add_argument("--prefix", default=NO_DIVIDEND_PREFIX)
+    parser.add_argument("--start", required=True)
+    parser.add_argument("--end", required=True)
+    args = parser.parse_args()
+
+    s3 = boto3.client(
+        's3',
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_KEY"),
+        region_name=os.getenv("AWS_REGION")
+    )
+    if args.command == "compact":
+        days = compact(s3, args.bucket, args.prefix, args.start, args.end)
+        print(f"Compacted {days} day partitions.")
+    else:
+        for ticker in tickers_without_dividend(s3, args.bucket, args.start, args.end, args.prefix):
+            print(ticker)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# utils/s3_landing.py
+
+import json
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import pandas as pd
+
+from utils.landing_format import LANDING_FORMAT, get_schema, landing_extension, serialize
+
+MANIFEST_NAME = "_manifest.json"
+# Manifests live under their own top-level prefix, so a stage reading the
+# data prefix never sees them
+MANIFEST_PREFIX = "_manifests/"
+
+MULTIPART_BYTES = 8 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def upload_config():
+    # Multipart kicks in above 8 MB so large partitions upload in parallel parts
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(multipart_threshold=MULTIPART_BYTES, multipart_chunksize=MULTIPART_BYTES)
+
+
+def file_exists_in_s3(s3, bucket, key):
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except s3.exceptions.ClientError as e:
+        if e.response['Error']['Code'] == '404':
+            return False
+        else:
+            raise
+
+
+def partition_prefix(prefix: str, run_date: str) -> str:
+    return f"{prefix}dt={run_date}/"
+
+
+def write_partition(s3, bucket: str, prefix: str, name: str, df: pd.DataFrame, run_date: str,
+                    ticker_column: str = 'ticker', dataset: str = None, fmt: str = None):
+    # Writes all of a run's rows as one landing file (gzip CSV unless
+    # LANDING_FORMAT=parquet) under <prefix>dt=<run_date>/ and then a
+    # _manifest.json describing it under _manifests/<prefix>dt=<run_date>/.
+    # The manifest is the commit marker: if it exists the partition is
+    # complete and the call is a no-op. `dataset` names the registered
+    # landing schema and defaults to `name`.
+    fmt = fmt or LANDING_FORMAT
+    dataset = dataset or name
+    part_prefix = partition_prefix(prefix, run_date)
+    key = f"{part_prefix}{name}_{run_date}{landing_extension(fmt)}"
+    manifest_key = MANIFEST_PREFIX + part_prefix + MANIFEST_NAME
+
+    if file_exists_in_s3(s3, bucket, manifest_key):
+        print(f"{manifest_key} already exists in S3. Skipping upload.")
+        return None
+
+    data_buffer, size = serialize(df, dataset, fmt)
+    s3.upload_fileobj(data_buffer, bucket, key, Config=upload_config())
+
+    manifest = {
+        'key': key,
+        'format': fmt,
+        'schema': get_schema(dataset).describe(),
+        'rows': len(df),
+        'bytes': size,
+        'tickers': sorted(df[ticker_column].unique().tolist()) if ticker_column in df else [],
+        'written_at': datetime.now(timezone.utc).isoformat(),
+    }
+    s3.put_object(Bucket=bucket, Key=manifest_key, Body=json.dumps(manifest).encode())
+    print(f"Uploaded {key} ({len(df)} rows, {size:,} bytes) to S3.")
+    return key
@@ -0,0 +1,108 @@
+# utils/snowflake_bulk.py
+
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+# Rows bound into a single multi-row INSERT. The connector rewrites
+# executemany() into one statement per call, so this bounds statement size.
+DEFAULT_CHUNK_SIZE = 16384
+
+
+def frame_to_rows(df: pd.DataFrame, columns: list) -> list:
+    # NaN/NaT -> None so the connector binds SQL NULLs
+    values = df[columns].astype(object).where(df[columns].notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def bulk_insert(cursor, table: str, df: pd.DataFrame, columns: list = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    if df.empty:
+        return 0
+
+    columns = columns or list(df.columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    inserted = 0
+    for start in range(0, len(df), chunk_size):
+        rows = frame_to_rows(df.iloc[start:start + chunk_size], columns)
+        cursor.executemany(sql, rows)
+        inserted += len(rows)
+    return inserted
+
+
+# -------------------
+# Streaming writer
+# -------------------
+def coerce_frame(df: pd.DataFrame, schema: pa.Schema) -> pa.RecordBatch:
+    # Vectorized cast of loosely-typed API records onto the declared schema
+    out = {}
+    for field in schema:
+        col = df[field.name] if field.name in df else pd.Series([None] * len(df), dtype=object)
+        if pa.types.is_floating(field.type) or pa.types.is_integer(field.type):
+            col = pd.to_numeric(col, errors='coerce')
+        elif pa.types.is_date(field.type):
+            col = pd.to_datetime(col, errors='coerce').dt.date
+        elif pa.types.is_timestamp(field.type):
+            col = pd.to_datetime(col, errors='coerce')
+        out[field.name] = col
+    return pa.RecordBatch.from_pandas(pd.DataFrame(out), schema=schema, preserve_index=False)
+
+
+def batch_to_rows(batch: pa.RecordBatch, columns: list) -> list:
+    return list(zip(*(batch.column(name).to_pylist() for name in columns)))
+
+
+class BatchWriter:
+    # Buffers records up to chunk_size, then loads each chunk as one typed
+    # Arrow batch with a single executemany. Memory is bounded by chunk_size
+    # regardless of how many records are written.
+    def __init__(self, cursor, table: str, schema: pa.Schema, columns: list = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, on_batch=None):
+        self.cursor = cursor
+        self.table = table
+        self.schema = schema
+        self.columns = columns or schema.names
+        self.chunk_size = chunk_size
+        self.on_batch = on_batch
+
+        placeholders = ", ".join(["%s"] * len(self.columns))
+        self.sql = f"INSERT INTO {table} ({', '.join(self.columns)}) VALUES ({placeholders})"
+
+        self.rows = 0
+        self.bytes = 0
+        self.batches = 0
+        self._buffer = []
+        self._started = None
+
+    def write(self, records: list):
+        if self._started is None:
+            self._started = time.perf_counter()
+        self._buffer.extend(records)
+        while len(self._buffer) >= self.chunk_size:
+            chunk, self._buffer = self._buffer[:self.chunk_size], self._buffer[self.chunk_size:]
+            self._flush(chunk)
+
+    def _flush(self, records: list):
+        batch = coerce_frame(pd.DataFrame.from_records(records), self.schema)
+        self.cursor.executemany(self.sql, batch_to_rows(batch, self.columns))
+        if self.on_batch:
+            self.on_batch(batch)
+        self.rows += batch.num_rows
+        self.bytes += batch.nbytes
+        self.batches += 1
+
+    def close(self) -> dict:
+        if self._buffer:
+            self._flush(self._buffer)
+            self._buffer = []
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            'rows': self.rows,
+            'batches': self.batches,
+            'bytes': self.bytes,
+            'elapsed': elapsed,
+            'rows_per_sec': self.rows / elapsed if elapsed else 0.0,
+        }
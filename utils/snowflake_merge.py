@@ -0,0 +1,166 @@
+# utils/snowflake_merge.py
+#
+# Idempotent loads through a Snowpark session. StagedMerge buffers frames,
+# lands them in a session-scoped temporary table and folds the whole run
+# into the target with one MERGE on the key columns:
+#
+#   load = StagedMerge(session, "RAW_MARKETDATA", keys=['TICKER', 'DATE'], order_by='LAST_UPDATED')
+#   for df in batches:
+#       load.write(df)
+#   stats = load.close()   # {'inserted': .., 'updated': .., 'merged': .., ...}
+#
+# Nothing touches the target until close(), so a run that fails midway
+# leaves it as it was, and re-running a day only rewrites rows whose values
+# changed. AppendLoad keeps the old truncate-and-append behaviour behind
+# the same write/close interface.
+
+import time
+import uuid
+
+import pandas as pd
+
+# Rows buffered in memory before they are written to the staging table
+DEFAULT_STAGE_ROWS = 100_000
+
+
+def merge_sql(target: str, staging: str, keys: list, columns: list, compare: list = None,
+              order_by: str = None, touch_column: str = None) -> str:
+    # compare: columns whose change triggers an UPDATE (default: all non-key
+    # columns). touch_column is set to CURRENT_TIMESTAMP on insert and update
+    # so downstream incremental models can pick up changed rows.
+    values = [c for c in columns if c not in keys]
+    compare = compare if compare is not None else values
+
+    source = f"SELECT {', '.join(columns)} FROM {staging}"
+    if order_by:
+        # Last write wins when a key was staged more than once
+        source += (f" QUALIFY ROW_NUMBER() OVER (PARTITION BY {', '.join(keys)} "
+                   f"ORDER BY {order_by} DESC) = 1")
+
+    on = " AND ".join(f"t.{k} = s.{k}" for k in keys)
+    changed = " OR ".join(f"t.{c} IS DISTINCT FROM s.{c}" for c in compare) or "FALSE"
+    updates = [f"{c} = s.{c}" for c in values]
+    insert_columns = list(columns)
+    insert_values = [f"s.{c}" for c in columns]
+    if touch_column:
+        updates.append(f"{touch_column} = CURRENT_TIMESTAMP")
+        insert_columns.append(touch_column)
+        insert_values.append("CURRENT_TIMESTAMP")
+
+    return (
+        f"MERGE INTO {target} t USING ({source}) s ON {on} "
+        f"WHEN MATCHED AND ({changed}) THEN UPDATE SET {', '.join(updates)} "
+        f"WHEN NOT MATCHED THEN INSERT ({', '.join(insert_columns)}) VALUES ({', '.join(insert_values)})"
+    )
+
+
+def _row_dict(row) -> dict:
+    return row.as_dict() if hasattr(row, "as_dict") else dict(row)
+
+
+def merge_counts(rows: list) -> dict:
+    # Snowflake reports "number of rows inserted" / "number of rows updated";
+    # engines that only return a total count fill in 'merged' alone
+    counts = {'inserted': 0, 'updated': 0, 'merged': 0}
+    for name, value in (_row_dict(rows[0]).items() if rows else []):
+        name = name.lower()
+        if "inserted" in name:
+            counts['inserted'] = int(value)
+        elif "updated" in name:
+            counts['updated'] = int(value)
+        elif "count" in name:
+            counts['merged'] = int(value)
+    counts['merged'] = max(counts['merged'], counts['inserted'] + counts['updated'])
+    return counts
+
+
+class StagedMerge:
+    def __init__(self, session, target: str, keys: list, columns: list = None, compare: list = None,
+                 order_by: str = None, touch_column: str = 'INSERTED_DATE',
+                 stage_rows: int = DEFAULT_STAGE_ROWS):
+        self.session = session
+        self.target = target
+        self.keys = keys
+        self.columns = columns
+        self.compare = compare
+        self.order_by = order_by
+        self.touch_column = touch_column
+        self.stage_rows = stage_rows
+        self.staging = f"{target.split('.')[-1]}_STAGE_{uuid.uuid4().hex[:8]}".upper()
+
+        self.rows = 0
+        self.stage_writes = 0
+        self._buffer = []
+        self._buffered = 0
+        self._created = False
+        self._started = None
+
+    def _create_staging(self):
+        self.session.sql(
+            f"CREATE OR REPLACE TEMPORARY TABLE {self.staging} AS "
+            f"SELECT {', '.join(self.columns)} FROM {self.target} LIMIT 0"
+        ).collect()
+        self._created = True
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if self._started is None:
+            self._started = time.perf_counter()
+        if self.columns is None:
+            self.columns = list(df.columns)
+        self._buffer.append(df[self.columns])
+        self._buffered += len(df)
+        if self._buffered >= self.stage_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if not self._created:
+            self._create_staging()
+        df = pd.concat(self._buffer, ignore_index=True)
+        self.session.write_pandas(df, self.staging, auto_create_table=False, overwrite=False,
+                                  use_logical_type=True)
+        self.rows += len(df)
+        self.stage_writes += 1
+        self._buffer, self._buffered = [], 0
+
+    def close(self) -> dict:
+        self._flush()
+        counts = {'inserted': 0, 'updated': 0, 'merged': 0}
+        if self._created:
+            sql = merge_sql(self.target, self.staging, self.keys, self.columns, self.compare,
+                            self.order_by, self.touch_column)
+            counts = merge_counts(self.session.sql(sql).collect())
+            self.session.sql(f"DROP TABLE IF EXISTS {self.staging}").collect()
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {'rows': self.rows, 'stage_writes': self.stage_writes, **counts, 'elapsed': elapsed}
+
+
+class AppendLoad:
+    # TRUNCATE once, then write_pandas each frame straight into the target
+    def __init__(self, session, target: str, truncate: bool = True):
+        self.session = session
+        self.target = target
+        self.truncate = truncate
+        self.rows = 0
+        self.stage_writes = 0
+        self._started = None
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if self._started is None:
+            self._started = time.perf_counter()
+            if self.truncate:
+                print(f"Truncating existing data in {self.target}...")
+                self.session.sql(f"TRUNCATE TABLE {self.target}").collect()
+        self.session.write_pandas(df, self.target, overwrite=False, use_logical_type=True)
+        self.rows += len(df)
+        self.stage_writes += 1
+
+    def close(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {'rows': self.rows, 'stage_writes': self.stage_writes, 'inserted': self.rows,
+                'updated': 0, 'merged': self.rows, 'elapsed': elapsed}
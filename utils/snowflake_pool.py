@@ -0,0 +1,157 @@
+# utils/snowflake_pool.py
+#
+# One place to get Snowflake connections from. Loaders register a named
+# profile (a function returning connect() parameters) and then borrow
+# connections by name:
+#
+#   pool = get_pool()
+#   pool.register("dividend", get_connection_parameters)
+#   with pool.cursor("dividend") as cs:
+#       cs.execute(TICKER_QUERY)
+#
+# Connections are returned to the pool after use and reused by the next
+# borrower with the same profile, so reading tickers and bulk-writing
+# results share one authenticated session. Private keys are parsed once per
+# path per process.
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.connections_discarded = 0
+        self.auth_seconds = 0.0
+        self.key_loads = 0
+        self.key_load_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def summary(self) -> str:
+        return (f"Snowflake pool: {self.connections_opened} opened, {self.connections_reused} reused, "
+                f"{self.auth_seconds:.2f}s authenticating, {self.key_loads} key loads "
+                f"({self.key_load_seconds:.3f}s)")
+
+
+metrics = PoolMetrics()
+
+
+@lru_cache(maxsize=None)
+def load_private_key(path: str, password: bytes = None):
+    from cryptography.hazmat.primitives import serialization
+
+    start = time.perf_counter()
+    with open(path, "rb") as key_file:
+        key = serialization.load_pem_private_key(key_file.read(), password=password)
+    metrics.key_loads += 1
+    metrics.key_load_seconds += time.perf_counter() - start
+    return key
+
+
+class SnowflakeConnectionPool:
+    def __init__(self, max_idle: int = 4, keep_alive: bool = True, connect=None):
+        self.max_idle = max_idle
+        self.keep_alive = keep_alive
+        self._connect = connect
+        self.profiles = {}
+        self.idle = {}
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.metrics = metrics
+
+    def register(self, key: str, params_factory):
+        # params_factory is called once per new physical connection
+        with self.lock:
+            self.profiles[key] = params_factory
+            self.idle.setdefault(key, [])
+
+    def _open(self, key: str):
+        if self._connect is None:
+            import snowflake.connector
+            self._connect = snowflake.connector.connect
+
+        params = dict(self.profiles[key]())
+        if self.keep_alive:
+            params.setdefault("client_session_keep_alive", True)
+        start = time.perf_counter()
+        conn = self._connect(**params)
+        self.metrics.auth_seconds += time.perf_counter() - start
+        self.metrics.connections_opened += 1
+        return conn
+
+    def acquire(self, key: str):
+        if key not in self.profiles:
+            raise KeyError(f"No Snowflake profile registered for '{key}'")
+        while True:
+            with self.lock:
+                conn = self.idle[key].pop() if self.idle[key] else None
+            if conn is None:
+                return self._open(key)
+            if not getattr(conn, "is_closed", lambda: False)():
+                self.metrics.connections_reused += 1
+                return conn
+            self.metrics.connections_discarded += 1
+
+    def release(self, key: str, conn):
+        with self.lock:
+            if len(self.idle[key]) < self.max_idle:
+                self.idle[key].append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self, key: str):
+        conn = self.acquire(key)
+        try:
+            yield conn
+        except Exception:
+            # Don't hand a connection in an unknown state to the next borrower
+            conn.close()
+            raise
+        else:
+            self.release(key, conn)
+
+    @contextmanager
+    def cursor(self, key: str):
+        with self.connection(key) as conn:
+            cs = conn.cursor()
+            try:
+                yield cs
+            finally:
+                cs.close()
+
+    def session(self, key: str):
+        # Snowpark session bound to a long-lived pooled connection
+        with self.lock:
+            if key in self.sessions:
+                return self.sessions[key]
+        from snowflake.snowpark import Session
+
+        conn = self.acquire(key)
+        session = Session.builder.configs({"connection": conn}).create()
+        with self.lock:
+            self.sessions[key] = session
+        return session
+
+    def close_all(self):
+        with self.lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+            idle, self.idle = self.idle, {k: [] for k in self.idle}
+        for session in sessions:
+            session.close()
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+@lru_cache(maxsize=None)
+def get_pool() -> SnowflakeConnectionPool:
+    pool = SnowflakeConnectionPool()
+    atexit.register(pool.close_all)
+    return pool
@@ -0,0 +1,254 @@
+# utils/sp500_universe.py
+#
+# The one ticker universe every loader reads. The S&P 500 constituent list
+# comes from Wikipedia but is kept in a local cache:
+#
+#   - Within SP500_UNIVERSE_TTL_HOURS the cache is used as is, with no
+#     network call.
+#   - After that the page is revalidated with If-None-Match /
+#     If-Modified-Since, and a 304 costs one round trip.
+#   - A changed page is streamed through a small HTMLParser that reads only
+#     the first table (the constituents) and stops there, instead of
+#     parsing every table with pd.read_html.
+#
+# Adds and removes are appended to changes.jsonl next to the cache.
+#
+#   tickers = resolve_tickers(inscope=get_tickers_from_snowflake)
+#   get_sp500_universe().changes()        # membership history
+#
+# Offline, e.g. from a saved copy of the page:
+#
+#   SP500Universe(".cache/test").update_from_html(open("sp500.html").read())
+
+import json
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from html.parser import HTMLParser
+
+from utils.data_sources import get_data_source
+
+SP500_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+
+# sp500: the cached Wikipedia list. inscope: each loader's own Snowflake
+# TICKERS_INSCOPE read (the previous behaviour for dividends and sentiment).
+UNIVERSE_SOURCE = os.getenv("UNIVERSE_SOURCE", "sp500")
+SP500_UNIVERSE_CACHE = os.getenv("SP500_UNIVERSE_CACHE", ".cache/sp500")
+SP500_UNIVERSE_TTL_HOURS = float(os.getenv("SP500_UNIVERSE_TTL_HOURS", "24"))
+
+# A parse with fewer rows than this means the page layout changed; the
+# cached list is kept rather than replaced
+MIN_CONSTITUENTS = 400
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ConstituentTableParser(HTMLParser):
+    # Collects the cell text of each row of the first <table> and sets
+    # `done` when it closes; nested tables are skipped
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.done = False
+        self._depth = 0
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'table':
+            self._depth += 1
+        elif self._depth == 1 and tag == 'tr':
+            self._row = []
+        elif self._depth == 1 and tag in ('td', 'th') and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self._depth:
+            return
+        if tag == 'table':
+            self._depth -= 1
+            self.done = self._depth == 0
+        elif self._depth == 1 and tag in ('td', 'th') and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif self._depth == 1 and tag == 'tr' and self._row:
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None and self._depth == 1:
+            self._cell.append(data)
+
+    def members(self) -> list:
+        if not self.rows:
+            return []
+        header = [h.lower() for h in self.rows[0]]
+        symbol = header.index('symbol') if 'symbol' in header else 0
+        security = header.index('security') if 'security' in header else None
+        sector = header.index('gics sector') if 'gics sector' in header else None
+        members = []
+        for row in self.rows[1:]:
+            if len(row) <= symbol or not row[symbol]:
+                continue
+            members.append({
+                'symbol': row[symbol],
+                'security': row[security] if security is not None and security < len(row) else None,
+                'sector': row[sector] if sector is not None and sector < len(row) else None,
+            })
+        return members
+
+
+def parse_constituents(chunks) -> list:
+    # `chunks` is the page as a string or an iterable of text chunks;
+    # reading stops once the first table has closed
+    parser = ConstituentTableParser()
+    for chunk in ([chunks] if isinstance(chunks, str) else chunks):
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.members()
+
+
+class SP500Universe:
+    STATE = "constituents.json"
+    CHANGES = "changes.jsonl"
+
+    def __init__(self, cache_dir: str = SP500_UNIVERSE_CACHE, url: str = SP500_URL,
+                 ttl_hours: float = SP500_UNIVERSE_TTL_HOURS, session=None):
+        self.cache_dir = cache_dir
+        self.url = url
+        self.ttl_hours = ttl_hours
+        self.session = session
+        self.requests = 0
+        self.not_modified = 0
+        self.state = self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _load(self) -> dict:
+        path = self._path(self.STATE)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {'members': []}
+
+    def _save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(self.STATE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def _fresh(self, now: datetime) -> bool:
+        checked = self.state.get('checked_at')
+        if not checked or not self.state['members']:
+            return False
+        return (now - datetime.fromisoformat(checked)).total_seconds() < self.ttl_hours * 3600
+
+    # -------------------
+    # Refresh
+    # -------------------
+    def refresh(self, force: bool = False) -> dict:
+        # Returns the diff applied ({} when nothing changed)
+        now = datetime.now(timezone.utc)
+        if not force and self._fresh(now):
+            return {}
+
+        if self.session is None:
+            import requests
+            self.session = get_data_source().wrap_session(requests.Session(), "wikipedia")
+
+        headers = {"User-Agent": "Mozilla/5.0"}
+        if self.state['members'] and self.state.get('etag'):
+            headers["If-None-Match"] = self.state['etag']
+        if self.state['members'] and self.state.get('last_modified'):
+            headers["If-Modified-Since"] = self.state['last_modified']
+
+        self.requests += 1
+        with self.session.get(self.url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304:
+                self.not_modified += 1
+                self.state['checked_at'] = now.isoformat()
+                self._save()
+                return {}
+            response.raise_for_status()
+            response.encoding = response.encoding or "utf-8"
+            members = parse_constituents(response.iter_content(CHUNK_SIZE, decode_unicode=True))
+            validators = {'etag': response.headers.get("ETag"),
+                          'last_modified': response.headers.get("Last-Modified")}
+
+        return self._apply(members, now, **validators)
+
+    def update_from_html(self, html: str) -> dict:
+        return self._apply(parse_constituents(html), datetime.now(timezone.utc))
+
+    def _apply(self, members: list, now: datetime, etag: str = None, last_modified: str = None) -> dict:
+        if len(members) < MIN_CONSTITUENTS:
+            raise ValueError(f"Parsed only {len(members)} S&P 500 constituents from {self.url}; "
+                             f"keeping the cached list")
+
+        before = {m['symbol'] for m in self.state['members']}
+        after = {m['symbol'] for m in members}
+        diff = {}
+        if before != after:
+            diff = {'at': now.isoformat(), 'added': sorted(after - before), 'removed': sorted(before - after)}
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(self.CHANGES), "a") as f:
+                f.write(json.dumps(diff) + "\n")
+            if before:
+                print(f"S&P 500 membership changed: +{len(diff['added'])} {diff['added']} "
+                      f"-{len(diff['removed'])} {diff['removed']}")
+            self.state['changed_at'] = now.isoformat()
+
+        self.state.update(members=sorted(members, key=lambda m: m['symbol']), etag=etag,
+                          last_modified=last_modified, checked_at=now.isoformat())
+        self._save()
+        return diff
+
+    # -------------------
+    # Read
+    # -------------------
+    def tickers(self) -> list:
+        # Refreshes at most once per TTL; falls back to a stale cache if
+        # the page can't be reached
+        try:
+            self.refresh()
+        except Exception as e:
+            if not self.state['members']:
+                raise
+            print(f"Using cached S&P 500 list from {self.state.get('checked_at')}: {e}")
+        return [m['symbol'] for m in self.state['members']]
+
+    def changes(self) -> list:
+        path = self._path(self.CHANGES)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def summary(self) -> str:
+        return (f"S&P 500 universe: {len(self.state['members'])} members, {self.requests} requests "
+                f"({self.not_modified} not modified), checked {self.state.get('checked_at')}")
+
+
+@lru_cache(maxsize=None)
+def get_sp500_universe() -> SP500Universe:
+    return SP500Universe()
+
+
+@lru_cache(maxsize=None)
+def _sp500_tickers() -> tuple:
+    return tuple(get_sp500_universe().tickers())
+
+
+def resolve_tickers(inscope=None) -> list:
+    # The run's ticker list; resolved once per process and shared by every
+    # loader in it. With UNIVERSE_SOURCE=inscope, loaders that pass their
+    # TICKERS_INSCOPE reader use it instead; the market-data loaders have
+    # none and always take the S&P 500 list.
+    if UNIVERSE_SOURCE == "inscope" and inscope is not None:
+        return inscope()
+    return list(_sp500_tickers())
@@ -0,0 +1,41 @@
+# utils/stage_timer.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    # Thread-safe wall-time and call counts per named stage, e.g.
+    #
+    #   with timer.stage("fetch"):
+    #       df = get_dividend_history(ticker)
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.items = {}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, items)
+
+    def add(self, name: str, seconds: float, items: int = 0):
+        with self.lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.items[name] = self.items.get(name, 0) + items
+
+    def summary(self) -> str:
+        wall = time.perf_counter() - self.started
+        lines = [f"Wall time: {wall:.1f}s"]
+        for name in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            calls = self.calls[name]
+            lines.append(f"  {name:<10} {self.seconds[name]:8.1f}s total over {calls} calls "
+                         f"({self.seconds[name] / calls:.3f}s avg)")
+        return "\n".join(lines)
@@ -0,0 +1,173 @@
+# utils/trading_calendar.py
+#
+# NYSE sessions as one sorted datetime64[D] array, built once from
+# pandas_market_calendars and cached on disk. Every lookup is a
+# searchsorted over that array, so loaders no longer construct a calendar
+# and a valid_days range on each run.
+#
+#   calendar = get_calendar()
+#   calendar.previous_session(date.today())          # last session before today
+#   calendar.sessions_between("2024-01-01", "2024-03-31")
+#   calendar.missing_sessions(df['DATE'])            # gaps in one ticker's rows
+#
+# The cache covers TRADING_CALENDAR_START through about a year ahead and is
+# rebuilt once it no longer reaches a month past today.
+
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+TRADING_CALENDAR_CACHE = os.getenv("TRADING_CALENDAR_CACHE", ".cache/nyse_sessions.npz")
+TRADING_CALENDAR_START = os.getenv("TRADING_CALENDAR_START", "1990-01-01")
+
+EXCHANGE = "NYSE"
+AHEAD_DAYS = 366
+MIN_AHEAD_DAYS = 31
+
+
+def _day(value) -> np.datetime64:
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[D]')
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+def _days(values) -> np.ndarray:
+    dates = pd.to_datetime(pd.Series(values))
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy().astype('datetime64[D]')
+
+
+class TradingCalendar:
+    def __init__(self, sessions: np.ndarray, start, end):
+        self.sessions = np.asarray(sessions, dtype='datetime64[D]')
+        self.start = _day(start)
+        self.end = _day(end)
+
+    @classmethod
+    def build(cls, start=TRADING_CALENDAR_START, end=None, exchange: str = EXCHANGE):
+        import pandas_market_calendars as mcal
+
+        end = end or date.today() + timedelta(days=AHEAD_DAYS)
+        days = mcal.get_calendar(exchange).valid_days(start_date=str(_day(start)), end_date=str(_day(end)))
+        return cls(days.tz_localize(None).to_numpy().astype('datetime64[D]'), start, end)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as cached:
+            return cls(cached['sessions'], cached['start'][()], cached['end'][()])
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, sessions=self.sessions, start=self.start, end=self.end)
+        os.replace(tmp, path)
+
+    def _check(self, day: np.datetime64):
+        if day < self.start or day > self.end:
+            raise ValueError(f"{day} is outside the cached calendar ({self.start} to {self.end})")
+
+    # -------------------
+    # Lookups
+    # -------------------
+    def is_session(self, day) -> bool:
+        day = _day(day)
+        self._check(day)
+        i = np.searchsorted(self.sessions, day)
+        return i < len(self.sessions) and self.sessions[i] == day
+
+    def previous_session(self, day) -> pd.Timestamp:
+        # Latest session strictly before `day`
+        day = _day(day)
+        self._check(day)
+        i = np.searchsorted(self.sessions, day, side='left')
+        if i == 0:
+            raise ValueError(f"No trading session before {day}")
+        return pd.Timestamp(self.sessions[i - 1])
+
+    def next_session(self, day) -> pd.Timestamp:
+        # Earliest session strictly after `day`
+        day = _day(day)
+        self._check(day)
+        i = np.searchsorted(self.sessions, day, side='right')
+        if i == len(self.sessions):
+            raise ValueError(f"No trading session after {day}")
+        return pd.Timestamp(self.sessions[i])
+
+    def session_on_or_after(self, day) -> pd.Timestamp:
+        day = _day(day)
+        return pd.Timestamp(day) if self.is_session(day) else self.next_session(day)
+
+    def sessions_between(self, start, end) -> np.ndarray:
+        # Inclusive on both ends
+        start, end = _day(start), _day(end)
+        self._check(start)
+        self._check(end)
+        lo = np.searchsorted(self.sessions, start, side='left')
+        hi = np.searchsorted(self.sessions, end, side='right')
+        return self.sessions[lo:hi]
+
+    def count_sessions(self, start, end) -> int:
+        start, end = _day(start), _day(end)
+        return int(np.searchsorted(self.sessions, end, side='right') - np.searchsorted(self.sessions, start))
+
+    # -------------------
+    # Gaps
+    # -------------------
+    def missing_sessions(self, dates, start=None, end=None) -> np.ndarray:
+        # Sessions in [start, end] (default: the first and last of `dates`)
+        # with no row in `dates`
+        observed = np.unique(_days(dates))
+        if not len(observed):
+            return observed
+        expected = self.sessions_between(start if start is not None else observed[0],
+                                         end if end is not None else observed[-1])
+        return expected[~np.isin(expected, observed, assume_unique=True)]
+
+    def missing_by_ticker(self, frame: pd.DataFrame, ticker: str = 'TICKER', date_col: str = 'DATE',
+                          start=None, end=None) -> pd.DataFrame:
+        # One (ticker, date) row per missing session, for all tickers at
+        # once. Each row's date is mapped to its session number with
+        # searchsorted; a ticker's expected sessions are the contiguous
+        # numbers between its bounds, so the gaps are the unmarked slots
+        # of one flat array.
+        codes, names = pd.factorize(frame[ticker], sort=True)
+        days = _days(frame[date_col])
+        index = np.searchsorted(self.sessions, days)
+        on_session = (index < len(self.sessions)) & (self.sessions[np.minimum(index, len(self.sessions) - 1)] == days)
+
+        lo = np.full(len(names), len(self.sessions), dtype=np.int64)
+        hi = np.full(len(names), -1, dtype=np.int64)
+        np.minimum.at(lo, codes[on_session], index[on_session])
+        np.maximum.at(hi, codes[on_session], index[on_session])
+        if start is not None:
+            lo[:] = np.searchsorted(self.sessions, _day(start))
+        if end is not None:
+            hi[:] = np.searchsorted(self.sessions, _day(end), side='right') - 1
+        width = np.maximum(hi - lo + 1, 0)
+        offsets = np.concatenate([[0], np.cumsum(width)[:-1]])
+
+        present = np.zeros(int(width.sum()), dtype=bool)
+        inside = on_session & (index >= lo[codes]) & (index <= hi[codes])
+        present[offsets[codes[inside]] + index[inside] - lo[codes[inside]]] = True
+
+        missing = np.flatnonzero(~present)
+        owner = np.repeat(np.arange(len(names)), width)[missing]
+        session = lo[owner] + missing - offsets[owner]
+        return pd.DataFrame({ticker: np.asarray(names)[owner], date_col: pd.to_datetime(self.sessions[session])})
+
+
+@lru_cache(maxsize=None)
+def get_calendar(path: str = TRADING_CALENDAR_CACHE) -> TradingCalendar:
+    # Loads the cached sessions, rebuilding when missing or close to running out
+    horizon = _day(date.today() + timedelta(days=MIN_AHEAD_DAYS))
+    if os.path.exists(path):
+        calendar = TradingCalendar.load(path)
+        if calendar.end >= horizon and calendar.start <= _day(TRADING_CALENDAR_START):
+            return calendar
+    calendar = TradingCalendar.build()
+    calendar.save(path)
+    return calendar